@@ -0,0 +1,155 @@
+from collections import deque
+import numpy as np
+
+class BallSearcher:
+    """
+    Trajectory-guided ball selection and search.
+
+    A constant-velocity model over the last ball positions predicts where the ball
+    should be in the next frame:
+    1. If the full-frame detector found a ball near the prediction, that one is picked
+       (instead of blindly taking the first ball box).
+    2. Otherwise the detector runs at native resolution on a small crop around the
+       prediction; the crop grows with every missed frame.
+       Without `detect_fn` the most confident full-frame ball is taken instead.
+    3. After `max_misses` frames without the ball, the track is lost: the full-frame
+       candidates are trusted again and, if there are none, a tiled native-resolution
+       search runs every `tile_interval` frames until the ball is found.
+
+    `detect_fn(images, imgsz)` must return one sv.Detections (ball class only) per image.
+    """
+    def __init__(self, detect_fn=None, roi_size=320, max_misses=5, tile_size=640,
+                 tile_overlap=64, tile_interval=5, history=5):
+        self.detect_fn = detect_fn
+        self.roi_size = roi_size
+        self.max_misses = max_misses
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.tile_interval = tile_interval
+
+        self.history = deque(maxlen=history)   # (frame_idx, center (2,), box size (2,))
+        self.frame_idx = -1
+        self.misses = 0
+        self.pixels_searched = 0               # Crop/tile pixels sent to the detector
+
+    def __getstate__(self):
+        # Checkpoints keep the track, not the detector callback (set again on resume)
+        state = self.__dict__.copy()
+        state["detect_fn"] = None
+        return state
+
+    def restart(self):
+        """Drops the ball track, e.g. when the next frame does not follow the last one (a seek)."""
+        self.history.clear()
+        self.misses = 0
+
+    # --- Motion model ---
+    def predict(self):
+        """Predicted ball center for the current frame, or None if there is no track."""
+        if not self.history or self.misses >= self.max_misses:
+            return None
+        f_last, c_last, _ = self.history[-1]
+        if len(self.history) == 1:
+            return c_last
+        f_prev, c_prev, _ = self.history[-2]
+        velocity = (c_last - c_prev) / (f_last - f_prev)
+        return c_last + velocity * (self.frame_idx - f_last)
+
+    def search_radius(self):
+        """Half size of the search window; grows while the ball is missing."""
+        return self.roi_size / 2 * min(1 + 0.5 * self.misses, 3)
+
+    # --- Main entry point ---
+    def select(self, frame, balls):
+        """
+        Picks this frame's ball from the full-frame detections `balls` (sv.Detections),
+        running ROI or tiled search when needed. Returns an xyxy box or None.
+        """
+        self.frame_idx += 1
+        predicted = self.predict()
+
+        if predicted is not None:
+            box = self.closest(balls.xyxy, predicted)
+            if box is None:
+                if self.detect_fn is not None:
+                    box = self.closest(self.search_roi(frame, predicted), predicted)
+                else:
+                    # No native-resolution search to fall back on: a ball outside the window
+                    # (e.g. after a sudden direction change) beats losing the track for max_misses frames
+                    box = self.most_confident(balls)
+        else:
+            box = self.most_confident(balls)
+            if box is None and self.detect_fn is not None and self.frame_idx % self.tile_interval == 0:
+                candidates = self.search_tiles(frame)
+                box = candidates[0] if len(candidates) > 0 else None
+
+        self.update(box)
+        return box
+
+    def update(self, box):
+        if box is None:
+            self.misses += 1
+            return
+        box = np.asarray(box, dtype=np.float32)
+        center = np.array([(box[0] + box[2]) / 2, (box[1] + box[3]) / 2])
+        size = np.array([box[2] - box[0], box[3] - box[1]])
+        self.history.append((self.frame_idx, center, size))
+        self.misses = 0
+
+    # --- Candidate selection ---
+    def closest(self, xyxy, predicted):
+        """Candidate nearest to the prediction, if it lies inside the search window."""
+        if len(xyxy) == 0: return None
+        centers = np.stack([(xyxy[:, 0] + xyxy[:, 2]) / 2, (xyxy[:, 1] + xyxy[:, 3]) / 2], axis=1)
+        distances = np.linalg.norm(centers - predicted, axis=1)
+        best = distances.argmin()
+        if distances[best] > self.search_radius(): return None
+        return xyxy[best]
+
+    def most_confident(self, balls):
+        if len(balls) == 0: return None
+        if balls.confidence is None: return balls.xyxy[0]
+        return balls.xyxy[balls.confidence.argmax()]
+
+    # --- Native-resolution search ---
+    def search_roi(self, frame, predicted):
+        """Runs the detector on a crop centered on the prediction. Returns xyxy in frame pixels."""
+        h, w = frame.shape[:2]
+        half = int(self.search_radius())
+        cx, cy = int(predicted[0]), int(predicted[1])
+        x1, y1 = max(0, cx - half), max(0, cy - half)
+        x2, y2 = min(w, cx + half), min(h, cy + half)
+        if x2 - x1 < 8 or y2 - y1 < 8:
+            return np.empty((0, 4), dtype=np.float32)
+        return self.detect_regions(frame, [(x1, y1, x2, y2)])
+
+    def search_tiles(self, frame):
+        """Tiled full-frame search at native resolution, most confident candidates first."""
+        h, w = frame.shape[:2]
+        step = self.tile_size - self.tile_overlap
+        regions = []
+        for y1 in range(0, max(h - self.tile_overlap, 1), step):
+            for x1 in range(0, max(w - self.tile_overlap, 1), step):
+                regions.append((x1, y1, min(x1 + self.tile_size, w), min(y1 + self.tile_size, h)))
+        return self.detect_regions(frame, regions, sort_by_confidence=True)
+
+    def detect_regions(self, frame, regions, sort_by_confidence=False):
+        crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in regions]
+        imgsz = int(np.ceil(max(max(c.shape[:2]) for c in crops) / 32) * 32)
+        self.pixels_searched += sum(c.shape[0] * c.shape[1] for c in crops)
+
+        boxes, scores = [], []
+        for (x1, y1, _, _), detections in zip(regions, self.detect_fn(crops, imgsz)):
+            if len(detections) == 0: continue
+            boxes.append(detections.xyxy + np.array([x1, y1, x1, y1], dtype=np.float32))
+            if detections.confidence is not None:
+                scores.append(detections.confidence)
+            else:
+                scores.append(np.ones(len(detections)))
+
+        if not boxes:
+            return np.empty((0, 4), dtype=np.float32)
+        boxes = np.concatenate(boxes).astype(np.float32)
+        if sort_by_confidence:
+            boxes = boxes[np.argsort(-np.concatenate(scores))]
+        return boxes
@@ -0,0 +1,227 @@
+"""
+Runs the pipeline over many matches: every video in a directory, or the jobs of a JSON manifest.
+
+    python batch.py /data/tournament --output /data/out --workers 2
+    python batch.py matches.json --output /data/out --no-render
+
+Each worker process loads the model once and then takes jobs from the queue (a job whose
+manifest `config` changes the weights or detector settings loads its own). A match's court
+calibration is `<video stem>_court.json` next to the video (make it with
+`python get_court_coordinates.py match.mp4 match_court.json`), or `calibration` in the manifest,
+or COURT_CALIBRATION otherwise.
+
+Manifest: a JSON list of jobs, paths relative to the manifest file:
+    [{"video": "day1/final.mp4", "calibration": "day1/final_court.json", "config": {"DETECTION_STRIDE": 2}}]
+
+Progress is kept in <output>/batch_state.json. Finished jobs are skipped when the batch is run
+again, and an interrupted job resumes PASS 1 from its last checkpoint (CHECKPOINT_INTERVAL).
+"""
+import argparse
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import config
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".m4v", ".ts")
+
+def load_jobs(source, output_dir, render=True):
+    """Job dicts (name, video, calibration, target, metrics, config) for a directory or a manifest."""
+    if os.path.isdir(source):
+        entries = [{"video": name} for name in sorted(os.listdir(source))
+                   if name.lower().endswith(VIDEO_EXTENSIONS)]
+        base_dir = source
+    else:
+        with open(source, 'r') as f:
+            entries = json.load(f)
+        base_dir = os.path.dirname(os.path.abspath(source))
+
+    jobs = []
+    for entry in entries:
+        video = os.path.join(base_dir, entry["video"])
+        stem = os.path.splitext(os.path.basename(video))[0]
+        name = entry.get("name", stem)
+
+        calibration = entry.get("calibration")
+        if calibration is not None:
+            calibration = os.path.join(base_dir, calibration)
+        elif os.path.exists(os.path.splitext(video)[0] + "_court.json"):
+            calibration = os.path.splitext(video)[0] + "_court.json"
+        else:
+            calibration = config.COURT_CALIBRATION
+
+        target = entry.get("target")
+        if target is not None:
+            target = os.path.join(base_dir, target)
+        else:
+            # The job's own RENDER_VIDEO wins over --no-render, as it does when the job runs
+            job_render = entry.get("config", {}).get("RENDER_VIDEO", render)
+            target = os.path.join(output_dir, f"{name}.mp4" if job_render else f"{name}.parquet")
+
+        unknown = [key for key in entry.get("config", {}) if not (key.isupper() and hasattr(config, key))]
+        if unknown:
+            raise ValueError(f"Job {name}: unknown config settings {unknown}")
+
+        jobs.append({
+            "name": name,
+            "video": video,
+            "calibration": calibration,
+            "target": target,
+            "metrics": os.path.join(output_dir, f"{name}_metrics.json"),
+            "config": entry.get("config", {}),
+        })
+
+    names = [job["name"] for job in jobs]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate job names {duplicates}: set \"name\" in the manifest")
+    return jobs
+
+# --- Worker side ---
+_base_config = {}
+
+# Settings the loaded model depends on: a job that changes one of them gets a new model
+DETECTOR_SETTINGS = ("MODEL_PATH", "DETECTOR_BACKEND", "DETECTOR_DEVICE", "DETECTOR_INT8", "DETECTOR_THREADS",
+                     "DETECTOR_IMGSZ", "DETECTOR_CONF", "DETECTOR_IOU")
+_detector_settings = {}
+
+def _init_worker(config_values):
+    # Same settings as the parent. The model is loaded by the first job that needs it (main.get_detector)
+    # and then kept for all later jobs of this worker
+    for name, value in config_values.items():
+        setattr(config, name, value)
+    _base_config.update(config_values)
+
+def run_job(job):
+    """Runs one match in this worker. Returns its summary (frames, seconds, fps, stage fps)."""
+    import main
+
+    # Settings of an earlier job must not leak into this one
+    for name, value in _base_config.items():
+        setattr(config, name, value)
+    for name, value in job["config"].items():
+        setattr(config, name, value)
+    config.VIDEO_SOURCE = job["video"]
+    config.COURT_CALIBRATION = job["calibration"]
+    config.METRICS_JSON = job["metrics"]
+    if config.RENDER_VIDEO:
+        config.VIDEO_TARGET = job["target"]
+    else:
+        config.TRACKS_TARGET = job["target"]
+
+    # This match's calibration and a fresh tracker, built on first use. The model is kept unless
+    # this job's detector settings differ from the ones it was loaded with
+    main.view_transformer = None
+    main.tracker = None
+    settings = {name: getattr(config, name) for name in DETECTOR_SETTINGS}
+    if settings != _detector_settings:
+        main.detector = None
+        _detector_settings.clear()
+        _detector_settings.update(settings)
+
+    cap, info = main.open_video(job["video"])
+    if cap is None:
+        return {"status": "failed", "error": f"Could not open {job['video']}"}
+    cap.release()
+
+    # A metrics file left by an earlier run must not count as this run's output
+    if os.path.exists(job["metrics"]):
+        os.remove(job["metrics"])
+    start = time.perf_counter()
+    try:
+        main.main()
+    except Exception as e:
+        traceback.print_exc()
+        return {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+    seconds = time.perf_counter() - start
+
+    if not os.path.exists(job["metrics"]):
+        return {"status": "failed", "error": "The pipeline stopped without output"}
+    with open(job["metrics"], 'r') as f:
+        stages = json.load(f)["stages"]
+    return {
+        "status": "done",
+        "target": job["target"],
+        "frames": info["frame_count"],
+        "seconds": round(seconds, 2),
+        "fps": round(info["frame_count"] / seconds, 2) if seconds > 0 else 0.0,
+        "stage_fps": {stage: round(s["frames"] / s["seconds"], 1)
+                      for stage, s in stages.items() if s["seconds"] > 0},
+    }
+
+# --- Parent side ---
+def load_state(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_state(path, state):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+def print_summary(jobs, state):
+    print(f"\n{'job':<24} {'status':<8} {'frames':>8} {'seconds':>9} {'fps':>7}  slowest stage")
+    total_frames = total_seconds = 0
+    for job in jobs:
+        result = state.get(job["name"], {"status": "pending"})
+        if result["status"] != "done":
+            print(f"{job['name']:<24} {result['status']:<8}  {result.get('error', '')}")
+            continue
+        total_frames += result["frames"]
+        total_seconds += result["seconds"]
+        stage_fps = result.get("stage_fps", {})
+        slowest = min(stage_fps, key=stage_fps.get) if stage_fps else "-"
+        slowest_text = f"{slowest} ({stage_fps[slowest]:.1f} fps)" if stage_fps else slowest
+        print(f"{job['name']:<24} {'done':<8} {result['frames']:>8} {result['seconds']:>9.1f} "
+              f"{result['fps']:>7.1f}  {slowest_text}")
+    if total_seconds > 0:
+        print(f"{'total':<24} {'':<8} {total_frames:>8} {total_seconds:>9.1f} {total_frames / total_seconds:>7.1f}")
+
+def run_batch(jobs, output_dir, workers=1, force=False):
+    state_path = os.path.join(output_dir, "batch_state.json")
+    state = load_state(state_path)
+    pending = [job for job in jobs if force or state.get(job["name"], {}).get("status") != "done"]
+    print(f"[INFO] {len(jobs)} jobs, {len(jobs) - len(pending)} already done, "
+          f"{len(pending)} to run on {workers} worker(s).")
+
+    if pending:
+        config_values = {name: value for name, value in vars(config).items() if name.isupper()}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config_values,)) as pool:
+            futures = {pool.submit(run_job, job): job for job in pending}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # The worker process died (e.g. out of memory): the job resumes on the next run
+                    result = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+                state[job["name"]] = {"video": job["video"], **result}
+                save_state(state_path, state)
+                print(f"[INFO] Job {job['name']}: {result['status']}")
+
+    print_summary(jobs, state)
+    return state
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Directory of videos or a JSON manifest")
+    parser.add_argument("--output", required=True, help="Directory for the outputs, metrics and batch state")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (each loads the model once)")
+    parser.add_argument("--no-render", action="store_true", help="Export track tables instead of videos")
+    parser.add_argument("--force", action="store_true", help="Also run the jobs that are already done")
+    args = parser.parse_args()
+
+    if args.no_render:
+        config.RENDER_VIDEO = False
+    os.makedirs(args.output, exist_ok=True)
+    jobs = load_jobs(args.source, args.output, render=config.RENDER_VIDEO)
+    state = run_batch(jobs, args.output, args.workers, args.force)
+    if any(state.get(job["name"], {}).get("status") != "done" for job in jobs):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,105 @@
+"""
+Camera motion benchmark: cost per frame and court-position error of CameraMotion on a
+synthetic broadcast-style shot (the synthetic match with textured stands, filmed by a camera
+that pans and zooms), against the known ground truth and against the static calibration.
+
+    python benchmarks/bench_camera_motion.py --resolution 1080p --frames 500
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import cv2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import config
+from box_propagation import small_gray
+from camera_motion import CameraMotion
+from view_transformer import ViewTransformer
+from synthetic import RESOLUTIONS, SyntheticMatch
+
+# The world canvas is larger than the view, so the camera has room to pan
+WORLD_SCALE = 1.4
+
+def make_world(width, height, seed=0):
+    """The match on a canvas WORLD_SCALE times the view, with random texture (crowd, boards) outside the court."""
+    match = SyntheticMatch(int(width * WORLD_SCALE), int(height * WORLD_SCALE), seed)
+    rng = np.random.default_rng(seed)
+    texture = rng.integers(0, 255, (match.height // 8, match.width // 8, 3), dtype=np.uint8)
+    texture = cv2.resize(cv2.GaussianBlur(texture, (3, 3), 0), (match.width, match.height),
+                         interpolation=cv2.INTER_NEAREST)
+    outside = np.full((match.height, match.width), 255, dtype=np.uint8)
+    margin = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]]) * 40 * match.scale
+    cv2.fillPoly(outside, [(match.court + margin).astype(np.int32)], 0)
+    return match, texture, outside.astype(bool)
+
+def camera_at(i, width, height, world_size, pan, zoom):
+    """World -> view homography of frame i: a slow pan left and right plus a zoom in and out."""
+    cx = world_size[0] / 2 + pan * width * np.sin(i / 90)
+    cy = world_size[1] / 2 + 0.3 * pan * height * np.sin(i / 140)
+    z = (1 + zoom * (1 - np.cos(i / 120)) / 2) / WORLD_SCALE * 1.2
+    return np.array([[z, 0, width / 2 - z * cx], [0, z, height / 2 - z * cy], [0, 0, 1]])
+
+def project(matrix, points):
+    return cv2.perspectiveTransform(np.asarray(points, dtype=np.float64).reshape(-1, 1, 2), matrix).reshape(-1, 2)
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolution", default="1080p", choices=list(RESOLUTIONS))
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--pan", type=float, default=0.15, help="Pan amplitude (fraction of the frame width)")
+    parser.add_argument("--zoom", type=float, default=0.3, help="Extra zoom at the tightest point")
+    args = parser.parse_args()
+
+    width, height = RESOLUTIONS[args.resolution]
+    match, texture, outside = make_world(width, height)
+    world_size = (match.width, match.height)
+
+    # Calibrate on frame 0, as get_court_coordinates.py does
+    view_transformer = ViewTransformer(None)
+    first_camera = camera_at(0, width, height, world_size, args.pan, args.zoom)
+    view_transformer.pixel_vertices = project(first_camera, match.court).astype(np.float32)
+    view_transformer.perspective_transformer = cv2.getPerspectiveTransform(
+        view_transformer.pixel_vertices, view_transformer.target_vertices)
+    camera = CameraMotion(
+        view_transformer.perspective_transformer, scale=config.CAMERA_MOTION_SCALE,
+        max_features=config.CAMERA_MAX_FEATURES, min_features=config.CAMERA_MIN_FEATURES,
+        max_drift=config.CAMERA_MAX_DRIFT, keyframe_interval=config.CAMERA_KEYFRAME_INTERVAL,
+        min_feature_ratio=config.CAMERA_MIN_FEATURE_RATIO, min_keyframe_gap=config.CAMERA_MIN_KEYFRAME_GAP)
+    view_transformer.camera_motion = camera
+
+    print(f"[INFO] {args.frames} frames at {width}x{height}, pan {args.pan:g}, zoom {args.zoom:g}...")
+    seconds = []
+    errors, static_errors = [], []
+    for i in range(args.frames):
+        world = match.render(i)
+        world[outside] = texture[outside]
+        world_camera = camera_at(i, width, height, world_size, args.pan, args.zoom)
+        frame = cv2.warpPerspective(world, world_camera, (width, height))
+        xyxy, class_id = match.boxes(i)
+        boxes = np.concatenate([project(world_camera, xyxy[:, :2]), project(world_camera, xyxy[:, 2:])], axis=1)
+
+        start = time.perf_counter()
+        camera.update(small_gray(frame, config.CAMERA_MOTION_SCALE), boxes)
+        seconds.append(time.perf_counter() - start)
+
+        # Players' feet: ground truth via the world, estimate via the frame's matrix
+        feet = match.home + match.amplitude * np.sin(match.speed * i + match.phase)
+        feet_view = project(world_camera, feet)
+        truth = project(view_transformer.perspective_transformer @ first_camera @ np.linalg.inv(world_camera), feet_view)
+        errors.append(np.linalg.norm(view_transformer.transform_points(feet_view, i) - truth, axis=1))
+        static_errors.append(np.linalg.norm(view_transformer.transform_points(feet_view) - truth, axis=1))
+
+    ms = 1000 * np.array(seconds)
+    errors, static_errors = np.concatenate(errors), np.concatenate(static_errors)
+    print(f"[INFO] Tracking: {ms.mean():.2f} ms/frame (p50 {np.percentile(ms, 50):.2f}, p95 {np.percentile(ms, 95):.2f}, "
+          f"max {ms.max():.2f}) -> {1000 / ms.mean():.0f} fps")
+    print(f"[INFO] Keyframes: {camera.keyframes} ({camera.refinements} refined), {camera.lost_frames} frames without a fit")
+    print(f"[INFO] Court error, camera motion:    mean {errors.mean():.3f} m, p95 {np.percentile(errors, 95):.3f} m, "
+          f"max {errors.max():.3f} m")
+    print(f"[INFO] Court error, static homography: mean {static_errors.mean():.3f} m, "
+          f"p95 {np.percentile(static_errors, 95):.3f} m, max {static_errors.max():.3f} m")
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,97 @@
+"""
+Throughput vs tracking-ID stability of the adaptive detection stride.
+
+Runs PASS 1 (decode, YOLO, propagation, ByteTrack) once per stride on the same video
+and compares the player/referee tracks with the stride-1 run:
+  - id switches: a reference track changes its matched tracker ID (IoU >= 0.5)
+  - coverage:    share of reference boxes that have a match at all
+
+    python benchmarks/bench_detection_stride.py [video] --strides 1 2 3 4 --frames 3000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+import supervision as sv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import config
+import metrics
+import main
+
+def run_pass_one(video, max_frames):
+    """Returns (seconds, per-frame (xyxy, tracker_id) of players + referees)."""
+    main.get_tracker().reset()
+    timer = metrics.PipelineMetrics()
+    tracks = []
+    start = time.perf_counter()
+    for _, _, players, referees, _ in main.detect_video(video, timer):
+        people = sv.Detections.merge([players, referees])
+        tracker_id = people.tracker_id if people.tracker_id is not None else np.empty(0, dtype=int)
+        tracks.append((people.xyxy, tracker_id))
+        if len(tracks) == max_frames: break
+    return time.perf_counter() - start, tracks
+
+def id_stability(reference, candidate):
+    id_switches = 0
+    matched = total = 0
+    last_match = {}   # reference ID -> candidate ID it was last matched to
+
+    for (ref_xyxy, ref_ids), (xyxy, ids) in zip(reference, candidate):
+        total += len(ref_ids)
+        if len(ref_ids) == 0 or len(ids) == 0: continue
+        iou = sv.box_iou_batch(ref_xyxy, xyxy)
+        best = iou.argmax(axis=1)
+        for r, c in enumerate(best):
+            if iou[r, c] < 0.5: continue
+            matched += 1
+            ref_id, cand_id = ref_ids[r], ids[c]
+            if ref_id in last_match and last_match[ref_id] != cand_id:
+                id_switches += 1
+            last_match[ref_id] = cand_id
+
+    return {"id_switches": id_switches, "coverage": matched / total if total else 1.0}
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video", nargs="?", default=config.VIDEO_SOURCE)
+    parser.add_argument("--strides", type=int, nargs="+", default=[1, 2, 3, 4, 6])
+    parser.add_argument("--frames", type=int, default=None, help="Only the first N frames")
+    parser.add_argument("--method", default=config.PROPAGATION_METHOD, choices=["flow", "velocity"])
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    config.PROPAGATION_METHOD = args.method
+    strides = sorted(set(args.strides) | {1})
+    reference = None
+    results = []
+    for stride in strides:
+        config.DETECTION_STRIDE = stride
+        seconds, tracks = run_pass_one(args.video, args.frames)
+        if stride == 1:
+            reference, reference_seconds = tracks, seconds
+
+        n_ids = len({int(t) for _, ids in tracks for t in ids})
+        results.append({
+            "stride": stride,
+            "method": args.method,
+            "frames": len(tracks),
+            "fps": len(tracks) / seconds,
+            "speedup": reference_seconds / seconds,
+            "unique_ids": n_ids,
+            **id_stability(reference, tracks),
+        })
+
+    print(f"\n{'stride':>6} {'fps':>8} {'speedup':>8} {'ids':>6} {'id sw.':>7} {'coverage':>9}")
+    for r in results:
+        print(f"{r['stride']:>6} {r['fps']:>8.1f} {r['speedup']:>7.2f}x {r['unique_ids']:>6} "
+              f"{r['id_switches']:>7} {r['coverage']:>8.1%}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,117 @@
+"""
+Accuracy and speed of the exported CPU backends against the PyTorch (ultralytics) path
+on a fixed clip. The first --frames frames are decoded up front, so only inference is timed.
+
+Accuracy is measured against the ultralytics detections of the same frames, matching
+boxes of the same class at IoU >= 0.5: precision, recall, mean IoU and mean confidence
+difference of the matches.
+
+    python benchmarks/bench_detector_backends.py [video] --frames 300 --backends ultralytics onnx openvino --int8 --threads 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+import cv2
+import supervision as sv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import config
+import detectors
+
+def read_frames(video, n):
+    cap = cv2.VideoCapture(video)
+    frames = []
+    while len(frames) < n:
+        ret, frame = cap.read()
+        if not ret: break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+def run_backend(detector, frames, batch_size):
+    detector.detect(frames[:batch_size])   # warm-up (lazy init, first-call allocations)
+    detections = []
+    start = time.perf_counter()
+    for k in range(0, len(frames), batch_size):
+        detections.extend(detector.detect(frames[k:k + batch_size]))
+    return time.perf_counter() - start, detections
+
+def compare(reference, candidate):
+    matched = n_ref = n_cand = 0
+    ious, conf_diffs = [], []
+    for ref, cand in zip(reference, candidate):
+        n_ref += len(ref)
+        n_cand += len(cand)
+        if len(ref) == 0 or len(cand) == 0: continue
+        iou = sv.box_iou_batch(ref.xyxy, cand.xyxy)
+        iou[ref.class_id[:, None] != cand.class_id[None]] = 0
+        # Greedy one-to-one matching, best pairs first
+        for r, c in zip(*np.unravel_index(np.argsort(-iou, axis=None), iou.shape)):
+            if iou[r, c] < 0.5: break
+            if np.isnan(iou[r, c]): continue
+            matched += 1
+            ious.append(iou[r, c])
+            conf_diffs.append(abs(ref.confidence[r] - cand.confidence[c]))
+            iou[r, :] = np.nan
+            iou[:, c] = np.nan
+
+    return {
+        "precision": matched / n_cand if n_cand else 1.0,
+        "recall": matched / n_ref if n_ref else 1.0,
+        "mean_iou": float(np.mean(ious)) if ious else 0.0,
+        "mean_conf_diff": float(np.mean(conf_diffs)) if conf_diffs else 0.0,
+    }
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video", nargs="?", default=config.VIDEO_SOURCE)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--backends", nargs="+", default=["ultralytics", "onnx", "openvino"])
+    parser.add_argument("--device", default=config.DETECTOR_DEVICE, help="Device of the ultralytics reference (e.g. 0 or cpu)")
+    parser.add_argument("--int8", action="store_true", help="Use the int8 exports")
+    parser.add_argument("--threads", type=int, default=config.DETECTOR_THREADS)
+    parser.add_argument("--batch", type=int, default=config.INFERENCE_BATCH_SIZE)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    config.DETECTOR_DEVICE = int(args.device) if str(args.device).isdigit() else args.device
+    config.DETECTOR_INT8 = args.int8
+    config.DETECTOR_THREADS = args.threads
+
+    frames = read_frames(args.video, args.frames)
+    print(f"[INFO] {len(frames)} frames from {args.video}")
+
+    backends = ["ultralytics"] + [b for b in args.backends if b != "ultralytics"]
+    reference = None
+    results = []
+    for backend in backends:
+        try:
+            detector = detectors.create_detector(backend)
+        except ImportError as e:
+            print(f"[WARNING] Skipping {backend}: {e}")
+            continue
+        seconds, detections = run_backend(detector, frames, args.batch)
+        if reference is None:
+            reference = detections
+        results.append({
+            "backend": backend + (" int8" if args.int8 and backend != "ultralytics" else ""),
+            "ms_per_frame": 1000 * seconds / len(frames),
+            "fps": len(frames) / seconds,
+            "detections_per_frame": sum(len(d) for d in detections) / len(frames),
+            **compare(reference, detections),
+        })
+
+    print(f"\n{'backend':<16} {'ms/frame':>9} {'fps':>7} {'det/frame':>10} {'precision':>10} {'recall':>7} {'IoU':>6} {'|dconf|':>8}")
+    for r in results:
+        print(f"{r['backend']:<16} {r['ms_per_frame']:>9.1f} {r['fps']:>7.1f} {r['detections_per_frame']:>10.1f} "
+              f"{r['precision']:>10.1%} {r['recall']:>7.1%} {r['mean_iou']:>6.3f} {r['mean_conf_diff']:>8.3f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main_cli()
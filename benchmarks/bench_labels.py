@@ -0,0 +1,117 @@
+"""
+Annotation benchmark: player/referee ellipses and labels plus the coordinate labels, drawn
+with the supervision annotators (as the renderer used to) and with the cached sprites of
+sprites.py (as FrameRenderer does now), on the synthetic match. Reports ms per frame for both,
+the sprite cache hit rate and how many pixels differ between the two outputs.
+
+    python benchmarks/bench_labels.py --resolution 1080p --frames 300 --players 14
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import supervision as sv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import config
+from renderer import get_color_tuple
+from sprites import LabelSprites, LabelStyle, EllipseSprites
+from synthetic import RESOLUTIONS, SyntheticMatch
+
+class SupervisionLayer:
+    """The annotators FrameRenderer used before the sprite cache."""
+    def __init__(self):
+        self.ell_1 = sv.EllipseAnnotator(color=config.COLOR_TEAM_1, thickness=2)
+        self.ell_2 = sv.EllipseAnnotator(color=config.COLOR_TEAM_2, thickness=2)
+        self.coord = sv.LabelAnnotator(color=sv.Color.WHITE, text_color=sv.Color.BLACK,
+                                       text_position=sv.Position.TOP_CENTER, text_scale=0.5, text_padding=5)
+        self.label_1 = sv.LabelAnnotator(color=config.COLOR_TEAM_1, text_color=sv.Color.BLACK,
+                                         text_position=sv.Position.BOTTOM_CENTER)
+        self.label_2 = sv.LabelAnnotator(color=config.COLOR_TEAM_2, text_color=sv.Color.WHITE,
+                                         text_position=sv.Position.BOTTOM_CENTER)
+        self.label_ref = sv.LabelAnnotator(color=config.COLOR_REF, text_color=sv.Color.WHITE,
+                                           text_position=sv.Position.TOP_CENTER)
+
+    def draw(self, frame, players_1, players_2, referees, court_1, court_2):
+        frame = self.label_ref.annotate(frame, referees, labels=[f"Ref {t}" for t in referees.tracker_id])
+        frame = self.ell_1.annotate(frame, players_1)
+        frame = self.label_1.annotate(frame, players_1, labels=[f"#{t}" for t in players_1.tracker_id])
+        frame = self.ell_2.annotate(frame, players_2)
+        frame = self.label_2.annotate(frame, players_2, labels=[f"#{t}" for t in players_2.tracker_id])
+        labels = [f"({x:.1f}m, {y:.1f}m)" for x, y in np.concatenate([court_1, court_2])]
+        return self.coord.annotate(frame, sv.Detections.merge([players_1, players_2]), labels=labels)
+
+class SpriteLayer:
+    """The same drawing with the cached sprites, as in FrameRenderer.render."""
+    def __init__(self):
+        self.colors = get_color_tuple(config.COLOR_TEAM_1), get_color_tuple(config.COLOR_TEAM_2)
+        black, white = sv.Color.BLACK.as_bgr(), sv.Color.WHITE.as_bgr()
+        self.sprites = LabelSprites(capacity=config.LABEL_CACHE_SIZE)
+        self.ellipses = EllipseSprites(thickness=2)
+        self.styles = (LabelStyle(self.colors[0], black, position="bottom"),
+                       LabelStyle(self.colors[1], white, position="bottom"))
+        self.ref_style = LabelStyle(get_color_tuple(config.COLOR_REF), white, position="top")
+        self.coord_style = LabelStyle(white, black, position="top", text_scale=0.5, padding=5)
+
+    def draw(self, frame, players_1, players_2, referees, court_1, court_2):
+        self.sprites.draw(frame, self.ref_style, referees.get_anchors_coordinates(sv.Position.TOP_CENTER).astype(int),
+                          referees.tracker_id, lambda t: f"Ref {t}")
+        for players, color, style in zip((players_1, players_2), self.colors, self.styles):
+            self.ellipses.draw(frame, players.xyxy, color)
+            self.sprites.draw(frame, style, players.get_anchors_coordinates(sv.Position.BOTTOM_CENTER).astype(int),
+                              players.tracker_id, lambda t: f"#{t}")
+        anchors = np.concatenate([players_1.get_anchors_coordinates(sv.Position.TOP_CENTER),
+                                  players_2.get_anchors_coordinates(sv.Position.TOP_CENTER)]).astype(int)
+        keys = [tuple(key) for key in np.round(np.concatenate([court_1, court_2]) * 10).astype(int).tolist()]
+        self.sprites.draw(frame, self.coord_style, anchors, keys, lambda key: f"({key[0] / 10:.1f}m, {key[1] / 10:.1f}m)")
+        return frame
+
+def scene(match, i, players):
+    """Detections of frame i: `players` players (the match's 12, repeated with an offset if more) and the referee."""
+    xyxy, class_id = match.boxes(i)
+    people = xyxy[class_id == config.ID_PLAYER]
+    copies = [people + [k * 25, k * 15, k * 25, k * 15] for k in range(-(-players // len(people)))]
+    people = np.concatenate(copies)[:players]
+    team = np.arange(players) % 2
+    ids = np.arange(1, players + 1)
+    # Metres from the feet position in the frame (a stand-in for the homography)
+    court = np.stack([(people[:, 0] + people[:, 2]) / 2 / match.width * 18, people[:, 3] / match.height * 9], axis=1)
+    make = lambda mask: sv.Detections(xyxy=people[mask], class_id=np.full(mask.sum(), config.ID_PLAYER), tracker_id=ids[mask])
+    referees = sv.Detections(xyxy=xyxy[class_id == config.ID_REF], class_id=np.array([config.ID_REF]), tracker_id=np.array([99]))
+    return make(team == 0), make(team == 1), referees, court[team == 0], court[team == 1]
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolution", default="1080p", choices=list(RESOLUTIONS))
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--players", type=int, default=14)
+    args = parser.parse_args()
+
+    width, height = RESOLUTIONS[args.resolution]
+    match = SyntheticMatch(width, height)
+    background = match.render(0)
+    layers = {"supervision": SupervisionLayer(), "sprites": SpriteLayer()}
+    seconds = {name: 0.0 for name in layers}
+    differing = 0
+
+    print(f"[INFO] {args.frames} frames at {width}x{height} with {args.players} players...")
+    for i in range(args.frames):
+        detections = scene(match, i, args.players)
+        outputs = {}
+        for name, layer in layers.items():
+            frame = background.copy()
+            start = time.perf_counter()
+            outputs[name] = layer.draw(frame, *detections)
+            seconds[name] += time.perf_counter() - start
+        differing += int((outputs["supervision"] != outputs["sprites"]).any(axis=2).sum())
+
+    for name, total in seconds.items():
+        print(f"      {name:<12} {1000 * total / args.frames:7.3f} ms/frame")
+    sprites = layers["sprites"].sprites
+    print(f"[INFO] Speed-up {seconds['supervision'] / seconds['sprites']:.1f}x, sprite cache hit rate "
+          f"{sprites.hits / max(1, sprites.hits + sprites.misses):.1%} ({len(sprites.sprites)} sprites)")
+    print(f"[INFO] Pixels that differ from the supervision output: {differing} in {args.frames} frames")
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,164 @@
+"""
+Per-stage pipeline benchmark on synthetic court videos (no real video, no weights, CPU only).
+
+For each resolution a synthetic match is generated once (cached in --workdir), then the
+three-pass pipeline of main.py runs on it as it does on a match (threaded decoding, batched
+inference, DetectionStore, interpolation, rendering and threaded encoding), with the
+deterministic stub detector in place of YOLO. Every stage main.py times is reported.
+
+The report is JSON. With --baseline, stages that got slower than the baseline by more
+than --tolerance are listed and the script exits with code 1.
+
+    python benchmarks/bench_pipeline.py --resolutions 720p 1080p 4K --frames 300 --output report.json
+    python benchmarks/bench_pipeline.py --baseline report.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+import cv2
+import supervision as sv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import config
+import main
+import metrics
+from view_transformer import ViewTransformer
+from synthetic import RESOLUTIONS, SCENE_VERSION, StubDetector, make_video
+
+# Differences below this are timer noise, not regressions
+MIN_REGRESSION_MS = 0.05
+# The ball stages only measure something if the ball survives tracking in most frames
+MIN_BALL_SHARE = 0.5
+
+def view_transformer_for(match):
+    view_transformer = ViewTransformer()
+    view_transformer.pixel_vertices = match.court.astype(np.float32)
+    view_transformer.perspective_transformer = cv2.getPerspectiveTransform(
+        view_transformer.pixel_vertices, view_transformer.target_vertices)
+    return view_transformer
+
+def run_pipeline(video, match, output, timer):
+    """
+    main.run_three_pass on `video` with the stub detector and the synthetic court calibration,
+    every stage timed into `timer`. Returns the ball boxes after PASS 2 (interpolation).
+    """
+    config.VIDEO_SOURCE = video
+    config.VIDEO_TARGET = output
+    config.METRICS_JSON = os.path.splitext(output)[0] + "_metrics.json"
+    config.USE_DETECTION_CACHE = False
+    main.detector = StubDetector(match)
+    main.tracker = None
+    main.view_transformer = view_transformer_for(match)
+
+    ball_boxes = []
+    create_metrics, interpolate_ball = main.create_metrics, main.interpolate_ball
+    def recording_interpolate_ball(*args, **kwargs):
+        ball_boxes.append(interpolate_ball(*args, **kwargs))
+        return ball_boxes[-1]
+    main.create_metrics = lambda: timer
+    main.interpolate_ball = recording_interpolate_ball
+    try:
+        main.run_three_pass()
+    finally:
+        main.create_metrics, main.interpolate_ball = create_metrics, interpolate_ball
+    return ball_boxes[0]
+
+def run_resolution(name, frames, workdir):
+    width, height = RESOLUTIONS[name]
+    video = os.path.join(workdir, f"synthetic_v{SCENE_VERSION}_{name}_{frames}.mp4")
+    print(f"[INFO] {name}: preparing {video}...")
+    match = make_video(video, width, height, frames)
+
+    timer = metrics.PipelineMetrics()
+    start = time.perf_counter()
+    ball_boxes = run_pipeline(video, match, os.path.join(workdir, f"output_{name}.mp4"), timer)
+    wall = time.perf_counter() - start
+    n_frames = len(ball_boxes)
+    ball_frames = int(np.isfinite(ball_boxes[:, 0]).sum())
+    if ball_frames < MIN_BALL_SHARE * n_frames:
+        print(f"[ERROR] {name}: ball in only {ball_frames}/{n_frames} frames after PASS 2, the ball stages ran on empty input")
+        sys.exit(1)
+
+    # ms per *video* frame, so the stages add up (decode runs in PASS 1 and PASS 3)
+    stages = {
+        stage: {
+            "seconds": round(values["seconds"], 4),
+            "ms_per_frame": round(1000 * values["seconds"] / n_frames, 4),
+            **{k: round(values[k], 4) for k in ("p50_ms", "p95_ms", "p99_ms")},
+        }
+        for stage, values in timer.summary()["stages"].items()
+    }
+    return {
+        "size": [width, height],
+        "frames": n_frames,
+        "ball_frames": ball_frames,
+        "wall_seconds": round(wall, 3),
+        "fps": round(n_frames / wall, 2),
+        "stages": stages,
+    }
+
+def find_regressions(report, baseline, tolerance):
+    regressions = []
+    for name, result in report["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if old is None: continue
+        for stage, values in result["stages"].items():
+            if stage not in old["stages"]: continue
+            before, after = old["stages"][stage]["ms_per_frame"], values["ms_per_frame"]
+            if after > before * (1 + tolerance) and after - before > MIN_REGRESSION_MS:
+                regressions.append(f"{name} {stage}: {before:.3f} -> {after:.3f} ms/frame")
+    return regressions
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "volleyball_bench"))
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_report.json"))
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown per stage (0.25 = 25%%)")
+    args = parser.parse_args()
+    os.makedirs(args.workdir, exist_ok=True)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "supervision": sv.__version__,
+            "encoder": config.VIDEO_ENCODER,
+        },
+        "results": {name: run_resolution(name, args.frames, args.workdir) for name in args.resolutions},
+    }
+
+    stage_names = list(dict.fromkeys(s for r in report["results"].values() for s in r["stages"]))
+    print(f"\n{'ms/frame':<18}" + "".join(f"{name:>10}" for name in report["results"]))
+    for stage in stage_names:
+        row = [r["stages"].get(stage, {}).get("ms_per_frame", float('nan')) for r in report["results"].values()]
+        print(f"{stage:<18}" + "".join(f"{v:>10.2f}" for v in row))
+    print(f"{'fps (wall)':<18}" + "".join(f"{r['fps']:>10.1f}" for r in report["results"].values()))
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"[INFO] Report saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = find_regressions(report, json.load(f), args.tolerance)
+        if regressions:
+            print("[ERROR] Slower than the baseline:")
+            for line in regressions:
+                print(f"      {line}")
+            sys.exit(1)
+        print("[INFO] No stage regressed beyond the tolerance.")
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,170 @@
+"""
+Startup benchmark: how long `import main` takes, and the time from a cold interpreter to the
+first annotated frame of a short synthetic video (STREAMING_MODE, no detection cache, no court
+calibration). Each measurement runs in a fresh Python process, so nothing is already imported.
+
+The import must not load the model, the tracker or the calibration, nor sklearn, pandas or a
+detector runtime. The first frame is rendered with the stub detector of synthetic.py, or with
+the real model when --weights is given.
+
+The script exits with code 1 when a budget is exceeded or the import loads heavy modules, so it
+can gate changes (tests/test_startup.py runs the same checks under pytest):
+
+    python benchmarks/bench_startup.py --import-budget 2.0 --first-frame-budget 6.0
+    python benchmarks/bench_startup.py --weights yolo.pt --warm-up
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Modules only the detector (torch, ultralytics, onnxruntime, openvino) or team fitting (sklearn,
+# pandas) need: importing main must not load them
+HEAVY_MODULES = ["sklearn", "pandas", "torch", "ultralytics", "onnxruntime", "openvino"]
+
+# Seconds; also checked by tests/test_startup.py
+IMPORT_BUDGET = 2.0
+FIRST_FRAME_BUDGET = 6.0
+
+def measure_import():
+    start = time.perf_counter()
+    import main
+    seconds = time.perf_counter() - start
+    return {
+        "seconds": seconds,
+        "heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules],
+        "built": [name for name in ("detector", "tracker", "view_transformer") if getattr(main, name) is not None],
+    }
+
+def measure_first_frame(video, output, weights, warm_up):
+    start = time.perf_counter()
+    import config
+    import detectors
+    import renderer
+    import main
+    from synthetic import StubDetector, SyntheticMatch
+    import_seconds = time.perf_counter() - start
+
+    config.VIDEO_SOURCE = video
+    config.VIDEO_TARGET = output
+    config.STREAMING_MODE = True
+    config.USE_DETECTION_CACHE = False
+    config.COURT_CALIBRATION = None
+    config.DETECTOR_WARMUP = warm_up
+    if weights:
+        config.MODEL_PATH = weights
+    else:
+        import cv2
+        cap = cv2.VideoCapture(video)
+        match = SyntheticMatch(int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        cap.release()
+        detectors.create_detector = lambda backend=None: StubDetector(match)
+
+    first_frame = []
+    render = renderer.FrameRenderer.render
+    def timed_render(self, *args, **kwargs):
+        frame = render(self, *args, **kwargs)
+        if not first_frame:
+            first_frame.append(time.perf_counter() - start)
+        return frame
+    renderer.FrameRenderer.render = timed_render
+
+    main.main()
+    return {"import_seconds": import_seconds, "seconds": first_frame[0] if first_frame else None,
+            "total_seconds": time.perf_counter() - start}
+
+def run_child(workdir, *args):
+    """Runs this script in a fresh interpreter with the given --child arguments. Returns its JSON result."""
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), "--workdir", workdir, "--child", *args],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        print(result.stdout + result.stderr)
+        raise RuntimeError(f"Startup measurement '{args[0]}' failed (exit code {result.returncode})")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def measure_startup(workdir, resolution="720p", frames=60, repeat=3, weights=None, warm_up=False):
+    """
+    Runs the measurements in fresh interpreters, `repeat` times each, and returns the best times:
+    {"import_seconds", "heavy_modules", "built", "first_frame_seconds" (None if no frame was
+    rendered), "total_seconds"}, plus the video size.
+    """
+    os.makedirs(workdir, exist_ok=True)
+    from synthetic import RESOLUTIONS, SCENE_VERSION, make_video
+    width, height = RESOLUTIONS[resolution]
+    video = os.path.join(workdir, f"synthetic_v{SCENE_VERSION}_{resolution}_{frames}.mp4")
+    make_video(video, width, height, frames)
+    output = os.path.join(workdir, "startup_output.mp4")
+
+    imports = [run_child(workdir, "import") for _ in range(repeat)]
+    first_frames = [run_child(workdir, "first_frame", video, output, weights or "", "1" if warm_up else "0")
+                    for _ in range(repeat)]
+    rendered = all(run["seconds"] is not None for run in first_frames)
+    return {
+        "size": (width, height),
+        "import_seconds": min(run["seconds"] for run in imports),
+        "heavy_modules": imports[0]["heavy_modules"],
+        "built": imports[0]["built"],
+        "first_frame_seconds": min(run["seconds"] for run in first_frames) if rendered else None,
+        "total_seconds": min(run["total_seconds"] for run in first_frames),
+    }
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (the best one counts)")
+    parser.add_argument("--resolution", default="720p")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--weights", help="Real YOLO weights instead of the stub detector")
+    parser.add_argument("--warm-up", action="store_true", help="Warm the model up before the first frame (DETECTOR_WARMUP)")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET, help="Seconds allowed for `import main`")
+    parser.add_argument("--first-frame-budget", type=float, default=FIRST_FRAME_BUDGET,
+                        help="Seconds allowed from a cold interpreter to the first annotated frame")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "volleyball_bench"))
+    parser.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # Inside the fresh interpreter: print the measurement as the last line of stdout.
+        # Runs from the work directory, so no court_config.json or detection_cache of the repo is picked up
+        os.chdir(args.workdir)
+        if args.child[0] == "import":
+            result = measure_import()
+        else:
+            _, video, output, weights, warm_up = args.child
+            result = measure_first_frame(video, output, weights, warm_up == "1")
+        print(json.dumps(result))
+        return
+
+    startup = measure_startup(args.workdir, args.resolution, args.frames, args.repeat, args.weights, args.warm_up)
+    if startup["first_frame_seconds"] is None:
+        print("[ERROR] No frame was rendered")
+        sys.exit(1)
+    best_import, best_first = startup["import_seconds"], startup["first_frame_seconds"]
+
+    detector = args.weights or "stub detector"
+    print(f"[INFO] import main:      {best_import:.2f}s (budget {args.import_budget:g}s)")
+    print(f"[INFO] First frame:      {best_first:.2f}s (budget {args.first_frame_budget:g}s), {detector}, "
+          f"{startup['size'][0]}x{startup['size'][1]}")
+    print(f"[INFO] Whole run:        {startup['total_seconds']:.2f}s for {args.frames} frames")
+
+    errors = []
+    if startup["heavy_modules"]:
+        errors.append(f"import main loads {', '.join(startup['heavy_modules'])}")
+    if startup["built"]:
+        errors.append(f"import main builds {', '.join(startup['built'])}")
+    if best_import > args.import_budget:
+        errors.append(f"import main takes {best_import:.2f}s (budget {args.import_budget:g}s)")
+    if best_first > args.first_frame_budget:
+        errors.append(f"first frame after {best_first:.2f}s (budget {args.first_frame_budget:g}s)")
+    if errors:
+        for error in errors:
+            print(f"[ERROR] {error}")
+        sys.exit(1)
+    print("[INFO] Startup within budget.")
+
+if __name__ == "__main__":
+    main_cli()
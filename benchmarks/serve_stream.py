@@ -0,0 +1,94 @@
+"""
+Serves a video file as a live stream at its own frame rate, to test the live mode without a camera.
+The frames are re-encoded (H.264, zero-latency tuning) and sent as MPEG-TS over UDP, or to any
+other URL/format PyAV can write. Without a file, a synthetic match is streamed.
+
+    python benchmarks/serve_stream.py match.mp4 --url udp://127.0.0.1:5000 --loop
+    python main.py --live udp://127.0.0.1:5000
+"""
+import argparse
+import os
+import sys
+import time
+import av
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from synthetic import RESOLUTIONS, SyntheticMatch
+
+def file_frames(path, loop):
+    while True:
+        with av.open(path) as container:
+            stream = container.streams.video[0]
+            stream.thread_type = "AUTO"
+            for frame in container.decode(stream):
+                yield frame.to_ndarray(format="bgr24")
+        if not loop: return
+
+def synthetic_frames(match):
+    """Endless: stop it with --frames or Ctrl+C."""
+    i = 0
+    while True:
+        yield match.render(i)
+        i += 1
+
+def serve(frames, url, fps, size, max_frames=None, fmt="mpegts"):
+    """Encodes `frames` to `url`, one every 1/fps seconds. Returns the number of frames sent."""
+    if url.startswith("udp://") and "?" not in url:
+        url += "?pkt_size=1316"   # One MPEG-TS bundle per datagram
+    output = av.open(url, "w", format=fmt)
+    stream = output.add_stream("libx264", rate=int(round(fps)))
+    stream.width, stream.height = size
+    stream.pix_fmt = "yuv420p"
+    # A keyframe with SPS/PPS every second, so a receiver can join at any time
+    stream.codec_context.gop_size = int(round(fps))
+    stream.options = {"preset": "ultrafast", "tune": "zerolatency", "x264-params": "repeat-headers=1"}
+
+    start = time.perf_counter()
+    sent = 0
+    try:
+        for image in frames:
+            # Paced at the source frame rate, like a camera
+            delay = start + sent / fps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            frame = av.VideoFrame.from_ndarray(image, format="bgr24")
+            for packet in stream.encode(frame):
+                output.mux(packet)
+            sent += 1
+            if max_frames is not None and sent >= max_frames: break
+        for packet in stream.encode():
+            output.mux(packet)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        output.close()
+    return sent
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video", nargs="?", help="File to stream (default: synthetic match)")
+    parser.add_argument("--url", default="udp://127.0.0.1:5000")
+    parser.add_argument("--format", default="mpegts", help="Container for the URL (e.g. rtsp for an RTSP server)")
+    parser.add_argument("--loop", action="store_true", help="Start over at the end of the file")
+    parser.add_argument("--frames", type=int, default=None, help="Stop after N frames")
+    parser.add_argument("--fps", type=float, default=None, help="Override the frame rate")
+    parser.add_argument("--resolution", default="720p", choices=list(RESOLUTIONS), help="Synthetic match size")
+    args = parser.parse_args()
+
+    if args.video:
+        with av.open(args.video) as container:
+            stream = container.streams.video[0]
+            fps = args.fps or float(stream.average_rate or 25)
+            size = (stream.width, stream.height)
+        frames = file_frames(args.video, args.loop)
+    else:
+        size = RESOLUTIONS[args.resolution]
+        fps = args.fps or 50.0
+        frames = synthetic_frames(SyntheticMatch(*size))
+
+    print(f"[INFO] Streaming {args.video or 'synthetic match'} ({size[0]}x{size[1]} @ {fps:g} fps) to {args.url}...")
+    sent = serve(frames, args.url, fps, size, args.frames, args.format)
+    print(f"[INFO] Sent {sent} frames.")
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,144 @@
+"""
+Synthetic court videos and a deterministic stub detector, so the pipeline can be
+benchmarked without a real match or the YOLO weights.
+"""
+import os
+import sys
+import numpy as np
+import cv2
+import supervision as sv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import config
+
+RESOLUTIONS = {"720p": (1280, 720), "1080p": (1920, 1080), "4K": (3840, 2160)}
+# Part of the cached video names: bump when the scene changes, so old videos are not reused
+SCENE_VERSION = 2
+
+FLOOR_BGR = (60, 120, 170)
+TEAM_BGR = [(200, 90, 20), (40, 40, 210)]   # Jerseys: team 1 left half, team 2 right half
+SHORTS_BGR = (30, 30, 30)
+REF_BGR = (20, 20, 20)
+BALL_BGR = (0, 230, 255)
+BALL_RADIUS = 12               # On the 1280x720 canvas
+BALL_PERIOD = 160              # Frames per flight across the court
+
+class SyntheticMatch:
+    """
+    Deterministic scene: 12 players (6 per half) swaying around their positions,
+    one referee and a ball flying in arcs, with a dead-ball pause every 200 frames.
+    The ball is large and slow enough to survive ByteTrack's IoU matching from frame to frame.
+    Geometry is defined on a 1280x720 canvas and scaled to the requested size.
+    """
+    def __init__(self, width, height, seed=0):
+        rng = np.random.default_rng(seed)
+        self.width, self.height = width, height
+        self.scale = np.array([width / 1280, height / 720])
+
+        # Court corners (TL, TR, BR, BL) in the same order as ViewTransformer expects
+        self.court = np.array([[250, 300], [1030, 300], [1200, 680], [80, 680]]) * self.scale
+
+        home_x = np.concatenate([rng.uniform(200, 560, 6), rng.uniform(720, 1080, 6)])
+        home_y = rng.uniform(380, 640, 12)
+        self.home = np.stack([home_x, home_y], axis=1)
+        self.amplitude = rng.uniform(10, 40, (12, 2))
+        self.speed = rng.uniform(0.02, 0.08, (12, 2))
+        self.phase = rng.uniform(0, 2 * np.pi, (12, 2))
+        self.team = np.repeat([0, 1], 6)
+
+    def boxes(self, i):
+        """(xyxy, class_id) of everything visible in frame i, in pixels of the output size."""
+        feet = self.home + self.amplitude * np.sin(self.speed * i + self.phase)
+        players = np.concatenate([feet - [20, 100], feet + [20, 0]], axis=1)
+        referee = np.array([[620, 180, 660, 290]]) + [5 * np.sin(i / 30), 0, 5 * np.sin(i / 30), 0]
+
+        xyxy = [players, referee]
+        class_id = [np.full(12, config.ID_PLAYER), [config.ID_REF]]
+        if i % 200 < 170:
+            # BALL_PERIOD frames per arc: about 6 px across and at most 8 px up or down per frame against
+            # a 24 px ball, so consecutive boxes overlap enough (IoU > 0.3) for ByteTrack to keep its track
+            t = (i % BALL_PERIOD) / BALL_PERIOD
+            x = 150 + 980 * t if (i // BALL_PERIOD) % 2 == 0 else 1130 - 980 * t
+            y = 420 - 320 * (1 - 4 * (t - 0.5) ** 2)
+            r = BALL_RADIUS
+            xyxy.append([[x - r, y - r, x + r, y + r]])
+            class_id.append([config.ID_BALL])
+
+        xyxy = np.concatenate(xyxy).astype(np.float32) * np.tile(self.scale, 2).astype(np.float32)
+        return xyxy, np.concatenate(class_id).astype(int)
+
+    def render(self, i):
+        frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        frame[:] = FLOOR_BGR
+        thickness = max(2, int(3 * self.scale[0]))
+        cv2.polylines(frame, [self.court.astype(np.int32)], True, (255, 255, 255), thickness)
+        net = ((self.court[0] + self.court[1]) / 2).astype(int), ((self.court[2] + self.court[3]) / 2).astype(int)
+        cv2.line(frame, tuple(map(int, net[0])), tuple(map(int, net[1])), (255, 255, 255), thickness)
+
+        xyxy, class_id = self.boxes(i)
+        k = 0
+        for box, c in zip(xyxy.astype(int), class_id):
+            x1, y1, x2, y2 = box
+            if c == config.ID_PLAYER:
+                split = y1 + (y2 - y1) * 6 // 10
+                cv2.rectangle(frame, (x1, y1), (x2, split), TEAM_BGR[self.team[k]], -1)
+                cv2.rectangle(frame, (x1, split), (x2, y2), SHORTS_BGR, -1)
+                k += 1
+            elif c == config.ID_REF:
+                cv2.rectangle(frame, (x1, y1), (x2, y2), REF_BGR, -1)
+            else:
+                cv2.circle(frame, ((x1 + x2) // 2, (y1 + y2) // 2), (x2 - x1) // 2, BALL_BGR, -1)
+        return frame
+
+def make_video(path, width, height, frames, fps=50, seed=0):
+    """Writes the synthetic match to `path` (mp4v) unless it already exists. Returns the SyntheticMatch."""
+    match = SyntheticMatch(width, height, seed)
+    if os.path.exists(path):
+        cap = cv2.VideoCapture(path)
+        complete = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) >= frames
+        cap.release()
+        if complete:
+            return match
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    for i in range(frames):
+        writer.write(match.render(i))
+    writer.release()
+    return match
+
+class StubDetector:
+    """
+    Stands in for detectors.create_detector(): returns the scene's boxes with a little
+    deterministic jitter and misses the ball on every 7th frame. Frames must come in
+    order from frame 0 (it counts them instead of looking at the pixels).
+    """
+    CLASS_NAMES = {config.ID_PLAYER: "player", config.ID_REF: "referee", config.ID_BALL: "ball"}
+
+    def __init__(self, match, start=0):
+        self.match = match
+        self.frame_idx = start
+
+    def detect(self, frames, imgsz=None, classes=None):
+        detections = []
+        for _ in frames:
+            i = self.frame_idx
+            self.frame_idx += 1
+            rng = np.random.default_rng(i)
+            xyxy, class_id = self.match.boxes(i)
+            xyxy = xyxy + rng.normal(0, 1.0, xyxy.shape).astype(np.float32)
+            confidence = rng.uniform(0.5, 0.95, len(xyxy)).astype(np.float32)
+
+            keep = np.ones(len(xyxy), dtype=bool)
+            if i % 7 == 0:
+                keep &= class_id != config.ID_BALL
+            if classes is not None:
+                keep &= np.isin(class_id, classes)
+
+            class_id = class_id[keep]
+            detections.append(sv.Detections(
+                xyxy=xyxy[keep],
+                confidence=confidence[keep],
+                class_id=class_id,
+                data={"class_name": np.array([self.CLASS_NAMES[c] for c in class_id])},
+            ))
+        return detections
@@ -0,0 +1,148 @@
+import numpy as np
+import cv2
+import supervision as sv
+
+def small_gray(frame, scale):
+    """Downscaled grayscale copy used for the motion check and the optical flow."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if scale != 1:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return gray
+
+class KeyframeScheduler:
+    """
+    Decides which frames get the full detector: every `stride` frames, or earlier when the
+    mean grey-level change against the last keyframe exceeds `motion_threshold`
+    (camera pans, replays, cuts).
+    """
+    def __init__(self, stride=1, motion_threshold=None):
+        self.stride = stride
+        self.motion_threshold = motion_threshold
+        self.last_key_gray = None
+        self.since_key = 0
+        self.frames = 0
+        self.keyframes = 0
+        self.motion_keyframes = 0
+
+    def is_keyframe(self, gray):
+        self.frames += 1
+        self.since_key += 1
+
+        key = self.last_key_gray is None or self.since_key >= self.stride
+        if not key and self.motion_threshold is not None:
+            if cv2.absdiff(gray, self.last_key_gray).mean() > self.motion_threshold:
+                key = True
+                self.motion_keyframes += 1
+
+        if key:
+            self.last_key_gray = gray
+            self.since_key = 0
+            self.keyframes += 1
+        return key
+
+    def restart(self):
+        """The next frame is a keyframe (e.g. after a seek, when there is nothing to propagate from)."""
+        self.last_key_gray = None
+
+class BoxPropagator:
+    """
+    Carries keyframe detections forward to the frames in between, so ByteTrack still
+    sees a box every frame.
+
+    method="flow":     pyramidal Lucas-Kanade on a small grid inside each box (downscaled
+                       gray frames), median shift per box. Boxes whose points are all lost
+                       fall back to their constant velocity.
+    method="velocity": constant velocity per box, estimated between the last two keyframes.
+    """
+    def __init__(self, method="flow", scale=0.5, grid=3):
+        self.method = method
+        self.scale = scale
+        # Points at 25-75% of the box, away from the background at its border
+        ticks = np.linspace(0.25, 0.75, grid)
+        gx, gy = np.meshgrid(ticks, ticks)
+        self.grid = np.stack([gx.ravel(), gy.ravel()], axis=1).astype(np.float32)
+
+        self.detections = sv.Detections.empty()
+        self.origin = np.empty((0, 4), dtype=np.float32)   # Boxes at the last keyframe
+        self.velocity = np.empty((0, 2), dtype=np.float32)  # Pixels per frame
+        self.prev_gray = None
+        self.key_idx = 0
+        self.frame_idx = 0
+
+    def reset(self, detections, gray, frame_idx):
+        """Starts a new segment from fresh keyframe detections."""
+        self.velocity = self.estimate_velocity(detections, frame_idx)
+        self.detections = detections
+        self.origin = detections.xyxy.astype(np.float32)
+        self.prev_gray = gray
+        self.key_idx = frame_idx
+        self.frame_idx = frame_idx
+
+    def estimate_velocity(self, detections, frame_idx):
+        """
+        Matches the new keyframe boxes to the boxes carried since the previous keyframe
+        (same class, nearest center within half a box) and divides the displacement by
+        the elapsed frames. Unmatched boxes get zero velocity.
+        """
+        n = len(detections)
+        velocity = np.zeros((n, 2), dtype=np.float32)
+        if n == 0 or len(self.detections) == 0 or frame_idx <= self.key_idx:
+            return velocity
+
+        new_centers = box_centers(detections.xyxy)
+        distances = np.linalg.norm(new_centers[:, None] - box_centers(self.detections.xyxy)[None], axis=2)
+        distances[detections.class_id[:, None] != self.detections.class_id[None]] = np.inf
+
+        best = distances.argmin(axis=1)
+        size = np.maximum(detections.xyxy[:, 2] - detections.xyxy[:, 0], detections.xyxy[:, 3] - detections.xyxy[:, 1])
+        matched = distances[np.arange(n), best] < size / 2
+        shift = new_centers - box_centers(self.origin)[best]
+        velocity[matched] = shift[matched] / (frame_idx - self.key_idx)
+        return velocity
+
+    def propagate(self, gray):
+        """Returns the detections moved to the frame `gray` (the next frame after the last call)."""
+        self.frame_idx += 1
+        if len(self.detections) == 0:
+            self.prev_gray = gray
+            return self.detections
+
+        shift = self.velocity
+        if self.method == "flow":
+            shift = self.flow_shift(self.prev_gray, gray, self.detections.xyxy)
+            lost = np.isnan(shift[:, 0])
+            shift[lost] = self.velocity[lost]
+
+        xyxy = self.detections.xyxy + np.tile(shift, 2)
+        h, w = gray.shape[:2]
+        xyxy[:, [0, 2]] = np.clip(xyxy[:, [0, 2]], 0, w / self.scale)
+        xyxy[:, [1, 3]] = np.clip(xyxy[:, [1, 3]], 0, h / self.scale)
+
+        detections = sv.Detections(
+            xyxy=xyxy.astype(np.float32),
+            class_id=self.detections.class_id,
+            confidence=self.detections.confidence,
+            data=self.detections.data)
+        self.detections = detections
+        self.prev_gray = gray
+        return detections
+
+    def flow_shift(self, prev_gray, gray, xyxy):
+        """Median optical-flow shift per box in full-resolution pixels (NaN where all points were lost)."""
+        n, k = len(xyxy), len(self.grid)
+        size = xyxy[:, 2:] - xyxy[:, :2]
+        points = (xyxy[:, None, :2] + size[:, None] * self.grid[None]) * self.scale
+        points = points.reshape(-1, 1, 2).astype(np.float32)
+
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(
+            prev_gray, gray, points, None, winSize=(15, 15), maxLevel=2)
+
+        flow = (moved - points).reshape(n, k, 2) / self.scale
+        flow[status.reshape(n, k) == 0] = np.nan
+        shift = np.full((n, 2), np.nan, dtype=np.float32)
+        found = ~np.isnan(flow[:, :, 0]).all(axis=1)
+        shift[found] = np.nanmedian(flow[found], axis=1)
+        return shift
+
+def box_centers(xyxy):
+    return np.stack([(xyxy[:, 0] + xyxy[:, 2]) / 2, (xyxy[:, 1] + xyxy[:, 3]) / 2], axis=1)
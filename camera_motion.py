@@ -0,0 +1,171 @@
+import numpy as np
+import cv2
+
+class CameraMotion:
+    """
+    Per-frame court homographies for footage where the camera pans or zooms.
+    The reference is the first frame (the one get_court_coordinates.py calibrates on).
+
+    - Up to `max_features` corners, picked away from the players' boxes, are tracked
+      frame to frame with pyramidal Lucas-Kanade on downscaled gray frames, so every
+      frame costs about the same.
+    - The camera homography of a frame is fitted (RANSAC) between the corners' positions
+      at the last keyframe and now, then chained to the keyframe's own homography. Errors
+      therefore only add up from keyframe to keyframe, not from frame to frame.
+    - A new keyframe is taken when fewer than `min_feature_ratio` of the corners found at
+      the last keyframe survive, when the fit error (drift, pixels at tracking scale) exceeds
+      `max_drift` or no fit is found, but at most every `min_keyframe_gap` frames, so
+      low-texture footage (few corners to begin with) does not re-detect on every frame.
+      There is one at least every `keyframe_interval` frames. At a keyframe the chained
+      estimate is refined against the reference frame itself: its corners are tracked
+      straight into the keyframe, starting from where the estimate puts them, and the fit is
+      kept if at least `min_features` of them agree.
+
+    The result is one pixel -> court matrix per frame (`base_matrix` composed with the
+    camera motion), kept in a (frames, 3, 3) float32 array that grows geometrically.
+    """
+    def __init__(self, base_matrix, scale=0.25, max_features=150, min_features=50, max_drift=1.0,
+                 keyframe_interval=50, ransac_threshold=2.0, min_feature_ratio=0.5, min_keyframe_gap=5):
+        self.base = np.asarray(base_matrix, dtype=np.float64)
+        self.scale = scale
+        self.max_features = max_features
+        self.min_features = min_features
+        self.max_drift = max_drift
+        self.keyframe_interval = keyframe_interval
+        self.ransac_threshold = ransac_threshold
+        self.min_feature_ratio = min_feature_ratio
+        self.min_keyframe_gap = min_keyframe_gap
+        # Source pixels <-> tracking pixels
+        self.to_small = np.diag([scale, scale, 1.0])
+        self.from_small = np.diag([1 / scale, 1 / scale, 1.0])
+
+        self.reference_gray = None
+        self.reference_points = None
+        self.prev_gray = None
+        self.key_points = np.empty((0, 2), dtype=np.float32)   # Corners at the last keyframe
+        self.points = np.empty((0, 2), dtype=np.float32)       # The same corners now
+        self.key_count = 0                                     # Corners found at the last keyframe
+        self.key_homography = np.eye(3)   # Keyframe -> reference (tracking pixels)
+        self.homography = np.eye(3)       # Current frame -> reference (tracking pixels)
+        self.since_key = 0
+
+        self.matrices = np.empty((1024, 3, 3), dtype=np.float32)
+        self.num_frames = 0
+        self.keyframes = 0
+        self.refinements = 0
+        self.lost_frames = 0
+
+    @classmethod
+    def from_matrices(cls, matrices):
+        """Wraps per-frame matrices computed earlier (e.g. from the detection cache). No tracking state."""
+        camera = cls(np.eye(3))
+        camera.matrices = np.asarray(matrices, dtype=np.float32)
+        camera.num_frames = len(camera.matrices)
+        return camera
+
+    # --- Tracking ---
+    def update(self, gray, boxes=None):
+        """
+        Adds the next frame: its gray image downscaled by `scale` (box_propagation.small_gray)
+        and, to keep new corners off the players, the boxes (xyxy, source pixels) seen in it.
+        """
+        if self.reference_gray is None:
+            self.reference_gray = gray
+            self._new_keyframe(gray, boxes, np.eye(3))
+            self.reference_points = self.key_points.reshape(-1, 1, 2)
+        else:
+            fit, drift = self._track(gray)
+            self.since_key += 1
+            if fit is None:
+                # Cut or heavy occlusion: hold the last homography until a keyframe fits again
+                self.lost_frames += 1
+            else:
+                self.homography = self.key_homography @ fit
+            degraded = (fit is None or drift > self.max_drift
+                        or len(self.points) < self.min_feature_ratio * self.key_count)
+            if (self.since_key >= self.keyframe_interval
+                    or (degraded and self.since_key >= self.min_keyframe_gap)):
+                self._new_keyframe(gray, boxes, self._refine(gray, self.homography))
+        self.prev_gray = gray
+        self._append(self.base @ self.from_small @ self.homography @ self.to_small)
+
+    def _track(self, gray):
+        """Moves the corners to `gray`. Returns (current -> keyframe homography, drift) or (None, inf)."""
+        if len(self.points) < 4:
+            return None, np.inf
+        points, status, _ = cv2.calcOpticalFlowPyrLK(
+            self.prev_gray, gray, self.points.reshape(-1, 1, 2), None, winSize=(15, 15), maxLevel=2)
+        fit, points, key_points, drift = self._fit(points, status, self.key_points)
+        # Corners on moving players are outliers: they are not tracked any further
+        self.points, self.key_points = points, key_points
+        return fit, drift
+
+    def _fit(self, points, status, targets):
+        """
+        RANSAC homography from the tracked `points` to their `targets`.
+        Returns (homography or None, inlier points, their targets, RMS error of the inliers).
+        """
+        found = status.ravel() == 1
+        points, targets = points.reshape(-1, 2)[found], targets.reshape(-1, 2)[found]
+        if len(points) < 4:
+            return None, points, targets, np.inf
+        fit, inliers = cv2.findHomography(points, targets, cv2.RANSAC, self.ransac_threshold)
+        if fit is None:
+            return None, points, targets, np.inf
+        inliers = inliers.ravel() == 1
+        points, targets = points[inliers], targets[inliers]
+        projected = cv2.perspectiveTransform(points.reshape(-1, 1, 2), fit).reshape(-1, 2)
+        error = float(np.sqrt(((projected - targets) ** 2).sum(axis=1).mean()))
+        return fit, points, targets, error
+
+    def _refine(self, gray, estimate):
+        """
+        Re-registers `gray` on the reference frame: the reference corners are tracked into it,
+        starting from where `estimate` (current -> reference) puts them. Keeps the estimate
+        when too few of them are found or the fit is poor (e.g. the view has moved away).
+        """
+        if self.reference_points is None or len(self.reference_points) < self.min_features:
+            return estimate
+        guess = cv2.perspectiveTransform(self.reference_points, np.linalg.inv(estimate)).astype(np.float32)
+        points, status, _ = cv2.calcOpticalFlowPyrLK(
+            self.reference_gray, gray, self.reference_points, guess, winSize=(15, 15), maxLevel=2,
+            flags=cv2.OPTFLOW_USE_INITIAL_FLOW)
+        height, width = gray.shape[:2]
+        inside = (points[:, 0, 0] >= 0) & (points[:, 0, 0] < width) & (points[:, 0, 1] >= 0) & (points[:, 0, 1] < height)
+        fit, points, _, error = self._fit(points, status.ravel() & inside, self.reference_points)
+        if fit is None or len(points) < self.min_features or error > self.max_drift:
+            return estimate
+        self.refinements += 1
+        return fit
+
+    def _new_keyframe(self, gray, boxes, homography):
+        mask = np.full(gray.shape[:2], 255, dtype=np.uint8)
+        if boxes is not None:
+            for x1, y1, x2, y2 in (np.asarray(boxes) * self.scale).astype(int):
+                mask[max(0, y1):max(0, y2), max(0, x1):max(0, x2)] = 0
+        corners = cv2.goodFeaturesToTrack(gray, self.max_features, 0.01, 8, mask=mask, blockSize=7)
+        self.key_points = (corners.reshape(-1, 2) if corners is not None else np.empty((0, 2))).astype(np.float32)
+        self.points = self.key_points.copy()
+        self.key_count = len(self.key_points)
+        self.key_homography = homography
+        self.homography = homography
+        self.since_key = 0
+        self.keyframes += 1
+
+    def _append(self, matrix):
+        if self.num_frames == len(self.matrices):
+            grown = np.empty((2 * len(self.matrices), 3, 3), dtype=np.float32)
+            grown[:self.num_frames] = self.matrices
+            self.matrices = grown
+        self.matrices[self.num_frames] = matrix
+        self.num_frames += 1
+
+    # --- Lookup ---
+    @property
+    def frame_matrices(self):
+        """(frames, 3, 3) pixel -> court matrices of the frames seen so far."""
+        return self.matrices[:self.num_frames]
+
+    def matrix(self, frame_idx):
+        """Pixel -> court matrix of a frame (3, 3), or of an array of frames (N, 3, 3)."""
+        return self.matrices[np.clip(frame_idx, 0, self.num_frames - 1)]
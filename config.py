@@ -4,6 +4,10 @@ import supervision as sv
 VIDEO_SOURCE = "/content/Volleyball/Video5.mp4"
 VIDEO_TARGET = "/content/1.mp4"
 MODEL_PATH = "/content/YOUR_MODEL.pt"
+# Court corners of the camera view (written by get_court_coordinates.py)
+COURT_CALIBRATION = "court_config.json"
+# Track table of the headless mode (.parquet, or .arrow/.feather for Arrow IPC)
+TRACKS_TARGET = "/content/tracks.parquet"
 
 # --- IDS ---
 ID_PLAYER = 1
@@ -12,6 +16,137 @@ ID_BALL = 0
 
 CALIBRATION_FRAMES = 60
 
+# --- TEAM MODEL ---
+# "static": fit once after CALIBRATION_FRAMES, a track keeps its first team forever
+# "online": bounded colour reservoirs, background refits and decaying per-track votes
+TEAM_MODEL = "static"
+TEAM_RESERVOIR_SIZE = 2000     # Colour samples kept per court side
+TEAM_REFIT_INTERVAL = 250      # Frames between background refits
+TEAM_VOTE_DECAY = 0.95         # Per-frame decay of a track's team votes
+
+# --- DETECTOR BACKEND ---
+# "ultralytics": the PyTorch model as is. "onnx" / "openvino": CPU inference on an exported copy
+# of MODEL_PATH (exported next to the weights on first use)
+DETECTOR_BACKEND = "ultralytics"
+DETECTOR_DEVICE = 0            # ultralytics backend: GPU index or "cpu"
+DETECTOR_INT8 = False          # onnx/openvino: int8 quantized export
+DETECTOR_THREADS = 0           # onnx/openvino: CPU threads (0 = library default)
+DETECTOR_IMGSZ = 640           # onnx/openvino: input size (match the training size)
+DETECTOR_CONF = 0.25           # onnx/openvino: same defaults as ultralytics predict
+DETECTOR_IOU = 0.7
+# The model is loaded on first use. Warm-up runs it once on blank frames right after loading, so the
+# first real batch is not slowed down by CUDA/runtime initialisation (same as `python main.py --warm-up`)
+DETECTOR_WARMUP = False
+
+# --- PIPELINE ---
+# False = headless: no annotated video, only the track table (same as `python main.py --no-render`)
+RENDER_VIDEO = True
+# Streaming = one decode pass instead of the three-pass design (constant memory)
+STREAMING_MODE = False
+# Max frames held back while waiting for the ball to reappear (longer gaps hold the last position)
+BALL_LOOKAHEAD_FRAMES = 60
+# Ball gaps longer than this (frames) are dead ball and are not interpolated (None = no limit).
+# Keep it <= BALL_LOOKAHEAD_FRAMES so streaming and three-pass give the same ball track.
+BALL_MAX_GAP_FRAMES = 50
+# Frames per YOLO call (tune with the stage throughput report printed after PASS 1)
+INFERENCE_BATCH_SIZE = 8
+# Decoded frames buffered ahead of inference by the reader thread
+DECODE_QUEUE_SIZE = 32
+# Adaptive detection stride: YOLO on every DETECTION_STRIDE-th frame (1 = every frame), or earlier
+# when the scene changes. Player/referee boxes are propagated in between and still go through ByteTrack
+DETECTION_STRIDE = 1
+STRIDE_MOTION_THRESHOLD = 12.0 # Mean grey-level change vs the last keyframe that forces a keyframe (None = off)
+PROPAGATION_METHOD = "flow"    # "flow" (sparse optical flow) or "velocity" (constant velocity)
+PROPAGATION_SCALE = 0.5        # Downscale for the motion check and the optical flow
+# Multi-resolution analysis: YOLO and jersey-colour sampling work at this frame width (e.g. 1280 for
+# 4K footage; None = full resolution). Boxes are mapped back to source pixels, so the court calibration,
+# the ball search crops and the rendered video stay at full resolution
+ANALYSIS_WIDTH = None
+# Ball search: YOLO on a native-resolution crop around the predicted ball position when the
+# full-frame pass misses it; tiled full-frame search once the ball is lost for BALL_MAX_MISSES frames
+BALL_ROI_SEARCH = False
+BALL_ROI_SIZE = 320            # Crop side (px) at 0 misses, grows while the ball is missing
+BALL_MAX_MISSES = 5
+BALL_TILE_SIZE = 640
+BALL_TILE_INTERVAL = 5         # While lost, run the tiled search every N frames
+# PASS 1 results are cached on disk, keyed by video + weights, so re-renders skip YOLO
+USE_DETECTION_CACHE = True
+CACHE_DIR = "detection_cache"
+# PASS 1 saves a checkpoint (detections so far + tracker state) every CHECKPOINT_INTERVAL frames next to
+# the cache, and an interrupted run resumes from it (0 = off; needs USE_DETECTION_CACHE, not in STREAMING_MODE)
+CHECKPOINT_INTERVAL = 5000
+# PASS 3 render processes (1 = render in this process). Each worker renders chunks of RENDER_CHUNK_FRAMES
+RENDER_WORKERS = 1
+RENDER_CHUNK_FRAMES = 1500
+
+# --- COURT ANALYTICS ---
+# Per-player occupancy grids, distance, speed, sprints and jumps, accumulated while rendering and
+# saved as <output>_analytics.json (+ _occupancy.npz). With MINI_COURT_HEATMAP the mini-court shows
+# the team occupancy from these grids. Not available with RENDER_WORKERS > 1
+COURT_ANALYTICS = False
+ANALYTICS_CELL_SIZE = 0.5      # Occupancy grid cell (metres)
+ANALYTICS_MAX_SPEED = 9.0      # m/s; faster steps are projection glitches or ID swaps and are not counted
+ANALYTICS_SPRINT_SPEED = 4.0   # m/s held for ANALYTICS_SPRINT_FRAMES frames in a row = one sprint
+ANALYTICS_SPRINT_FRAMES = 10
+ANALYTICS_JUMP_RATIO = 0.15    # Feet above their ground line by this share of the box height = airborne
+
+# --- LIVE MODE ---
+# Real-time input (python main.py --live [SOURCE]): an RTSP/UDP URL, a capture device index ("0"),
+# or a file played back at its own frame rate. Frames are processed as they arrive and dropped
+# when the pipeline falls behind; the ball is smoothed causally (no look-ahead)
+LIVE_MODE = False
+LIVE_SOURCE = "udp://127.0.0.1:5000"
+LIVE_TARGET = None             # Annotated video written as it goes (None = no file)
+LIVE_SHOW = False              # Show the annotated frames in a window (q to stop)
+LIVE_MINI_COURT_TARGET = None  # Mini-court image (.jpg/.png) rewritten every LIVE_MINI_COURT_INTERVAL frames
+LIVE_MINI_COURT_INTERVAL = 5
+LIVE_LATENCY_BUDGET = 0.25     # Seconds from capture to output; stale frames are skipped
+LIVE_BUFFER_FRAMES = 1         # Newest frames kept by the capture thread, older ones are dropped
+LIVE_MAX_PROPAGATED = 3        # Over budget: frames in a row that may skip YOLO (boxes propagated instead)
+LIVE_BALL_SMOOTHING = 0.6      # Weight of a new ball detection in the causal filter (1 = raw detections)
+LIVE_BALL_HOLD_FRAMES = 5      # Missing ball: extrapolated for this many frames, then hidden
+LIVE_READ_TIMEOUT = 5.0        # Seconds without a frame before the stream counts as ended
+
+# --- RALLIES AND FRAME RANGES ---
+# `python main.py --index-rallies` scans the video once (frame-difference energy on downscaled frames, plus
+# the ball track when the detection cache has the whole video) and saves <video stem>.rallies.json next to it.
+# PROCESS_RALLIES / PROCESS_FRAMES limit detection and rendering to those frames, seeking straight to them
+INDEX_RALLIES = False          # Only build the rally index (same as --index-rallies)
+PROCESS_RALLIES = None         # Rally IDs from the index, e.g. [3, 4] (None = whole video)
+PROCESS_FRAMES = None          # Frame ranges [(start, end), ...], end exclusive (None = whole video)
+RALLY_SCAN_SCALE = 0.125       # Downscale of the frames the motion energy is measured on
+RALLY_SCAN_STEP = 2            # Measure every N-th frame, the ones in between are only grabbed
+RALLY_MOTION_THRESHOLD = None  # Mean grey-level change that counts as play (None = Otsu's threshold)
+RALLY_BALL_SPEED = 0.2         # Ball speed (frame widths per second) that counts as play
+RALLY_SMOOTHING = 1.0          # Seconds the in-play votes are averaged over
+RALLY_MIN_DURATION = 3.0       # Seconds; shorter rallies are dropped
+RALLY_MIN_GAP = 2.0            # Seconds; shorter breaks are bridged
+RALLY_PADDING = 1.0            # Seconds kept before and after each rally
+
+# --- CAMERA MOTION ---
+# Pan/zoom footage: the camera is tracked against the first frame (the one calibrated with
+# get_court_coordinates.py) and court positions use one homography per frame
+CAMERA_MOTION = False
+CAMERA_MOTION_SCALE = 0.25        # Downscale of the gray frames the camera is tracked on
+CAMERA_MAX_FEATURES = 150         # Corners tracked per frame (fixes the cost per frame)
+CAMERA_MIN_FEATURES = 50          # Reference corners that must agree to re-register a keyframe on the first frame
+CAMERA_MIN_FEATURE_RATIO = 0.5    # Fewer surviving corners than this share of the keyframe's -> new keyframe
+CAMERA_MAX_DRIFT = 1.0            # Fit error (px at tracking scale) that forces a new keyframe
+CAMERA_MIN_KEYFRAME_GAP = 5       # Frames between keyframes at least (caps re-detection on low-texture footage)
+CAMERA_KEYFRAME_INTERVAL = 50     # Frames between keyframes at most (refined against the first frame)
+
+# --- VIDEO I/O ---
+VIDEO_DECODER = "opencv"       # "opencv" or "pyav" (threaded codec, timestamp-accurate seeking)
+VIDEO_ENCODER = "opencv"       # "opencv" (mp4v), "ffmpeg" (libx264 through the ffmpeg binary), "pyav" (libx264) or "auto"
+ENCODE_QUEUE_SIZE = 32         # Rendered frames buffered ahead of the encoder thread
+H264_CRF = 23                  # ffmpeg/pyav quality (lower = better, larger)
+H264_PRESET = "veryfast"
+
+# --- METRICS ---
+METRICS_JSON = None            # Run summary (None = next to the output as <name>_metrics.json)
+METRICS_PROM_PATH = None       # Prometheus text file rewritten during the run (None = off)
+METRICS_PROM_INTERVAL = 10.0   # Seconds between rewrites
+
 # --- OUTPUT COLORS ---
 # --- COURT CONFIGURATION  ---
 # Real world dimensions of a Volleyball Court (in meters)
@@ -26,6 +161,15 @@ COLOR_REF = sv.ColorPalette.from_hex(["#6200FF"])
 COLOR_BALL = sv.ColorPalette.from_hex(['#FFFF00'])   
 COLOR_BOARD = sv.ColorPalette.from_hex(['#222222'])  # Dark Grey for Minimap background   
 
+# Number of ball positions kept in the trail behind the ball
+BALL_TRACE_LENGTH = 20
+# Pre-rasterized player/referee/coordinate label sprites kept in the render cache (LRU)
+LABEL_CACHE_SIZE = 1024
+
+# --- MINI COURT LAYERS ---
+MINI_COURT_TRAIL_FRAMES = 0    # Fading trail of previous positions (0 = off)
+MINI_COURT_HEATMAP = False     # Per-team occupancy heatmap under the dots
+
 # --- TRIANGLE ---
 TRI_COLOR_BGR = (0, 255, 255) 
 TRI_HEIGHT = 30
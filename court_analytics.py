@@ -0,0 +1,202 @@
+import json
+import numpy as np
+
+class CourtAnalytics:
+    """
+    Streaming per-player statistics from court positions in metres, updated once per frame
+    in O(players) with array operations over per-track slots:
+
+    - occupancy grids (`cell_size` metres, court plus `margin`) per tracker ID and per team,
+      updated with a scatter-add of the occupied cells,
+    - distance and speed from exponentially smoothed positions. Steps faster than `max_speed`
+      are projection glitches or ID swaps: they are rejected and the track restarts there,
+    - sprints: speed above `sprint_speed` for `sprint_frames` frames in a row,
+    - jumps: the feet (box bottom, pixels) rise more than `jump_ratio` box heights above their
+      recent ground line for `jump_frames` frames. Airborne frames do not count towards
+      distance or occupancy, since the projected feet position is wrong while in the air.
+
+    Grids are indexed [along the court length (x), across (y)], cell (0, 0) at (-margin, -margin).
+    """
+    def __init__(self, fps, cell_size=0.5, court_length=18.0, court_width=9.0, margin=2.0,
+                 max_speed=9.0, sprint_speed=4.0, sprint_frames=10, smoothing=0.3,
+                 jump_ratio=0.15, jump_frames=3, max_gap_frames=None):
+        self.fps = fps
+        self.cell_size = cell_size
+        self.margin = margin
+        self.shape = (int(np.ceil((court_length + 2 * margin) / cell_size)),
+                      int(np.ceil((court_width + 2 * margin) / cell_size)))
+        self.max_speed = max_speed
+        self.sprint_speed = sprint_speed
+        self.sprint_frames = sprint_frames
+        self.smoothing = smoothing
+        self.jump_ratio = jump_ratio
+        self.jump_frames = jump_frames
+        self.max_gap_frames = max_gap_frames if max_gap_frames is not None else int(fps)
+
+        self.slots = {}                       # tracker_id -> slot
+        self.tracker_ids = []                 # slot -> tracker_id
+        self.team_grids = np.zeros((3, *self.shape), dtype=np.float32)   # Team 0 = unknown
+        self._allocate(64)
+        self.box_lookup = None
+
+    def _allocate(self, capacity):
+        """(Re)allocates the per-slot arrays, keeping the first len(tracker_ids) slots."""
+        n = len(self.tracker_ids)
+        fields = {
+            "team": (np.int8, 0), "position": (np.float32, np.nan), "last_frame": (np.int64, -1),
+            "frames": (np.int64, 0), "moving_frames": (np.int64, 0), "distance": (np.float64, 0),
+            "speed": (np.float32, 0), "top_speed": (np.float32, 0), "sprint_run": (np.int32, 0),
+            "sprints": (np.int32, 0), "rejected": (np.int32, 0), "ground_y": (np.float32, np.nan),
+            "air_run": (np.int32, 0), "jumps": (np.int32, 0),
+        }
+        for name, (dtype, fill) in fields.items():
+            shape = (capacity, 2) if name == "position" else (capacity,)
+            array = np.full(shape, fill, dtype=dtype)
+            if n:
+                array[:n] = getattr(self, name)[:n]
+            setattr(self, name, array)
+        grids = np.zeros((capacity, *self.shape), dtype=np.float32)
+        if n:
+            grids[:n] = self.player_grids[:n]
+        self.player_grids = grids
+
+    def _slots_for(self, tracker_ids):
+        slots = np.empty(len(tracker_ids), dtype=np.int64)
+        for k, tracker_id in enumerate(tracker_ids):
+            slot = self.slots.get(tracker_id)
+            if slot is None:
+                if len(self.tracker_ids) == len(self.team):
+                    self._allocate(2 * len(self.team))
+                slot = self.slots[tracker_id] = len(self.tracker_ids)
+                self.tracker_ids.append(int(tracker_id))
+            slots[k] = slot
+        return slots
+
+    def update(self, frame_idx, tracker_ids, teams, positions, xyxy=None):
+        """
+        One frame of players: tracker IDs, teams (1/2, 0 = unknown), court positions (N, 2)
+        in metres and, for jump detection, their pixel boxes (N, 4).
+        """
+        n = len(tracker_ids)
+        if n == 0: return
+        slots = self._slots_for(tracker_ids)
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 2)
+        self.team[slots] = teams
+        self.frames[slots] += 1
+
+        # 1. Jumps: feet above the ground line, which follows the feet while on the ground
+        airborne = np.zeros(n, dtype=bool)
+        if xyxy is not None:
+            bottom = xyxy[:, 3].astype(np.float32)
+            height = (xyxy[:, 3] - xyxy[:, 1]).astype(np.float32)
+            ground = self.ground_y[slots]
+            ground = np.where(np.isnan(ground), bottom, ground)
+            airborne = ground - bottom > self.jump_ratio * height
+            air_run = np.where(airborne, self.air_run[slots] + 1, 0)
+            self.jumps[slots[air_run == self.jump_frames]] += 1
+            self.air_run[slots] = air_run
+            self.ground_y[slots] = np.where(airborne, ground, ground + 0.5 * (bottom - ground))
+
+        # 2. Distance and speed on smoothed positions
+        previous = self.position[slots]
+        elapsed = frame_idx - self.last_frame[slots]
+        fresh = np.isnan(previous[:, 0]) | (elapsed > self.max_gap_frames) | ~np.isfinite(positions).all(axis=1)
+        smoothed = np.where(fresh[:, None], positions, previous + self.smoothing * (positions - previous))
+        step = np.linalg.norm(smoothed - previous, axis=1)
+        speed = np.where(fresh, 0, step * self.fps / np.maximum(elapsed, 1))
+
+        valid = ~fresh & ~airborne
+        rejected = valid & (speed > self.max_speed)
+        valid &= ~rejected
+        self.rejected[slots[rejected]] += 1
+        smoothed[rejected] = positions[rejected]   # Restart the track at the new position
+
+        self.distance[slots[valid]] += step[valid]
+        self.moving_frames[slots[valid]] += 1
+        self.speed[slots] = np.where(valid, speed, 0)
+        self.top_speed[slots] = np.maximum(self.top_speed[slots], self.speed[slots])
+        sprint_run = np.where(valid & (speed >= self.sprint_speed), self.sprint_run[slots] + 1, 0)
+        self.sprints[slots[sprint_run == self.sprint_frames]] += 1
+        self.sprint_run[slots] = sprint_run
+
+        # Airborne: keep the last ground position
+        self.position[slots] = np.where(airborne[:, None], previous, smoothed)
+        self.last_frame[slots] = frame_idx
+
+        # 3. Occupancy (scatter-add into the flattened grids)
+        on_ground = ~airborne & np.isfinite(positions).all(axis=1)
+        cells = np.floor((positions[on_ground] + self.margin) / self.cell_size).astype(np.int64)
+        inside = (cells >= 0).all(axis=1) & (cells[:, 0] < self.shape[0]) & (cells[:, 1] < self.shape[1])
+        cells = cells[inside]
+        flat_cells = cells[:, 0] * self.shape[1] + cells[:, 1]
+        cell_count = self.shape[0] * self.shape[1]
+        np.add.at(self.player_grids.reshape(-1), slots[on_ground][inside] * cell_count + flat_cells, 1)
+        team_idx = np.asarray(teams).reshape(-1)[on_ground][inside].astype(np.int64)
+        np.add.at(self.team_grids.reshape(-1), team_idx * cell_count + flat_cells, 1)
+
+    # --- Output ---
+    def grid(self, team=None, tracker_id=None):
+        """Occupancy in seconds of one team or one tracker ID."""
+        if tracker_id is not None:
+            slot = self.slots.get(tracker_id)
+            counts = self.player_grids[slot] if slot is not None else np.zeros(self.shape, np.float32)
+        else:
+            counts = self.team_grids[team]
+        return counts / self.fps
+
+    def box_grid(self, mini_court, team=None, tracker_id=None):
+        """The occupancy resampled to MiniCourt box pixels, for MiniCourt.draw_heat_grid."""
+        if self.box_lookup is None:
+            # Cell of every box pixel (computed once, the mini court does not move)
+            rows = np.arange(mini_court.drawing_rectangle_height + 1)
+            cols = np.arange(mini_court.drawing_rectangle_width + 1)
+            x_m = (rows - mini_court.court_start_y) / mini_court.court_drawing_height * 18.0
+            y_m = (cols - mini_court.court_start_x) / mini_court.court_drawing_width * 9.0
+            i = np.floor((x_m + self.margin) / self.cell_size).astype(np.int64)
+            j = np.floor((y_m + self.margin) / self.cell_size).astype(np.int64)
+            inside = ((i >= 0) & (i < self.shape[0]))[:, None] & ((j >= 0) & (j < self.shape[1]))[None]
+            self.box_lookup = (np.clip(i, 0, self.shape[0] - 1)[:, None],
+                               np.clip(j, 0, self.shape[1] - 1)[None], inside)
+        i, j, inside = self.box_lookup
+        return np.where(inside, self.grid(team, tracker_id)[i, j], 0).astype(np.float32)
+
+    def summary(self):
+        n = len(self.tracker_ids)
+        players = {}
+        for slot in range(n):
+            moving_seconds = self.moving_frames[slot] / self.fps
+            players[str(self.tracker_ids[slot])] = {
+                "team": int(self.team[slot]),
+                "seconds_tracked": round(float(self.frames[slot] / self.fps), 2),
+                "distance_m": round(float(self.distance[slot]), 2),
+                "mean_speed_ms": round(float(self.distance[slot] / moving_seconds), 2) if moving_seconds else 0.0,
+                "top_speed_ms": round(float(self.top_speed[slot]), 2),
+                "sprints": int(self.sprints[slot]),
+                "jumps": int(self.jumps[slot]),
+                "rejected_steps": int(self.rejected[slot]),
+            }
+
+        teams = {}
+        for team in (1, 2):
+            members = self.team[:n] == team
+            teams[str(team)] = {
+                "distance_m": round(float(self.distance[:n][members].sum()), 2),
+                "sprints": int(self.sprints[:n][members].sum()),
+                "jumps": int(self.jumps[:n][members].sum()),
+            }
+        return {"fps": self.fps, "cell_size_m": self.cell_size, "teams": teams, "players": players}
+
+    def save(self, json_path, grids_path=None):
+        """Summary as JSON, and the occupancy grids (seconds per cell) as .npz if `grids_path` is given."""
+        with open(json_path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+        if grids_path is not None:
+            n = len(self.tracker_ids)
+            np.savez_compressed(
+                grids_path,
+                tracker_ids=np.array(self.tracker_ids, dtype=np.int64),
+                teams=self.team[:n],
+                player_grids=self.player_grids[:n] / self.fps,
+                team_grids=self.team_grids / self.fps,
+                origin_m=np.array([-self.margin, -self.margin]),
+                cell_size_m=self.cell_size)
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import pickle
+import shutil
+import numpy as np
+from detection_store import DetectionStore
+
+# Bump when the on-disk layout changes so old caches are ignored
+CACHE_VERSION = 2
+# While an entry is being replaced, the previous one is kept as <entry>.old
+BACKUP_SUFFIX = ".old"
+
+def file_fingerprint(path, sample_blocks=16, block_size=1 << 20):
+    """
+    Cheap content fingerprint: file size + evenly spaced 1 MiB blocks.
+    Hashing a whole 90-minute match would cost more than loading the cache.
+    """
+    size = os.path.getsize(path)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(size).encode())
+    with open(path, 'rb') as f:
+        if size <= sample_blocks * block_size:
+            h.update(f.read())
+        else:
+            step = (size - block_size) // (sample_blocks - 1)
+            for k in range(sample_blocks):
+                f.seek(k * step)
+                h.update(f.read(block_size))
+    return h.hexdigest()
+
+def file_hash(path, chunk_size=1 << 22):
+    """Full content hash (used for the model weights, which are small)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def cache_key(video_path, weights_path, extra=""):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"v{CACHE_VERSION}".encode())
+    h.update(file_fingerprint(video_path).encode())
+    h.update(file_hash(weights_path).encode())
+    h.update(extra.encode())
+    return h.hexdigest()
+
+def save(store, cache_dir, key, meta=None, arrays=None):
+    """
+    Saves a DetectionStore as the cache entry `key` (and drops its checkpoint).
+    `arrays` are extra per-video results ({name: array}) saved with it, see load_array().
+    """
+    final_dir = _write(store, cache_dir, key, meta, arrays=arrays)
+    # Also the checkpoint's backup and the temp dir an interrupted checkpoint leaves behind
+    for suffix in ("", BACKUP_SUFFIX, ".tmp"):
+        shutil.rmtree(checkpoint_dir(cache_dir, key) + suffix, ignore_errors=True)
+    print(f"[INFO] Detection cache saved: {final_dir}")
+    return final_dir
+
+def checkpoint(store, cache_dir, key, state, meta=None):
+    """
+    Saves the frames so far plus `state` (picklable pipeline state at this frame) as a
+    partial cache entry, so an interrupted PASS 1 can resume. The previous checkpoint is kept until
+    this one is complete (see _write).
+    """
+    return _write(store, cache_dir, os.path.basename(checkpoint_dir(cache_dir, key)), meta,
+                  extra_files={"state.pkl": pickle.dumps(state)})
+
+def _write(store, cache_dir, name, meta=None, extra_files=None, arrays=None):
+    # Write to a temp dir and rename, so an interrupted run never leaves a half cache behind
+    final_dir = os.path.join(cache_dir, name)
+    tmp_dir = final_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    store.save(tmp_dir, meta={"version": CACHE_VERSION, **(meta or {})})
+    for file_name, data in (extra_files or {}).items():
+        with open(os.path.join(tmp_dir, file_name), 'wb') as f:
+            f.write(data)
+    for array_name, array in (arrays or {}).items():
+        np.save(os.path.join(tmp_dir, f"{array_name}.npy"), array)
+
+    # The previous entry is moved aside first and only deleted once the new one is in place, so a
+    # crash at any point leaves at least one complete copy (load() falls back to the backup)
+    backup_dir = final_dir + BACKUP_SUFFIX
+    if os.path.exists(final_dir):
+        shutil.rmtree(backup_dir, ignore_errors=True)
+        os.replace(final_dir, backup_dir)
+    os.replace(tmp_dir, final_dir)
+    shutil.rmtree(backup_dir, ignore_errors=True)
+    return final_dir
+
+def _entry_dir(cache_dir, name):
+    """Directory of the complete cache entry `name`: the entry itself or, after a crash mid-replace, its backup."""
+    for path in (os.path.join(cache_dir, name), os.path.join(cache_dir, name + BACKUP_SUFFIX)):
+        if os.path.exists(os.path.join(path, "meta.json")):
+            return path
+    return None
+
+def load(cache_dir, key):
+    """Returns the memory-mapped DetectionStore for `key`, or None on a cache miss."""
+    path = _entry_dir(cache_dir, key)
+    if path is None:
+        return None
+    try:
+        cached = DetectionStore.load(path, mmap=True)
+    except Exception as e:
+        print(f"[WARNING] Ignoring unreadable detection cache {path}: {e}")
+        return None
+    if cached.meta.get("version") != CACHE_VERSION:
+        return None
+    return cached
+
+def load_array(cache_dir, key, name):
+    """An array saved with the cache entry `key` (memory-mapped), or None."""
+    entry = _entry_dir(cache_dir, key)
+    path = os.path.join(entry, f"{name}.npy") if entry is not None else None
+    if path is None or not os.path.exists(path):
+        return None
+    return np.load(path, mmap_mode='r')
+
+def checkpoint_dir(cache_dir, key):
+    return os.path.join(cache_dir, f"{key}.partial")
+
+def load_checkpoint(cache_dir, key):
+    """Returns (DetectionStore of the frames done so far, pipeline state) or (None, None)."""
+    # A crash while a checkpoint was being replaced can leave only the previous one (the backup)
+    path = _entry_dir(cache_dir, os.path.basename(checkpoint_dir(cache_dir, key)))
+    cached = load(cache_dir, os.path.basename(path)) if path is not None else None
+    if cached is None or not os.path.exists(os.path.join(path, "state.pkl")):
+        return None, None
+    try:
+        with open(os.path.join(path, "state.pkl"), 'rb') as f:
+            state = pickle.load(f)
+    except Exception as e:
+        print(f"[WARNING] Ignoring unreadable checkpoint {path}: {e}")
+        return None, None
+    return cached, state
@@ -0,0 +1,226 @@
+import json
+import os
+import numpy as np
+import supervision as sv
+
+# One entry per detection: name -> (dtype, shape of one entry)
+ROW_COLUMNS = {
+    "xyxy": (np.float32, (4,)),
+    "class_id": (np.int16, ()),
+    "confidence": (np.float32, ()),   # NaN when the detector gave none
+    "tracker_id": (np.int32, ()),     # -1 when untracked
+}
+
+class DetectionStore:
+    """
+    Detections of a whole video as ragged columns: one contiguous array per field for all
+    detections, plus `offsets` so that frame i owns rows offsets[i]:offsets[i + 1].
+    The ball box picked for each frame is a per-frame column (NaN rows = no ball).
+
+    - append() writes into preallocated arrays that grow geometrically: no per-frame objects.
+    - store[i] is an sv.Detections whose arrays are views into the columns;
+      store[a:b] is a DetectionStore of views (offsets rebased to 0).
+    - split() filters by class once over all rows instead of once per frame.
+    - save()/load() use one .npy per column, so a saved store can be memory-mapped.
+    """
+    def __init__(self, capacity=4096, frame_capacity=1024):
+        self.columns = {name: np.empty((capacity, *shape), dtype) for name, (dtype, shape) in ROW_COLUMNS.items()}
+        self.offsets = np.zeros(frame_capacity + 1, dtype=np.int64)
+        self.balls = np.full((frame_capacity, 4), np.nan, dtype=np.float32)
+        self.num_rows = 0
+        self.num_frames = 0
+        self.class_names = {}
+        self.meta = {}
+
+    @classmethod
+    def from_columns(cls, columns, offsets, ball_xyxy, class_names=None):
+        """Wraps existing arrays (no copy). `offsets` has one entry more than there are frames."""
+        store = cls.__new__(cls)
+        store.columns = dict(columns)
+        store.offsets = offsets
+        store.balls = ball_xyxy
+        store.num_frames = len(offsets) - 1
+        store.num_rows = int(offsets[-1]) if len(offsets) else 0
+        store.class_names = dict(class_names or {})
+        store.meta = {}
+        return store
+
+    # --- Building ---
+    def append(self, detections, ball_box=None):
+        """Adds one frame: its detections plus the ball box picked for it (or None)."""
+        n = len(detections)
+        self._reserve(self.num_rows + n, self.num_frames + 1)
+        if n > 0:
+            rows = slice(self.num_rows, self.num_rows + n)
+            columns = self.columns
+            columns["xyxy"][rows] = detections.xyxy
+            columns["class_id"][rows] = detections.class_id
+            columns["confidence"][rows] = detections.confidence if detections.confidence is not None else np.nan
+            columns["tracker_id"][rows] = detections.tracker_id if detections.tracker_id is not None else -1
+
+            names = detections.data.get("class_name")
+            if names is not None and not self.class_names.keys() >= set(detections.class_id.tolist()):
+                for c, name in zip(detections.class_id, names):
+                    self.class_names[int(c)] = str(name)
+
+        self.balls[self.num_frames] = ball_box if ball_box is not None else np.nan
+        self.num_rows += n
+        self.num_frames += 1
+        self.offsets[self.num_frames] = self.num_rows
+
+    def append_empty(self, frames):
+        """Adds `frames` frames without detections or ball (e.g. frames skipped by a seek)."""
+        if frames <= 0: return
+        self._reserve(self.num_rows, self.num_frames + frames)
+        self.balls[self.num_frames:self.num_frames + frames] = np.nan
+        self.offsets[self.num_frames + 1:self.num_frames + frames + 1] = self.num_rows
+        self.num_frames += frames
+
+    def _reserve(self, rows, frames):
+        capacity = len(self.columns["xyxy"])
+        if rows > capacity or not self.columns["xyxy"].flags.writeable:
+            capacity = max(rows, 2 * capacity, 1024)
+            for name, column in self.columns.items():
+                grown = np.empty((capacity, *column.shape[1:]), column.dtype)
+                grown[:self.num_rows] = column[:self.num_rows]
+                self.columns[name] = grown
+
+        if frames > len(self.balls) or not self.balls.flags.writeable:
+            frame_capacity = max(frames, 2 * len(self.balls), 1024)
+            offsets = np.zeros(frame_capacity + 1, dtype=np.int64)
+            offsets[:self.num_frames + 1] = self.offsets[:self.num_frames + 1]
+            balls = np.full((frame_capacity, 4), np.nan, dtype=np.float32)
+            balls[:self.num_frames] = self.balls[:self.num_frames]
+            self.offsets, self.balls = offsets, balls
+
+    # --- Column views (trimmed to the filled part) ---
+    def column(self, name):
+        return self.columns[name][:self.num_rows]
+
+    @property
+    def xyxy(self):
+        return self.column("xyxy")
+
+    @property
+    def class_id(self):
+        return self.column("class_id")
+
+    @property
+    def tracker_id(self):
+        return self.column("tracker_id")
+
+    @property
+    def frame_offsets(self):
+        return self.offsets[:self.num_frames + 1]
+
+    @property
+    def ball_xyxy(self):
+        """(frames, 4) ball boxes, NaN rows where no ball was picked."""
+        return self.balls[:self.num_frames]
+
+    def frame_index(self):
+        """Frame number of every row."""
+        return np.repeat(np.arange(self.num_frames), np.diff(self.frame_offsets))
+
+    # --- Frame access ---
+    def __len__(self):
+        return self.num_frames
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(self.num_frames)
+            if step != 1:
+                raise ValueError("DetectionStore slices must be contiguous")
+            stop = max(start, stop)
+            first, last = self.offsets[start], self.offsets[stop]
+            columns = {name: _readonly(column[first:last]) for name, column in self.columns.items()}
+            return DetectionStore.from_columns(
+                columns, self.offsets[start:stop + 1] - first, _readonly(self.balls[start:stop]), self.class_names)
+
+        if i < 0:
+            i += self.num_frames
+        if not 0 <= i < self.num_frames:
+            raise IndexError(i)
+        start, end = self.offsets[i], self.offsets[i + 1]
+        if start == end:
+            return sv.Detections.empty()
+
+        class_id = self.columns["class_id"][start:end].astype(int)
+        tracker_id = self.columns["tracker_id"][start:end].astype(int)
+        data = {}
+        if self.class_names:
+            data["class_name"] = np.array([self.class_names.get(c, "") for c in class_id])
+
+        return sv.Detections(
+            xyxy=np.asarray(self.columns["xyxy"][start:end]),
+            class_id=class_id,
+            confidence=np.asarray(self.columns["confidence"][start:end]),
+            tracker_id=tracker_id if (tracker_id >= 0).all() else None,
+            data=data,
+        )
+
+    def __iter__(self):
+        for i in range(self.num_frames):
+            yield self[i]
+
+    def ball_box(self, i):
+        """The ball box selected for frame i, or None."""
+        box = np.asarray(self.balls[i])
+        return None if np.isnan(box[0]) else box
+
+    def split(self, *class_ids):
+        """One DetectionStore per class in `class_ids`, same frames, built with one mask per class."""
+        frame_of_row = self.frame_index()
+        class_id = self.class_id
+        stores = []
+        for c in class_ids:
+            mask = class_id == c
+            counts = np.bincount(frame_of_row[mask], minlength=self.num_frames)
+            offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+            columns = {name: self.column(name)[mask] for name in self.columns}
+            stores.append(DetectionStore.from_columns(columns, offsets, _readonly(self.ball_xyxy), self.class_names))
+        return stores
+
+    # --- Serialization ---
+    def save(self, path, meta=None):
+        """Writes one .npy per column plus meta.json into the directory `path`."""
+        os.makedirs(path, exist_ok=True)
+        arrays = {name: self.column(name) for name in self.columns}
+        arrays["frame_offsets"] = self.frame_offsets
+        arrays["ball_xyxy"] = self.ball_xyxy
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), array)
+        with open(os.path.join(path, "meta.json"), 'w') as f:
+            json.dump({"frames": self.num_frames, "class_names": self.class_names, **(meta or {})}, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Opens a saved store. With `mmap` the columns are read-only memory maps (appending copies them)."""
+        with open(os.path.join(path, "meta.json"), 'r') as f:
+            meta = json.load(f)
+        mode = 'r' if mmap else None
+        columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in ROW_COLUMNS}
+        offsets = np.load(os.path.join(path, "frame_offsets.npy"), mmap_mode=mode)
+        balls = np.load(os.path.join(path, "ball_xyxy.npy"), mmap_mode=mode)
+        class_names = {int(k): v for k, v in meta.get("class_names", {}).items()}
+        store = cls.from_columns(columns, offsets, balls, class_names)
+        store.meta = meta
+        return store
+
+    def __getstate__(self):
+        # Pickle (e.g. to render workers) only the filled part, not the spare capacity
+        return {
+            "columns": {name: np.ascontiguousarray(self.column(name)) for name in self.columns},
+            "offsets": np.ascontiguousarray(self.frame_offsets),
+            "balls": np.ascontiguousarray(self.ball_xyxy),
+            "num_rows": self.num_rows,
+            "num_frames": self.num_frames,
+            "class_names": self.class_names,
+            "meta": self.meta,
+        }
+
+def _readonly(array):
+    # Views share memory with the parent store: appending to a slice must copy, not overwrite it
+    view = array.view()
+    view.flags.writeable = False
+    return view
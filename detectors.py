@@ -0,0 +1,239 @@
+import ast
+import os
+import numpy as np
+import cv2
+import supervision as sv
+import config
+
+class UltralyticsDetector:
+    """The PyTorch model through ultralytics (GPU by default)."""
+    def __init__(self, model_path, device=0):
+        from ultralytics import YOLO
+        self.model = YOLO(model_path)
+        self.device = device
+
+    def detect(self, frames, imgsz=None, classes=None):
+        """Runs the model on a list of BGR frames. Returns one sv.Detections per frame."""
+        kwargs = {}
+        if imgsz is not None: kwargs["imgsz"] = imgsz
+        if classes is not None: kwargs["classes"] = classes
+        results = self.model.predict(frames, device=self.device, verbose=False, **kwargs)
+        return [sv.Detections.from_ultralytics(result) for result in results]
+
+class ExportedDetector:
+    """
+    Shared pre/post-processing for exported YOLO models (ONNX, OpenVINO) on CPU.
+    Mirrors ultralytics predict: letterbox to a square input, single output of shape
+    (batch, 4 + num_classes, anchors), confidence filter, per-class NMS, boxes scaled back.
+    Subclasses implement `infer(tensor)` and set `input_shape` / `batch_size` / `class_names`.
+    """
+    input_shape = (None, None)   # (h, w), None where the exported model is dynamic
+    batch_size = None            # None = dynamic batch
+    class_names = {}
+
+    def __init__(self, imgsz=640, conf=0.25, iou=0.7, max_det=300):
+        self.imgsz = imgsz
+        self.conf = conf
+        self.iou = iou
+        self.max_det = max_det
+
+    def infer(self, tensor):
+        raise NotImplementedError
+
+    def detect(self, frames, imgsz=None, classes=None):
+        size = self.model_size(imgsz)
+        detections = []
+        step = self.batch_size or len(frames)
+        for start in range(0, len(frames), step):
+            chunk = frames[start:start + step]
+            letterboxed = [letterbox(frame, size) for frame in chunk]
+            tensor = np.stack([image for image, _, _ in letterboxed])
+            tensor = tensor[..., ::-1].transpose(0, 3, 1, 2)   # BGR HWC -> RGB CHW
+            tensor = np.ascontiguousarray(tensor, dtype=np.float32) / 255.0
+
+            output = self.infer(tensor)
+            for frame, (_, gain, pad), prediction in zip(chunk, letterboxed, output):
+                detections.append(self.postprocess(prediction, frame.shape, gain, pad, classes))
+        return detections
+
+    def model_size(self, imgsz):
+        h, w = self.input_shape
+        if h is not None and w is not None:
+            return h, w
+        imgsz = imgsz or self.imgsz
+        return imgsz, imgsz
+
+    def postprocess(self, prediction, frame_shape, gain, pad, classes=None):
+        """One image's raw output (4 + nc, anchors) -> sv.Detections in frame pixels."""
+        prediction = prediction.T
+        scores = prediction[:, 4:]
+        class_id = scores.argmax(axis=1)
+        confidence = scores[np.arange(len(scores)), class_id]
+
+        keep = confidence > self.conf
+        if classes is not None:
+            keep &= np.isin(class_id, classes)
+        boxes, confidence, class_id = prediction[keep, :4], confidence[keep], class_id[keep]
+
+        xyxy = np.empty_like(boxes)
+        xyxy[:, :2] = boxes[:, :2] - boxes[:, 2:] / 2
+        xyxy[:, 2:] = boxes[:, :2] + boxes[:, 2:] / 2
+
+        keep = nms(xyxy, confidence, class_id, self.iou)[:self.max_det]
+        xyxy, confidence, class_id = xyxy[keep], confidence[keep], class_id[keep]
+
+        xyxy = (xyxy - np.array([pad[0], pad[1], pad[0], pad[1]], dtype=np.float32)) / gain
+        h, w = frame_shape[:2]
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, w)
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, h)
+
+        class_id = class_id.astype(int)
+        return sv.Detections(
+            xyxy=xyxy.astype(np.float32),
+            confidence=confidence.astype(np.float32),
+            class_id=class_id,
+            data={"class_name": np.array([self.class_names.get(c, str(c)) for c in class_id])},
+        )
+
+class OnnxDetector(ExportedDetector):
+    def __init__(self, path, threads=0, **kwargs):
+        import onnxruntime as ort
+        super().__init__(**kwargs)
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+        shape = self.session.get_inputs()[0].shape
+        self.batch_size = shape[0] if isinstance(shape[0], int) else None
+        self.input_shape = tuple(d if isinstance(d, int) else None for d in shape[2:4])
+        names = self.session.get_modelmeta().custom_metadata_map.get("names")
+        self.class_names = ast.literal_eval(names) if names else {}
+
+    def infer(self, tensor):
+        return self.session.run(None, {self.input_name: tensor})[0]
+
+class OpenVinoDetector(ExportedDetector):
+    def __init__(self, path, threads=0, **kwargs):
+        import openvino as ov
+        super().__init__(**kwargs)
+        core = ov.Core()
+        xml = path if path.endswith(".xml") else _find_file(path, ".xml")
+        model = core.read_model(xml)
+        properties = {"INFERENCE_NUM_THREADS": threads} if threads else {}
+        self.compiled = core.compile_model(model, "CPU", properties)
+
+        shape = self.compiled.input(0).partial_shape
+        dims = [shape[k].get_length() if shape[k].is_static else None for k in range(4)]
+        self.batch_size = dims[0]
+        self.input_shape = (dims[2], dims[3])
+        self.class_names = _read_metadata_names(os.path.dirname(xml))
+
+    def infer(self, tensor):
+        return self.compiled(tensor)[0]
+
+# --- Pre/post-processing ---
+def letterbox(image, size, color=(114, 114, 114)):
+    """Resize keeping the aspect ratio and pad to `size` (h, w), like ultralytics LetterBox. Returns (image, gain, (pad_x, pad_y))."""
+    h, w = image.shape[:2]
+    gain = min(size[0] / h, size[1] / w)
+    new_w, new_h = round(w * gain), round(h * gain)
+    pad_x, pad_y = (size[1] - new_w) / 2, (size[0] - new_h) / 2
+
+    if (new_w, new_h) != (w, h):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = round(pad_y - 0.1), round(pad_y + 0.1)
+    left, right = round(pad_x - 0.1), round(pad_x + 0.1)
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return image, gain, (left, top)
+
+def nms(xyxy, scores, class_id, iou_threshold):
+    """Greedy per-class NMS. Returns kept indices, highest score first."""
+    if len(xyxy) == 0:
+        return np.empty(0, dtype=int)
+    # Offset boxes by class so boxes of different classes never overlap
+    boxes = xyxy + (class_id * 7680.0)[:, None]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    order = scores.argsort()[::-1]
+
+    keep = []
+    while len(order) > 0:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        x1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        y1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        x2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        y2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=int)
+
+# --- Export ---
+def export_model(model_path, backend, int8=False, imgsz=640):
+    """
+    Exports `model_path` for `backend` once, next to the weights, and returns the exported path.
+    onnx int8 uses onnxruntime dynamic quantization, openvino int8 uses the ultralytics
+    (NNCF) export with its default calibration data.
+    """
+    stem = os.path.splitext(model_path)[0]
+    if backend == "onnx":
+        target = f"{stem}_int8.onnx" if int8 else f"{stem}.onnx"
+        if _is_fresh(target, model_path):
+            return target
+        from ultralytics import YOLO
+        exported = YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=True)
+        if int8:
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            quantize_dynamic(exported, target, weight_type=QuantType.QInt8)
+            return target
+        return exported
+
+    if backend == "openvino":
+        target = f"{stem}_int8_openvino_model" if int8 else f"{stem}_openvino_model"
+        if _is_fresh(target, model_path):
+            return target
+        from ultralytics import YOLO
+        return YOLO(model_path).export(format="openvino", imgsz=imgsz, int8=int8)
+
+    raise ValueError(f"Unknown detector backend: {backend}")
+
+def _is_fresh(path, source):
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source)
+
+def _find_file(directory, extension):
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(extension):
+            return os.path.join(directory, name)
+    raise FileNotFoundError(f"No {extension} file in {directory}")
+
+def _read_metadata_names(directory):
+    path = os.path.join(directory, "metadata.yaml")
+    if not os.path.exists(path):
+        return {}
+    import yaml
+    with open(path, 'r') as f:
+        return {int(k): v for k, v in (yaml.safe_load(f).get("names") or {}).items()}
+
+def create_detector(backend=None):
+    """Detector for config.DETECTOR_BACKEND ("ultralytics", "onnx" or "openvino")."""
+    backend = backend or config.DETECTOR_BACKEND
+    if backend == "ultralytics":
+        return UltralyticsDetector(config.MODEL_PATH, device=config.DETECTOR_DEVICE)
+
+    path = export_model(config.MODEL_PATH, backend, int8=config.DETECTOR_INT8, imgsz=config.DETECTOR_IMGSZ)
+    cls = OnnxDetector if backend == "onnx" else OpenVinoDetector
+    return cls(path, threads=config.DETECTOR_THREADS, imgsz=config.DETECTOR_IMGSZ,
+               conf=config.DETECTOR_CONF, iou=config.DETECTOR_IOU)
+
+def warm_up(detector, batch_size=None, imgsz=None):
+    """
+    Runs the detector once on a batch of blank frames, so CUDA context creation, kernel selection
+    and runtime graph setup happen now and not on the first real batch.
+    """
+    batch_size = batch_size or config.INFERENCE_BATCH_SIZE
+    imgsz = imgsz or config.DETECTOR_IMGSZ
+    frames = [np.zeros((imgsz, imgsz, 3), dtype=np.uint8)] * batch_size
+    detector.detect(frames)
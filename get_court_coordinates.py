@@ -1,7 +1,12 @@
+import sys
 import cv2
 import config
 import json
 
+# Optional arguments: video to calibrate and output file (one calibration per match for batch.py)
+video_path = sys.argv[1] if len(sys.argv) > 1 else config.VIDEO_SOURCE
+output_path = sys.argv[2] if len(sys.argv) > 2 else config.COURT_CALIBRATION
+
 # List to store points
 points = []
 DISPLAY_WIDTH = 1280 
@@ -19,7 +24,7 @@ def click_event(event, x, y, flags, params):
         cv2.putText(resized_img, f"{len(points)}", (x+10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
         cv2.imshow('Select 4 Corners', resized_img)
 
-cap = cv2.VideoCapture(config.VIDEO_SOURCE)
+cap = cv2.VideoCapture(video_path)
 ret, img = cap.read()
 cap.release()
 
@@ -43,9 +48,9 @@ cv2.destroyAllWindows()
 
 # SAVE TO JSON FILE ---
 if len(points) == 4:
-    with open('court_config.json', 'w') as f:
+    with open(output_path, 'w') as f:
         json.dump(points, f)
-    print(f"\n[SUCCESS] Coordinates saved to 'court_config.json': {points}")
+    print(f"\n[SUCCESS] Coordinates saved to '{output_path}': {points}")
     print("You can now run main.py immediately.")
 else:
     print(f"\n[ERROR] You selected {len(points)} points. Need exactly 4. Not saved.")
\ No newline at end of file
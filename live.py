@@ -0,0 +1,102 @@
+import collections
+import os
+import threading
+import time
+import cv2
+
+class LiveSource:
+    """
+    Capture thread for live input: an RTSP/UDP/HTTP URL, a capture device index ("0"),
+    or a video file played back at its own frame rate (`realtime`), which behaves like a camera.
+
+    Only the newest `buffer` frames are kept. When the consumer falls behind, the oldest
+    frames are dropped here instead of queueing up latency (`dropped` counts them).
+    Items are (frame_idx, frame, captured_at) with frame_idx counting every captured frame,
+    so gaps tell how many frames were dropped.
+    """
+    def __init__(self, source, buffer=1, realtime=True, read_timeout=5.0, timer=None):
+        self.source = source
+        self.timer = timer
+        self.frames = collections.deque(maxlen=max(1, buffer))
+        self.condition = threading.Condition()
+        self.captured = 0
+        self.dropped = 0
+        self.finished = False
+        self.stop_event = threading.Event()
+
+        self.is_file = os.path.isfile(str(source))
+        if str(source).isdigit():
+            self.cap = cv2.VideoCapture(int(source))
+        else:
+            timeout_ms = int(read_timeout * 1000)
+            self.cap = cv2.VideoCapture(str(source), cv2.CAP_FFMPEG, [
+                cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms, cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms])
+        if not self.cap.isOpened():
+            raise IOError(f"Could not open live source: {source}")
+
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.fps = fps if 0 < fps < 1000 else 25.0
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.pace = self.is_file and realtime
+
+        self.thread = threading.Thread(target=self._capture, daemon=True)
+        self.thread.start()
+
+    def _capture(self):
+        start = time.perf_counter()
+        try:
+            while not self.stop_event.is_set():
+                if self.pace:
+                    # A file is read as fast as it decodes: wait for the frame's due time instead
+                    delay = start + self.captured / self.fps - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                read_start = time.perf_counter()
+                ok, frame = self.cap.read()
+                if not ok: break
+                captured_at = time.perf_counter()
+                if self.timer is not None:
+                    self.timer.add("capture", captured_at - read_start)
+
+                with self.condition:
+                    if len(self.frames) == self.frames.maxlen:
+                        self.dropped += 1
+                    self.frames.append((self.captured, frame, captured_at))
+                    self.captured += 1
+                    self.condition.notify()
+        finally:
+            with self.condition:
+                self.finished = True
+                self.condition.notify()
+
+    def get(self, timeout=None):
+        """Oldest buffered frame, waiting for one if needed. None once the stream has ended."""
+        with self.condition:
+            while not self.frames and not self.finished:
+                if not self.condition.wait(timeout):
+                    return None
+            return self.frames.popleft() if self.frames else None
+
+    def qsize(self):
+        return len(self.frames)
+
+    def close(self):
+        self.stop_event.set()
+        self.thread.join()
+        self.cap.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_image(path, image):
+    """Replaces `path` atomically, so a dashboard polling the file never reads half an image."""
+    ok, data = cv2.imencode(os.path.splitext(path)[1] or ".jpg", image)
+    if not ok: return
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data.tobytes())
+    os.replace(tmp, path)
@@ -1,268 +1,776 @@
+import argparse
+import os
+import time
 import numpy as np
 import cv2
-from ultralytics import YOLO
 import supervision as sv
 import config
 import utils
-from team_assigner import TeamAssigner
+import detection_cache
+import detectors
+import live
+import parallel_render
+import metrics
+import rallies
+import track_export
+from ball_search import BallSearcher
+from camera_motion import CameraMotion
+from court_analytics import CourtAnalytics
+from box_propagation import KeyframeScheduler, BoxPropagator, small_gray
+from detection_store import DetectionStore
+from team_assigner import TeamAssigner, OnlineTeamAssigner
 from view_transformer import ViewTransformer
-from mini_court import MiniCourt 
-
-#  COLOR EXTRACTION ---
-def get_color_tuple(color_obj):
-    if hasattr(color_obj, 'by_idx'):
-        return color_obj.by_idx(0).as_bgr()
-    elif hasattr(color_obj, 'as_bgr'):
-        return color_obj.as_bgr()
-    return color_obj
+from renderer import FrameRenderer
+from video_io import create_reader, create_writer
 
 # --- SETUP ---
-print("[INFO] Loading YOLO model...")
-model = YOLO(config.MODEL_PATH)
-
-print("[INFO] Initializing Trackers...")
-tracker = sv.ByteTrack(lost_track_buffer=60, minimum_matching_threshold=0.8)
-
-team_assigner = TeamAssigner()
-view_transformer = ViewTransformer()
-
-# --- ANNOTATORS ---
-ell_annotator_1 = sv.EllipseAnnotator(color=config.COLOR_TEAM_1, thickness=2)
-ell_annotator_2 = sv.EllipseAnnotator(color=config.COLOR_TEAM_2, thickness=2)
-ell_annotator_neutral = sv.EllipseAnnotator(color=sv.ColorPalette.from_hex(['#888888']), thickness=2)
-ref_annotator = sv.BoxAnnotator(color=config.COLOR_REF, thickness=4)
-
-# Annotator for Real-World Coordinates
-coord_annotator = sv.LabelAnnotator(
-    color=sv.Color.WHITE, 
-    text_color=sv.Color.BLACK, 
-    text_position=sv.Position.TOP_CENTER,
-    text_scale=0.5,
-    text_padding=5
-)
-
-# Annotators for Player IDs
-label_annotator_1 = sv.LabelAnnotator(
-    color=config.COLOR_TEAM_1, text_color=sv.Color.BLACK, text_position=sv.Position.BOTTOM_CENTER)
-label_annotator_2 = sv.LabelAnnotator(
-    color=config.COLOR_TEAM_2, text_color=sv.Color.WHITE, text_position=sv.Position.BOTTOM_CENTER)
-label_annotator_ref = sv.LabelAnnotator(
-    color=config.COLOR_REF, text_color=sv.Color.WHITE, text_position=sv.Position.TOP_CENTER)
-
-trace_annotator = sv.TraceAnnotator(color=config.COLOR_BALL, trace_length=20)
-dot_annotator = sv.DotAnnotator(color=config.COLOR_BALL, radius=4)
-
-CALIBRATION_FRAMES = 60
+# The model, the tracker and the court calibration are built on first use, so importing this
+# module (render workers, batch.py, --help) and runs served from the detection cache stay cheap.
+# Set them to None to have them built again (e.g. for another video).
+TRACKER_SETTINGS = dict(lost_track_buffer=60, minimum_matching_threshold=0.8)
+detector = None
+tracker = None
+view_transformer = None
 
-def main():
-    # ---------------------------------------------------------
-    # PASS 1: DETECTION & DATA COLLECTION
-    # ---------------------------------------------------------
-    print("[INFO] PASS 1: Running Inference on all frames...")
-    
-    cap = cv2.VideoCapture(config.VIDEO_SOURCE)
+def get_detector():
+    global detector
+    if detector is None:
+        print(f"[INFO] Loading YOLO model ({config.DETECTOR_BACKEND} backend)...")
+        start = time.perf_counter()
+        detector = detectors.create_detector()
+        if config.DETECTOR_WARMUP:
+            detectors.warm_up(detector)
+        print(f"[INFO] Model ready in {time.perf_counter() - start:.1f}s")
+    return detector
+
+def get_tracker():
+    global tracker
+    if tracker is None:
+        print("[INFO] Initializing Trackers...")
+        tracker = sv.ByteTrack(**TRACKER_SETTINGS)
+    return tracker
+
+def get_view_transformer():
+    global view_transformer
+    if view_transformer is None:
+        view_transformer = ViewTransformer(config.COURT_CALIBRATION)
+    return view_transformer
+
+def split_detections(detections):
+    """Splits tracked detections by class."""
+    players = detections[detections.class_id == config.ID_PLAYER]
+    referees = detections[detections.class_id == config.ID_REF]
+    balls = detections[detections.class_id == config.ID_BALL]
+    return players, referees, balls
+
+def detect_ball_crops(crops, imgsz):
+    """Ball-only YOLO on crops at native resolution (used by BallSearcher)."""
+    return get_detector().detect(crops, imgsz=imgsz, classes=[config.ID_BALL])
+
+def create_ball_searcher():
+    return BallSearcher(
+        detect_fn=detect_ball_crops if config.BALL_ROI_SEARCH else None,
+        roi_size=config.BALL_ROI_SIZE,
+        max_misses=config.BALL_MAX_MISSES,
+        tile_size=config.BALL_TILE_SIZE,
+        tile_interval=config.BALL_TILE_INTERVAL)
+
+def create_camera_motion():
+    """Per-frame court homographies (config.CAMERA_MOTION), attached to the view transformer. None when off."""
+    view_transformer = get_view_transformer()
+    camera = None
+    if config.CAMERA_MOTION:
+        camera = CameraMotion(
+            view_transformer.perspective_transformer, scale=config.CAMERA_MOTION_SCALE,
+            max_features=config.CAMERA_MAX_FEATURES, min_features=config.CAMERA_MIN_FEATURES,
+            max_drift=config.CAMERA_MAX_DRIFT, keyframe_interval=config.CAMERA_KEYFRAME_INTERVAL,
+            min_feature_ratio=config.CAMERA_MIN_FEATURE_RATIO, min_keyframe_gap=config.CAMERA_MIN_KEYFRAME_GAP)
+    view_transformer.camera_motion = camera
+    return camera
+
+def update_camera_motion(camera, frame, detections, timer):
+    if camera is None: return
+    with timer.stage("camera_motion"):
+        camera.update(small_gray(frame, config.CAMERA_MOTION_SCALE), detections.xyxy)
+
+def camera_motion_arrays():
+    """The per-frame matrices to save with the detection cache."""
+    camera = get_view_transformer().camera_motion
+    return {"camera_matrices": camera.frame_matrices} if camera is not None else None
+
+def detect_video(path, timer, store=None, resume=None, checkpoint=None, ranges=None):
+    """
+    PASS 1 core: decode on a background thread, run YOLO on batches of
+    config.INFERENCE_BATCH_SIZE frames, then update ByteTrack one frame at a time in order.
+    With config.DETECTION_STRIDE > 1, YOLO only sees keyframes and player/referee boxes
+    are propagated in between (see box_propagation). With config.ANALYSIS_WIDTH, keyframes are
+    downscaled for YOLO and the boxes mapped back to source pixels (see utils.AnalysisScale).
+    The ball is picked (and searched for, see BallSearcher) along its predicted trajectory.
+    With config.CAMERA_MOTION, the camera is tracked too (see create_camera_motion).
+    Yields (frame_idx, frame, players, referees, best_ball) per frame, after appending the frame's
+    tracked detections and ball box to `store` (a DetectionStore) if given.
+
+    `ranges` ((start, end) frame ranges, sorted) limits it to those frames: the reader seeks
+    to each range, the ball track and keyframes restart there, ByteTrack's tracks age as if the
+    frames in between had no detections, and `store` gets those frames as empty frames.
+
+    `checkpoint(state)` is called about every config.CHECKPOINT_INTERVAL frames, after the
+    frames up to state["frame_idx"] were yielded. Passing that state back as `resume`
+    continues from there with the same tracker, ball and keyframe state.
+    """
+    tracker = get_tracker()
+    view_transformer = get_view_transformer()
+    ball_searcher = create_ball_searcher()
+    stride = config.DETECTION_STRIDE
+    scheduler = KeyframeScheduler(stride, config.STRIDE_MOTION_THRESHOLD)
+    propagator = BoxPropagator(config.PROPAGATION_METHOD, config.PROPAGATION_SCALE)
+    camera = create_camera_motion()
+    if camera is not None and ranges is not None:
+        print("[WARNING] Camera motion is tracked from the first frame on: frame ranges use the static court calibration.")
+        camera = view_transformer.camera_motion = None
+    frame_idx = 0
+    if resume is not None:
+        frame_idx = resume["frame_idx"]
+        tracker.__dict__.update(resume["tracker"])
+        detect_fn = ball_searcher.detect_fn
+        ball_searcher, scheduler, propagator = resume["ball_searcher"], resume["scheduler"], resume["propagator"]
+        ball_searcher.detect_fn = detect_fn
+        if camera is not None:
+            camera = view_transformer.camera_motion = resume["camera_motion"]
+    last_checkpoint = frame_idx
+    scale = None
+
+    for start, end in ranges if ranges is not None else [(frame_idx, None)]:
+        if start != frame_idx:
+            skip_tracker_frames(start - frame_idx)
+            if store is not None:
+                store.append_empty(start - frame_idx)
+            scheduler.restart()
+            ball_searcher.restart()
+            frame_idx = start
+
+        with create_reader(path, timer=timer, start=start, end=end) as reader:
+            # Keep INFERENCE_BATCH_SIZE keyframes per YOLO call
+            for batch in reader.batches(config.INFERENCE_BATCH_SIZE * stride):
+                if scale is None:
+                    scale = utils.AnalysisScale(batch[0].shape[1], batch[0].shape[0], config.ANALYSIS_WIDTH)
+                timer.observe("decode_queue", reader.qsize())
+                grays = [None] * len(batch)
+                is_key = [True] * len(batch)
+                if stride > 1:
+                    with timer.stage("keyframes", len(batch)):
+                        grays = [small_gray(frame, config.PROPAGATION_SCALE) for frame in batch]
+                        is_key = [scheduler.is_keyframe(gray) for gray in grays]
+
+                keyframes = [frame for frame, key in zip(batch, is_key) if key]
+                if scale.active:
+                    with timer.stage("downscale", len(keyframes)):
+                        keyframes = [scale.downscale(frame) for frame in keyframes]
+                with timer.stage("inference", len(keyframes)):
+                    results = iter(get_detector().detect(keyframes) if keyframes else [])
+
+                for frame, gray, key in zip(batch, grays, is_key):
+                    if key:
+                        detections = scale.to_source(next(results))
+                        if stride > 1:
+                            propagator.reset(detections[detections.class_id != config.ID_BALL], gray, frame_idx)
+                    else:
+                        # The ball moves too fast to propagate: BallSearcher handles it on these frames
+                        with timer.stage("propagation"):
+                            detections = propagator.propagate(gray)
+
+                    with timer.stage("tracking"):
+                        detections = tracker.update_with_detections(detections)
+                        players, referees, balls = split_detections(detections)
+                    update_camera_motion(camera, frame, detections, timer)
+                    timer.observe("detections_per_frame", len(detections))
+                    timer.observe_tracks(frame_idx, detections.tracker_id)
+                    with timer.stage("ball"):
+                        best_ball = ball_searcher.select(frame, balls)
+                    if store is not None:
+                        store.append(detections, best_ball)
+                    yield frame_idx, frame, players, referees, best_ball
+                    frame_idx += 1
+
+                if checkpoint is not None and frame_idx - last_checkpoint >= config.CHECKPOINT_INTERVAL:
+                    with timer.stage("checkpoint"):
+                        # ByteTrack's class is wrapped by a deprecation shim and cannot be pickled itself
+                        checkpoint({"frame_idx": frame_idx, "tracker": tracker.__dict__, "ball_searcher": ball_searcher,
+                                    "scheduler": scheduler, "propagator": propagator, "camera_motion": camera})
+                    last_checkpoint = frame_idx
+
+    if stride > 1:
+        print(f"[INFO] Keyframes: {scheduler.keyframes}/{scheduler.frames} "
+              f"({scheduler.motion_keyframes} triggered by scene motion)")
+    if config.BALL_ROI_SEARCH:
+        print(f"[INFO] Ball search: {ball_searcher.pixels_searched / 1e6:.1f} MPixel of crops/tiles in total.")
+    if camera is not None:
+        print(f"[INFO] Camera motion: {camera.keyframes} keyframes ({camera.refinements} refined against "
+              f"the first frame), {camera.lost_frames} frames without a fit")
+
+def skip_tracker_frames(frames):
+    """Ages ByteTrack's tracks over `frames` frames that are not decoded, as if nothing was detected in them."""
+    tracker = get_tracker()
+    for _ in range(min(frames, tracker.max_time_lost + 1)):
+        tracker.update_with_detections(sv.Detections.empty())
+
+def replay_video(path, cached, timer, ranges=None):
+    """Same output as detect_video, but detections come from the cache instead of YOLO."""
+    for start, end in ranges if ranges is not None else [(0, len(cached))]:
+        end = min(end, len(cached))
+        if end <= start: continue
+        with create_reader(path, timer=timer, start=start, end=end) as reader:
+            for i, frame in enumerate(reader, start):
+                players, referees, _ = split_detections(cached[i])
+                yield i, frame, players, referees, cached.ball_box(i)
+
+def get_detection_cache(path, ranges=None):
+    """
+    Returns (key, cached detections or None). key is None when caching is disabled.
+    With frame `ranges`, a cache of the whole video is used if there is one; otherwise the
+    detections of just these ranges are cached under their own key.
+    """
+    if not config.USE_DETECTION_CACHE:
+        return None, None
+    settings = sorted(TRACKER_SETTINGS.items()) + [
+        ("ball_search", config.BALL_ROI_SEARCH, config.BALL_ROI_SIZE, config.BALL_MAX_MISSES,
+         config.BALL_TILE_SIZE, config.BALL_TILE_INTERVAL)]
+    if config.DETECTOR_BACKEND != "ultralytics":
+        settings.append(("detector", config.DETECTOR_BACKEND, config.DETECTOR_INT8, config.DETECTOR_IMGSZ,
+                         config.DETECTOR_CONF, config.DETECTOR_IOU))
+    if config.DETECTION_STRIDE > 1:
+        settings.append(("stride", config.DETECTION_STRIDE, config.STRIDE_MOTION_THRESHOLD,
+                         config.PROPAGATION_METHOD, config.PROPAGATION_SCALE))
+    if config.ANALYSIS_WIDTH:
+        settings.append(("analysis_width", config.ANALYSIS_WIDTH))
+    if config.CAMERA_MOTION:
+        settings.append(("camera_motion", config.COURT_CALIBRATION, config.CAMERA_MOTION_SCALE,
+                         config.CAMERA_MAX_FEATURES, config.CAMERA_MIN_FEATURES, config.CAMERA_MAX_DRIFT,
+                         config.CAMERA_KEYFRAME_INTERVAL, config.CAMERA_MIN_FEATURE_RATIO,
+                         config.CAMERA_MIN_KEYFRAME_GAP))
+    key = detection_cache.cache_key(path, config.MODEL_PATH, extra=repr(settings))
+    cached = detection_cache.load(config.CACHE_DIR, key)
+    if cached is None and ranges is not None:
+        key = detection_cache.cache_key(path, config.MODEL_PATH, extra=repr(settings + [("frames", ranges)]))
+        cached = detection_cache.load(config.CACHE_DIR, key)
+    if cached is not None:
+        print(f"[INFO] Using cached detections ({len(cached)} frames, key {key[:12]})")
+        if config.CAMERA_MOTION:
+            matrices = detection_cache.load_array(config.CACHE_DIR, key, "camera_matrices")
+            if matrices is None:
+                print("[WARNING] The detection cache has no camera motion: using the static court calibration.")
+            get_view_transformer().camera_motion = CameraMotion.from_matrices(matrices) if matrices is not None else None
+    return key, cached
+
+def create_team_assigner(width, height, static=False):
+    # Jersey colours are stride-sampled with the pixel spacing of the analysis resolution (config.ANALYSIS_WIDTH)
+    sample_step = utils.AnalysisScale(width, height, config.ANALYSIS_WIDTH).sample_step
+    if config.TEAM_MODEL == "online" and not static:
+        return OnlineTeamAssigner(
+            reservoir_size=config.TEAM_RESERVOIR_SIZE,
+            refit_interval=config.TEAM_REFIT_INTERVAL,
+            vote_decay=config.TEAM_VOTE_DECAY,
+            sample_step=sample_step)
+    return TeamAssigner(sample_step=sample_step)
+
+def open_video(path):
+    cap = cv2.VideoCapture(path)
     if not cap.isOpened():
-        print(f"[ERROR] Could not open video: {config.VIDEO_SOURCE}")
-        return
+        print(f"[ERROR] Could not open video: {path}")
+        return None, None
+
+    info = {
+        "frame_count": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        "fps": int(cap.get(cv2.CAP_PROP_FPS)),
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+    }
+    return cap, info
+
+def create_metrics():
+    timer = metrics.PipelineMetrics()
+    if config.METRICS_PROM_PATH:
+        timer.start_prometheus_export(config.METRICS_PROM_PATH, config.METRICS_PROM_INTERVAL)
+    return timer
+
+def finish_metrics(timer, target):
+    """Prints the stage report and writes the JSON summary (next to `target` unless METRICS_JSON is set)."""
+    timer.stop()
+    timer.report()
+    path = config.METRICS_JSON or os.path.splitext(target)[0] + "_metrics.json"
+    timer.write_json(path)
+    print(f"[INFO] Metrics saved to {path}")
+
+def create_analytics(fps):
+    if not config.COURT_ANALYTICS:
+        return None
+    return CourtAnalytics(
+        fps, cell_size=config.ANALYTICS_CELL_SIZE, max_speed=config.ANALYTICS_MAX_SPEED,
+        sprint_speed=config.ANALYTICS_SPRINT_SPEED, sprint_frames=config.ANALYTICS_SPRINT_FRAMES,
+        jump_ratio=config.ANALYTICS_JUMP_RATIO)
+
+def save_analytics(analytics, target):
+    """Writes <target stem>_analytics.json and _occupancy.npz."""
+    if analytics is None: return
+    stem = os.path.splitext(target)[0]
+    analytics.save(f"{stem}_analytics.json", f"{stem}_occupancy.npz")
+    print(f"[INFO] Court analytics saved to {stem}_analytics.json")
+
+def run_pass_one(frame_count, timer, ranges=None):
+    """
+    PASS 1 (from the detection cache if possible), over the whole video or only the frame `ranges`.
+    Returns players and referees as DetectionStores (store[i] = sv.Detections of frame i)
+    and the (frames, 4) ball boxes picked per frame, NaN rows where there was none.
+    """
+    print("[INFO] PASS 1: Running Inference on all frames..." if ranges is None else
+          f"[INFO] PASS 1: Running Inference on {sum(end - start for start, end in ranges)} frames...")
+
+    key, cached = get_detection_cache(config.VIDEO_SOURCE, ranges)
+    if cached is not None:
+        # Cache hit: no decode and no inference needed for PASS 1
+        store = cached
+    else:
+        store = DetectionStore()
+        resume = checkpoint = None
+        meta = {"video": config.VIDEO_SOURCE}
+        if ranges is not None:
+            meta["ranges"] = ranges
+        elif key is not None and config.CHECKPOINT_INTERVAL:
+            done, resume = detection_cache.load_checkpoint(config.CACHE_DIR, key)
+            if done is not None:
+                print(f"[INFO] Resuming PASS 1 from the checkpoint at frame {len(done)}")
+                store = done
+
+            def checkpoint(state):
+                detection_cache.checkpoint(store, config.CACHE_DIR, key, state, meta=meta)
+
+        for _ in detect_video(config.VIDEO_SOURCE, timer, store, resume=resume, checkpoint=checkpoint, ranges=ranges):
+            if len(store) % 100 == 0:
+                print(f"      Processed {len(store)}/{frame_count} frames...")
+
+        if key is not None:
+            detection_cache.save(store, config.CACHE_DIR, key, meta=meta, arrays=camera_motion_arrays())
+
+    with timer.stage("split", len(store)):
+        all_player_detections, all_ref_detections = store.split(config.ID_PLAYER, config.ID_REF)
+    return all_player_detections, all_ref_detections, store.ball_xyxy
+
+def interpolate_ball(ball_boxes, ranges=None):
+    """PASS 2 over the whole video, or over each frame range on its own (frames outside them stay NaN)."""
+    if ranges is None:
+        return utils.interpolate_ball_positions(ball_boxes.copy(), max_gap=config.BALL_MAX_GAP_FRAMES)
+    boxes = np.full((len(ball_boxes), 4), np.nan, dtype=np.float32)
+    for start, end in ranges:
+        boxes[start:end] = utils.interpolate_ball_positions(
+            np.array(ball_boxes[start:end], dtype=np.float32), max_gap=config.BALL_MAX_GAP_FRAMES)
+    return boxes
+
+def build_rally_index(info):
+    """
+    Scans config.VIDEO_SOURCE for rallies (see rallies.find_rallies) and saves the index next to it.
+    The ball track is used when the detection cache has the whole video, otherwise only scene motion.
+    """
+    path = config.VIDEO_SOURCE
+    print(f"[INFO] Scanning {path} for rallies...")
+    start = time.perf_counter()
+    energy, fps = rallies.motion_energy(path, scale=config.RALLY_SCAN_SCALE, step=config.RALLY_SCAN_STEP)
+    seconds = time.perf_counter() - start
+    print(f"[INFO] Motion scan: {len(energy)} frames in {seconds:.1f}s ({len(energy) / max(seconds, 1e-9):.0f} fps)")
+
+    signals = ["motion"]
+    ball_moving = None
+    _, cached = get_detection_cache(path)
+    if cached is not None:
+        balls = interpolate_ball(cached.ball_xyxy)
+        ball_moving = rallies.ball_motion(balls, fps, info["width"], min_speed=config.RALLY_BALL_SPEED)
+        signals.append("ball")
+    else:
+        print("[INFO] No detection cache of the whole video: rallies from scene motion only.")
+
+    found, threshold = rallies.find_rallies(
+        energy, fps, ball_moving, motion_threshold=config.RALLY_MOTION_THRESHOLD, smoothing=config.RALLY_SMOOTHING,
+        min_duration=config.RALLY_MIN_DURATION, min_gap=config.RALLY_MIN_GAP, padding=config.RALLY_PADDING)
+    index = rallies.build_index(path, energy, fps, found, threshold, signals)
+    rallies.save_index(index, rallies.index_path(path))
+    in_play = sum(end - start for start, end in found)
+    print(f"[INFO] {len(found)} rallies, {in_play}/{len(energy)} frames in play. "
+          f"Index saved to {rallies.index_path(path)}")
+    return index
+
+def resolve_ranges(info):
+    """
+    The frames to process (config.PROCESS_RALLIES and config.PROCESS_FRAMES) as sorted
+    (start, end) ranges, or None for the whole video. Builds the rally index if it is needed and missing.
+    """
+    ranges = []
+    if config.PROCESS_RALLIES:
+        index = rallies.load_index(config.VIDEO_SOURCE) or build_rally_index(info)
+        ranges += rallies.rally_ranges(index, config.PROCESS_RALLIES)
+    if config.PROCESS_FRAMES:
+        ranges += config.PROCESS_FRAMES
+    if not ranges:
+        return None
+    ranges = rallies.merge_ranges(ranges, info["frame_count"])
+    if not ranges:
+        raise ValueError(f"The frame ranges are outside the video ({info['frame_count']} frames)")
+    print(f"[INFO] Processing {sum(end - start for start, end in ranges)}/{info['frame_count']} frames "
+          f"in {len(ranges)} range(s)")
+    return ranges
+
+def run_three_pass():
+    cap, info = open_video(config.VIDEO_SOURCE)
+    if cap is None: return
+    frame_count = info["frame_count"]
 
-    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    
-    all_player_detections = [] 
-    all_ref_detections = []    
-    all_ball_bboxes = []       
-    
     ret, first_frame = cap.read()
-    if not ret: return
-    mini_court = MiniCourt(first_frame) 
-    cap.set(cv2.CAP_PROP_POS_FRAMES, 0) 
-    
-    current_frame = 0
-    while True:
-        ret, frame = cap.read()
-        if not ret: break
-
-        results = model.predict(frame, device=0, verbose=False)[0]
-        detections = sv.Detections.from_ultralytics(results)
-        detections = tracker.update_with_detections(detections)
-
-        players = detections[detections.class_id == config.ID_PLAYER]
-        referees = detections[detections.class_id == config.ID_REF]
-        balls = detections[detections.class_id == config.ID_BALL]
-        
-        all_player_detections.append(players)
-        all_ref_detections.append(referees)
-
-        if len(balls) > 0:
-            best_ball = balls.xyxy[0] 
-            all_ball_bboxes.append(best_ball)
-        else:
-            all_ball_bboxes.append(None)
-            
-        current_frame += 1
-        if current_frame % 100 == 0:
-            print(f"      Processed {current_frame}/{frame_count} frames...")
-            
     cap.release()
+    if not ret: return
+    ranges = resolve_ranges(info)
+    timer = create_metrics()
+
+    # ---------------------------------------------------------
+    # PASS 1: DETECTION & DATA COLLECTION
+    # ---------------------------------------------------------
+    all_player_detections, all_ref_detections, all_ball_bboxes = run_pass_one(frame_count, timer, ranges)
 
     # ---------------------------------------------------------
     # PASS 2: INTERPOLATION
     # ---------------------------------------------------------
     print("[INFO] PASS 2: Interpolating Ball Positions...")
-    interpolated_ball_bboxes = utils.interpolate_ball_positions(all_ball_bboxes)
-    
+    with timer.stage("interpolation", len(all_ball_bboxes)):
+        interpolated_ball_bboxes = interpolate_ball(all_ball_bboxes, ranges)
+
     # ---------------------------------------------------------
     # PASS 3: RENDERING & MINI-MAP
     # ---------------------------------------------------------
     print("[INFO] PASS 3: Rendering Final Video...")
-    
-    cap = cv2.VideoCapture(config.VIDEO_SOURCE)
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    writer = cv2.VideoWriter(config.VIDEO_TARGET, fourcc, fps, (width, height))
-    
-    team_assigner = TeamAssigner()
-    
-    for i, ball_box in enumerate(interpolated_ball_bboxes):
-        ret, frame = cap.read()
-        if not ret: break
-
-        # 1. Retrieve Data
-        players = all_player_detections[i]
-        referees = all_ref_detections[i]
-        
-        # 2. Setup Ball
-        if np.isnan(ball_box[0]):
-            balls = sv.Detections.empty()
-        else:
-            xyxy = np.array([ball_box], dtype=np.float32)
-            class_id = np.array([config.ID_BALL])
-            confidence = np.array([1.0])
-            tracker_id = np.array([1]) 
-            balls = sv.Detections(xyxy=xyxy, class_id=class_id, confidence=confidence, tracker_id=tracker_id)
-
-        # 3. Team Assignment
-        players_1 = sv.Detections.empty()
-        players_2 = sv.Detections.empty()
-        players_neutral = sv.Detections.empty()
-        
-        if len(players) > 0:
-            if i < CALIBRATION_FRAMES:
-                team_assigner.collect_samples(frame, players)
-                players_neutral = players
-                cv2.putText(frame, f"Calibrating... {i}/{CALIBRATION_FRAMES}", (50,50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0,0,255), 2)
-            else:
-                if not team_assigner.trained:
-                    team_assigner.fit_model()
-                
-                team_ids = []
-                for idx, bbox in enumerate(players.xyxy):
-                    p_id = players.tracker_id[idx] if players.tracker_id is not None else idx
-                    t_id = team_assigner.get_player_team(frame, bbox, p_id)
-                    team_ids.append(t_id)
-                
-                team_ids = np.array(team_ids)
-                players_1 = players[team_ids == 1]
-                players_2 = players[team_ids == 2]
-
-        # 4. VIEW TRANSFORMATION
-        # Calculate real-world positions (Meters)
-        points_feet_1 = players_1.get_anchors_coordinates(sv.Position.BOTTOM_CENTER)
-        points_feet_2 = players_2.get_anchors_coordinates(sv.Position.BOTTOM_CENTER)
-        points_ref = referees.get_anchors_coordinates(sv.Position.BOTTOM_CENTER) # Referees
-        
-        # Transform Points
-        transformed_p1 = view_transformer.transform_points(points_feet_1)   
-        transformed_p2 = view_transformer.transform_points(points_feet_2)   
-        transformed_ref = view_transformer.transform_points(points_ref) # Transform Referees
-        
-        # Ball position
-        points_ball = None
-        if len(balls) > 0:
-            b_box = balls.xyxy[0]
-            b_center = np.array([[(b_box[0]+b_box[2])/2, (b_box[1]+b_box[3])/2]])
-            points_ball = view_transformer.transform_points(b_center)
-
-        # Coordinate Labels (Combine all players for text)
-        all_points = []
-        if len(transformed_p1) > 0: all_points.extend(transformed_p1)
-        if len(transformed_p2) > 0: all_points.extend(transformed_p2)
-        
-        coord_labels = []
-        for point in all_points:
-            x, y = point
-            coord_labels.append(f"({x:.1f}m, {y:.1f}m)")
-
-        # --- DRAWING ---
-        annotated_frame = frame.copy()
-        
-        # A. Mini Court
-        annotated_frame = mini_court.draw_background_rectangle(annotated_frame)
-        annotated_frame = mini_court.draw_court(annotated_frame)
-        
-        if i >= CALIBRATION_FRAMES:
-            # Team 1 Dots
-            annotated_frame = mini_court.draw_points_on_mini_court(
-                annotated_frame, transformed_p1, color=get_color_tuple(config.COLOR_TEAM_1))
-            # Team 2 Dots
-            annotated_frame = mini_court.draw_points_on_mini_court(
-                annotated_frame, transformed_p2, color=get_color_tuple(config.COLOR_TEAM_2))
-            # Referee Dots (ADDED)
-            annotated_frame = mini_court.draw_points_on_mini_court(
-                annotated_frame, transformed_ref, color=get_color_tuple(config.COLOR_REF))
-            # Ball Dot (ADDED)
-            if points_ball is not None:
-                annotated_frame = mini_court.draw_points_on_mini_court(
-                    annotated_frame, points_ball, color=get_color_tuple(config.COLOR_BALL))
-
-        # B. Standard Annotations
-        
-        # Referees
-        annotated_frame = ref_annotator.annotate(scene=annotated_frame, detections=referees)
-        if referees.tracker_id is not None:
-            labels = [f"Ref {i}" for i in referees.tracker_id]
-            annotated_frame = label_annotator_ref.annotate(scene=annotated_frame, detections=referees, labels=labels)
-
-        # Team 1
-        annotated_frame = ell_annotator_1.annotate(scene=annotated_frame, detections=players_1)
-        if players_1.tracker_id is not None:
-            labels = [f"#{i}" for i in players_1.tracker_id]
-            annotated_frame = label_annotator_1.annotate(scene=annotated_frame, detections=players_1, labels=labels)
-
-        # Team 2
-        annotated_frame = ell_annotator_2.annotate(scene=annotated_frame, detections=players_2)
-        if players_2.tracker_id is not None:
-            labels = [f"#{i}" for i in players_2.tracker_id]
-            annotated_frame = label_annotator_2.annotate(scene=annotated_frame, detections=players_2, labels=labels)
-
-        # C. Coordinates Overlay
-        if len(players) > 0 and i >= CALIBRATION_FRAMES:
-             # Create combined detections to match label length
-             all_players = sv.Detections.merge([players_1, players_2])
-             # Ensure labels match the merged detections order
-             if len(all_players) == len(coord_labels):
-                 annotated_frame = coord_annotator.annotate(
-                     scene=annotated_frame, 
-                     detections=all_players, 
-                     labels=coord_labels
-                 )
-
-        # D. Ball Tracing
-        if len(balls) > 0:
-            annotated_frame = trace_annotator.annotate(scene=annotated_frame, detections=balls)
-            annotated_frame = dot_annotator.annotate(scene=annotated_frame, detections=balls)
-            for box in balls.xyxy:
-                annotated_frame = utils.draw_triangle(annotated_frame, box)
-
-        writer.write(annotated_frame)
-        
-        if i % 100 == 0:
-            print(f"      Rendered {i}/{frame_count} frames...")
 
+    if config.RENDER_WORKERS > 1:
+        if config.TEAM_MODEL != "static":
+            print("[WARNING] Parallel rendering needs fixed team assignments: using the static team model.")
+        if config.COURT_ANALYTICS:
+            print("[WARNING] Court analytics need every frame in order: not available with parallel rendering.")
+        with timer.stage("render_parallel", len(interpolated_ball_bboxes)):
+            parallel_render.render_parallel(
+                config.VIDEO_SOURCE, config.VIDEO_TARGET,
+                all_player_detections, all_ref_detections, interpolated_ball_bboxes,
+                get_view_transformer(), create_team_assigner(info["width"], info["height"], static=True),
+                fps=info["fps"], size=(info["width"], info["height"]),
+                workers=config.RENDER_WORKERS, chunk_frames=config.RENDER_CHUNK_FRAMES, ranges=ranges)
+        finish_metrics(timer, config.VIDEO_TARGET)
+        print(f"[INFO] Done! Output saved to {config.VIDEO_TARGET}")
+        return
+
+    team_assigner = create_team_assigner(info["width"], info["height"])
+    analytics = create_analytics(info["fps"])
+    renderer = FrameRenderer(first_frame, get_view_transformer(), timer=timer, analytics=analytics,
+                             calibration_start=ranges[0][0] if ranges else 0)
+
+    # Decode, render and encode overlap: reader and writer run on their own threads
+    with create_writer(config.VIDEO_TARGET, info["fps"], (info["width"], info["height"]), timer=timer) as writer:
+        for start, end in ranges if ranges is not None else [(0, None)]:
+            if start > 0:
+                renderer.start_segment()
+            with create_reader(config.VIDEO_SOURCE, timer=timer, start=start, end=end) as reader:
+                for i, (frame, ball_box) in enumerate(zip(reader, interpolated_ball_bboxes[start:end]), start):
+                    with timer.stage("render"):
+                        annotated_frame = renderer.render(
+                            frame, i, all_player_detections[i], all_ref_detections[i], ball_box, team_assigner)
+                    writer.write(annotated_frame)
+                    timer.observe("decode_queue", reader.qsize())
+                    timer.observe("encode_queue", writer.qsize())
+
+                    if i % 100 == 0:
+                        print(f"      Rendered {i}/{frame_count} frames...")
+
+    save_analytics(analytics, config.VIDEO_TARGET)
+    finish_metrics(timer, config.VIDEO_TARGET)
+    print(f"[INFO] Done! Output saved to {config.VIDEO_TARGET}")
+
+def run_export():
+    """
+    Headless mode: PASS 1 and 2 as usual, teams resolved from the few frames that need
+    decoding, then the track table goes to config.TRACKS_TARGET instead of drawing a video.
+    """
+    cap, info = open_video(config.VIDEO_SOURCE)
+    if cap is None: return
+    cap.release()
+    ranges = resolve_ranges(info)
+    timer = create_metrics()
+
+    all_player_detections, all_ref_detections, all_ball_bboxes = run_pass_one(info["frame_count"], timer, ranges)
+
+    print("[INFO] PASS 2: Interpolating Ball Positions...")
+    with timer.stage("interpolation", len(all_ball_bboxes)):
+        interpolated_ball_bboxes = interpolate_ball(all_ball_bboxes, ranges)
+
+    print("[INFO] Assigning teams...")
+    if config.TEAM_MODEL != "static":
+        print("[WARNING] The track export needs fixed team assignments: using the static team model.")
+    with timer.stage("team_assigner", len(all_player_detections)):
+        team_assigner = parallel_render.resolve_player_teams(
+            config.VIDEO_SOURCE, all_player_detections, create_team_assigner(info["width"], info["height"], static=True),
+            start=ranges[0][0] if ranges else 0)
+
+    print(f"[INFO] Exporting tracks to {config.TRACKS_TARGET}...")
+    with timer.stage("export", len(all_ball_bboxes)):
+        rows = track_export.export_tracks(
+            config.TRACKS_TARGET, all_player_detections, all_ref_detections,
+            all_ball_bboxes, interpolated_ball_bboxes, team_assigner.player_team_dict, get_view_transformer(),
+            ranges=ranges)
+    finish_metrics(timer, config.TRACKS_TARGET)
+    print(f"[INFO] Done! {rows} rows saved to {config.TRACKS_TARGET}")
+
+def run_streaming():
+    """
+    Single decode pass: detect -> interpolate ball (bounded look-ahead) -> assign teams -> render.
+    Only frames inside an open ball gap are buffered, so memory does not grow with match length.
+    """
+    print(f"[INFO] STREAMING: Single pass with {config.BALL_LOOKAHEAD_FRAMES}-frame ball look-ahead...")
+
+    cap, info = open_video(config.VIDEO_SOURCE)
+    if cap is None: return
+    frame_count = info["frame_count"]
+
+    ret, first_frame = cap.read()
     cap.release()
-    writer.release()
+    if not ret: return
+    ranges = resolve_ranges(info)
+
+    team_assigner = create_team_assigner(info["width"], info["height"])
+    ball_interpolator = utils.StreamingBallInterpolator(
+        max_lookahead=config.BALL_LOOKAHEAD_FRAMES, max_gap=config.BALL_MAX_GAP_FRAMES)
+    timer = create_metrics()
+    analytics = create_analytics(info["fps"])
+    renderer = FrameRenderer(first_frame, get_view_transformer(), timer=timer, analytics=analytics,
+                             calibration_start=ranges[0][0] if ranges else 0)
+    writer = create_writer(config.VIDEO_TARGET, info["fps"], (info["width"], info["height"]), timer=timer)
+
+    def write_ready(ready):
+        for (i, frame, players, referees, decoded_at), ball_box in ready:
+            with timer.stage("render"):
+                annotated_frame = renderer.render(frame, i, players, referees, ball_box, team_assigner)
+            writer.write(annotated_frame)
+            # Decode -> encode queue, including the time spent waiting in the ball look-ahead
+            timer.observe_seconds("frame_latency", time.perf_counter() - decoded_at)
+            timer.observe("encode_queue", writer.qsize())
+            if i % 100 == 0:
+                print(f"      Rendered {i}/{frame_count} frames...")
+
+    key, cached = get_detection_cache(config.VIDEO_SOURCE, ranges)
+    store = None
+    if cached is not None:
+        frames = replay_video(config.VIDEO_SOURCE, cached, timer, ranges)
+    else:
+        store = DetectionStore() if key is not None else None
+        frames = detect_video(config.VIDEO_SOURCE, timer, store, ranges=ranges)
+
+    next_frame = 0
+    for i, frame, players, referees, best_ball in frames:
+        if i != next_frame:
+            # A new frame range: the ball is not interpolated across the frames in between
+            write_ready(ball_interpolator.flush())
+            ball_interpolator = utils.StreamingBallInterpolator(
+                max_lookahead=config.BALL_LOOKAHEAD_FRAMES, max_gap=config.BALL_MAX_GAP_FRAMES)
+            renderer.start_segment()
+        payload = (i, frame, players, referees, time.perf_counter())
+        write_ready(ball_interpolator.push(payload, best_ball))
+        next_frame = i + 1
+
+    write_ready(ball_interpolator.flush())
+
+    writer.close()
+    if store is not None:
+        meta = {"video": config.VIDEO_SOURCE} if ranges is None else {"video": config.VIDEO_SOURCE, "ranges": ranges}
+        detection_cache.save(store, config.CACHE_DIR, key, meta=meta, arrays=camera_motion_arrays())
+    save_analytics(analytics, config.VIDEO_TARGET)
+    finish_metrics(timer, config.VIDEO_TARGET)
     print(f"[INFO] Done! Output saved to {config.VIDEO_TARGET}")
 
+def run_live():
+    """
+    Real-time mode: frames come from live.LiveSource and are processed one at a time, newest
+    first. The pipeline keeps to config.LIVE_LATENCY_BUDGET by
+      - dropping frames in the capture buffer while a frame is being processed,
+      - skipping frames that are already older than the budget when their turn comes,
+      - propagating the last boxes instead of running YOLO (up to LIVE_MAX_PROPAGATED frames
+        in a row) while the previous frame came out over budget.
+    Ball smoothing is causal, team assignment and the mini-court update frame by frame.
+    """
+    # Load the model before the stream opens, so the first frames are not already stale
+    detector = get_detector()
+    tracker = get_tracker()
+    source_name = config.LIVE_SOURCE
+    print(f"[INFO] LIVE: Opening {source_name} (latency budget {config.LIVE_LATENCY_BUDGET * 1000:.0f} ms)...")
+    timer = create_metrics()
+    try:
+        source = live.LiveSource(source_name, buffer=config.LIVE_BUFFER_FRAMES,
+                                 read_timeout=config.LIVE_READ_TIMEOUT, timer=timer)
+    except IOError as e:
+        print(f"[ERROR] {e}")
+        return
+
+    first = source.get(timeout=config.LIVE_READ_TIMEOUT)
+    if first is None:
+        print("[ERROR] No frames received from the live source.")
+        source.close()
+        return
+
+    height, width = first[1].shape[:2]
+    scale = utils.AnalysisScale(width, height, config.ANALYSIS_WIDTH)
+    team_assigner = create_team_assigner(width, height)
+    ball_searcher = create_ball_searcher()
+    ball_smoother = utils.CausalBallSmoother(
+        alpha=config.LIVE_BALL_SMOOTHING, hold_frames=config.LIVE_BALL_HOLD_FRAMES)
+    propagator = BoxPropagator(config.PROPAGATION_METHOD, config.PROPAGATION_SCALE)
+    camera = create_camera_motion()
+    analytics = create_analytics(source.fps)
+    renderer = FrameRenderer(first[1], get_view_transformer(), timer=timer, analytics=analytics)
+    writer = None
+    if config.LIVE_TARGET:
+        writer = create_writer(config.LIVE_TARGET, int(round(source.fps)), (width, height), timer=timer)
+
+    budget = config.LIVE_LATENCY_BUDGET
+    over_budget = False
+    propagated = 0
+    processed = 0
+    item = first
+    try:
+        while item is not None:
+            capture_idx, frame, captured_at = item
+            if time.perf_counter() - captured_at > budget and source.qsize() > 0:
+                # Stale, and a newer frame is already waiting
+                timer.count("frames_skipped")
+                item = source.get(timeout=config.LIVE_READ_TIMEOUT)
+                continue
+
+            with timer.stage("keyframes"):
+                gray = small_gray(frame, config.PROPAGATION_SCALE)
+            if over_budget and propagated < config.LIVE_MAX_PROPAGATED:
+                with timer.stage("propagation"):
+                    detections = propagator.propagate(gray)
+                propagated += 1
+                timer.count("frames_propagated")
+            else:
+                if scale.active:
+                    with timer.stage("downscale"):
+                        small = scale.downscale(frame)
+                else:
+                    small = frame
+                with timer.stage("inference"):
+                    detections = scale.to_source(detector.detect([small])[0])
+                propagator.reset(detections[detections.class_id != config.ID_BALL], gray, capture_idx)
+                propagated = 0
+
+            with timer.stage("tracking"):
+                detections = tracker.update_with_detections(detections)
+                players, referees, balls = split_detections(detections)
+            update_camera_motion(camera, frame, detections, timer)
+            timer.observe_tracks(capture_idx, detections.tracker_id)
+            with timer.stage("ball"):
+                ball_box = ball_smoother.update(ball_searcher.select(frame, balls), capture_idx)
+            with timer.stage("render"):
+                annotated_frame = renderer.render(frame, processed, players, referees, ball_box, team_assigner)
+
+            if writer is not None:
+                writer.write(annotated_frame)
+            if config.LIVE_MINI_COURT_TARGET and processed % config.LIVE_MINI_COURT_INTERVAL == 0:
+                with timer.stage("mini_court_out"):
+                    live.write_image(config.LIVE_MINI_COURT_TARGET, renderer.mini_court.crop(annotated_frame))
+            if config.LIVE_SHOW:
+                cv2.imshow("Volleyball (live)", annotated_frame)
+                if cv2.waitKey(1) & 0xFF == ord('q'): break
+
+            latency = time.perf_counter() - captured_at
+            timer.observe_seconds("frame_latency", latency)
+            timer.observe("capture_queue", source.qsize())
+            over_budget = latency > budget
+            if over_budget:
+                timer.count("frames_over_budget")
+            processed += 1
+            if processed % 100 == 0:
+                print(f"      Processed {processed} frames ({source.dropped} dropped, "
+                      f"latency {latency * 1000:.0f} ms)...")
+            item = source.get(timeout=config.LIVE_READ_TIMEOUT)
+    except KeyboardInterrupt:
+        print("[INFO] Stopped.")
+    finally:
+        source.close()
+        if writer is not None:
+            writer.close()
+        if config.LIVE_SHOW:
+            cv2.destroyAllWindows()
+
+    timer.count("frames_captured", source.captured)
+    timer.count("frames_dropped", source.dropped)
+    save_analytics(analytics, config.LIVE_TARGET or config.VIDEO_TARGET)
+    finish_metrics(timer, config.LIVE_TARGET or config.VIDEO_TARGET)
+    print(f"[INFO] Done! {processed}/{source.captured} frames processed ({source.dropped} dropped).")
+
+def main():
+    if config.INDEX_RALLIES:
+        cap, info = open_video(config.VIDEO_SOURCE)
+        if cap is None: return
+        cap.release()
+        build_rally_index(info)
+    elif config.LIVE_MODE:
+        run_live()
+    elif not config.RENDER_VIDEO:
+        run_export()
+    elif config.STREAMING_MODE:
+        run_streaming()
+    else:
+        run_three_pass()
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Volleyball player, referee and ball tracking.")
+    parser.add_argument("source", nargs="?", help="Input video (default VIDEO_SOURCE)")
+    parser.add_argument("target", nargs="?",
+                        help="Output: the annotated video, the track table with --no-render or the live "
+                             "recording with --live (default VIDEO_TARGET / TRACKS_TARGET / LIVE_TARGET)")
+    parser.add_argument("--weights", metavar="PATH", help="YOLO weights (default MODEL_PATH)")
+    parser.add_argument("--calibration", metavar="PATH",
+                        help="Court calibration from get_court_coordinates.py (default COURT_CALIBRATION)")
+    parser.add_argument("--warm-up", action="store_true",
+                        help="Run a blank batch through the model before the first frame (DETECTOR_WARMUP)")
+    parser.add_argument("--no-render", action="store_true",
+                        help="Skip the annotated video and export the track table to TRACKS_TARGET")
+    parser.add_argument("--live", nargs="?", const=config.LIVE_SOURCE, metavar="SOURCE",
+                        help="Real-time mode on an RTSP/UDP URL, a capture device index or a file (default LIVE_SOURCE)")
+    parser.add_argument("--index-rallies", action="store_true",
+                        help="Scan the video for rallies and save <video>.rallies.json, nothing else")
+    parser.add_argument("--rallies", metavar="IDS",
+                        help="Process only these rallies of the index, e.g. 3,4 (the index is built first if missing)")
+    parser.add_argument("--frames", metavar="RANGES",
+                        help="Process only these frame ranges, e.g. 1200-3400,5000-5600 (end exclusive)")
+    args = parser.parse_args(argv)
+    if args.source:
+        config.VIDEO_SOURCE = args.source
+    if args.target:
+        if args.live is not None:
+            config.LIVE_TARGET = args.target
+        elif args.no_render:
+            config.TRACKS_TARGET = args.target
+        else:
+            config.VIDEO_TARGET = args.target
+    if args.weights:
+        config.MODEL_PATH = args.weights
+    if args.calibration:
+        config.COURT_CALIBRATION = args.calibration
+    if args.warm_up:
+        config.DETECTOR_WARMUP = True
+    if args.no_render:
+        config.RENDER_VIDEO = False
+    if args.index_rallies:
+        config.INDEX_RALLIES = True
+    if args.rallies:
+        config.PROCESS_RALLIES = [int(rally_id) for rally_id in args.rallies.split(",")]
+    if args.frames:
+        config.PROCESS_FRAMES = rallies.parse_ranges(args.frames)
+    if args.live is not None:
+        config.LIVE_MODE = True
+        config.LIVE_SOURCE = args.live
+    main()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main_cli()
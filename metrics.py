@@ -0,0 +1,196 @@
+import bisect
+import json
+import os
+import threading
+import time
+from utils import StageTimer
+
+# Latency buckets: 1 us .. 100 s, 10 per decade (each bucket ~26% wide)
+LATENCY_BOUNDS = [10 ** (k / 10) for k in range(-60, 21)]
+# Value buckets (detections, queue depth, gap length): exact for integers up to 1024
+VALUE_BOUNDS = list(range(0, 1025))
+
+class Histogram:
+    """Fixed-bucket histogram: constant memory and O(log buckets) per observation."""
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # last bucket = above the highest bound
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value, weight=1):
+        self.counts[bisect.bisect_left(self.bounds, value)] += weight
+        self.count += weight
+        self.sum += value * weight
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile (q in 0..100)."""
+        if self.count == 0: return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for k, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n > 0:
+                return min(self.bounds[k], self.max) if k < len(self.bounds) else self.max
+        return self.max
+
+    def summary(self, scale=1.0):
+        return {
+            "count": self.count,
+            "mean": scale * self.sum / self.count if self.count else 0.0,
+            "p50": scale * self.percentile(50),
+            "p95": scale * self.percentile(95),
+            "p99": scale * self.percentile(99),
+            "max": scale * self.max,
+        }
+
+class PipelineMetrics(StageTimer):
+    """
+    StageTimer plus the data to tell what limits a run:
+    - per-frame latency histograms for every timed stage (p50/p95/p99),
+    - value histograms (detections per frame, queue depths, track gaps),
+    - counters and gauges,
+    - track stalls: a tracker ID that disappears and comes back later.
+    Written as JSON at the end of a run and, optionally, as a Prometheus text file
+    rewritten every few seconds by a background thread.
+    """
+    def __init__(self):
+        super().__init__()
+        self.latencies = {}
+        self.values = {}
+        self.counters = {}
+        self.gauges = {}
+        self.track_last_seen = {}
+        self.started = time.time()
+        self.export_thread = None
+        self.export_stop = threading.Event()
+
+    # --- Recording ---
+    def add(self, stage, seconds, frames=1):
+        super().add(stage, seconds, frames)
+        with self.lock:
+            self._histogram(self.latencies, stage, LATENCY_BOUNDS).observe(seconds / max(frames, 1), frames)
+
+    def observe_seconds(self, name, seconds):
+        """Latency that is not a stage total (e.g. end-to-end frame latency)."""
+        with self.lock:
+            self._histogram(self.latencies, name, LATENCY_BOUNDS).observe(seconds)
+
+    def observe(self, name, value):
+        with self.lock:
+            self._histogram(self.values, name, VALUE_BOUNDS).observe(value)
+            self.gauges[name] = value
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe_tracks(self, frame_idx, tracker_ids):
+        """Counts new tracks and stalls (an ID missing for some frames before it is matched again)."""
+        if tracker_ids is None: return
+        for tracker_id in tracker_ids:
+            last = self.track_last_seen.get(tracker_id)
+            if last is None:
+                self.count("tracks_started")
+            elif frame_idx - last > 1:
+                self.count("track_stalls")
+                self.observe("track_stall_frames", frame_idx - last - 1)
+            self.track_last_seen[tracker_id] = frame_idx
+
+    @staticmethod
+    def _histogram(family, name, bounds):
+        histogram = family.get(name)
+        if histogram is None:
+            histogram = family[name] = Histogram(bounds)
+        return histogram
+
+    # --- Output ---
+    def summary(self):
+        stages = super().summary()
+        with self.lock:
+            for stage, values in stages.items():
+                latency = self.latencies[stage].summary(scale=1000)
+                values.update({f"{k}_ms": latency[k] for k in ("p50", "p95", "p99", "max")})
+            return {
+                "wall_seconds": time.time() - self.started,
+                "stages": stages,
+                "latency_ms": {name: h.summary(scale=1000) for name, h in self.latencies.items() if name not in stages},
+                "values": {name: h.summary() for name, h in self.values.items()},
+                "counters": dict(self.counters),
+            }
+
+    def report(self):
+        summary = self.summary()
+        print("[INFO] Stage throughput and per-frame latency:")
+        for stage, s in summary["stages"].items():
+            fps = s["frames"] / s["seconds"] if s["seconds"] > 0 else float('inf')
+            print(f"      {stage:<16} {s['frames']:>7} frames  {s['seconds']:8.2f}s  {fps:8.1f} fps"
+                  f"  p50 {s['p50_ms']:7.2f}  p95 {s['p95_ms']:7.2f}  p99 {s['p99_ms']:7.2f} ms")
+        for name, s in summary["latency_ms"].items():
+            print(f"      {name:<16} p50 {s['p50']:7.2f}  p95 {s['p95']:7.2f}  p99 {s['p99']:7.2f} ms")
+        for name, s in summary["values"].items():
+            print(f"      {name:<20} mean {s['mean']:7.2f}  p95 {s['p95']:6.0f}  max {s['max']:6.0f}")
+        for name, n in summary["counters"].items():
+            print(f"      {name:<20} {n}")
+
+    def write_json(self, path):
+        _atomic_write(path, json.dumps(self.summary(), indent=2))
+
+    def prometheus_text(self, prefix="volleyball"):
+        lines = []
+        with self.lock:
+            lines.append(f"# TYPE {prefix}_stage_seconds_total counter")
+            for stage, seconds in self.seconds.items():
+                lines.append(f'{prefix}_stage_seconds_total{{stage="{stage}"}} {seconds:.6f}')
+            lines.append(f"# TYPE {prefix}_stage_frames_total counter")
+            for stage, frames in self.frames.items():
+                lines.append(f'{prefix}_stage_frames_total{{stage="{stage}"}} {frames}')
+
+            lines.append(f"# TYPE {prefix}_latency_seconds histogram")
+            for name, h in self.latencies.items():
+                cumulative = 0
+                for bound, n in zip(h.bounds, h.counts):
+                    cumulative += n
+                    if n: lines.append(f'{prefix}_latency_seconds_bucket{{stage="{name}",le="{bound:.6g}"}} {cumulative}')
+                lines.append(f'{prefix}_latency_seconds_bucket{{stage="{name}",le="+Inf"}} {h.count}')
+                lines.append(f'{prefix}_latency_seconds_sum{{stage="{name}"}} {h.sum:.6f}')
+                lines.append(f'{prefix}_latency_seconds_count{{stage="{name}"}} {h.count}')
+
+            for name, n in self.counters.items():
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                lines.append(f"{prefix}_{name}_total {n}")
+            for name, value in self.gauges.items():
+                h = self.values[name]
+                lines.append(f"# TYPE {prefix}_{name} gauge")
+                lines.append(f"{prefix}_{name} {value}")
+                lines.append(f"{prefix}_{name}_mean {h.sum / h.count if h.count else 0:.4f}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        _atomic_write(path, self.prometheus_text())
+
+    def start_prometheus_export(self, path, interval=10.0):
+        """Rewrites `path` every `interval` seconds until stop() (for long jobs / node exporters)."""
+        def loop():
+            while not self.export_stop.wait(interval):
+                self.write_prometheus(path)
+        self.export_path = path
+        self.export_thread = threading.Thread(target=loop, daemon=True)
+        self.export_thread.start()
+
+    def stop(self):
+        if self.export_thread is not None:
+            self.export_stop.set()
+            self.export_thread.join()
+            self.write_prometheus(self.export_path)
+            self.export_thread = None
+
+def _atomic_write(path, text):
+    # Readers (e.g. a textfile collector) never see a half-written file
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
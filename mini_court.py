@@ -1,3 +1,4 @@
+from collections import deque
 import cv2
 import numpy as np
 import config
@@ -14,6 +15,14 @@ class MiniCourt():
         self.mini_court_img = self.set_court_drawing_key_points()
         self.set_court_lines_and_color()
 
+        # Entity layers
+        self.dot_radius = 5
+        self.dot_sprite = self.make_dot_sprite(self.dot_radius)
+        self.trail_sprite = self.make_dot_sprite(2)
+        self.sprite_min_points = 16     # Below this, plain cv2.circle calls are cheaper
+        self.heatmap_sigma = 6
+        self.reset_layers()
+
     def set_canvas_background_box_position(self, frame):
         frame_h, frame_w = frame.shape[:2]
         self.start_x = frame_w - self.drawing_rectangle_width - self.buffer
@@ -21,6 +30,13 @@ class MiniCourt():
         self.end_x = self.start_x + self.drawing_rectangle_width
         self.end_y = self.start_y + self.drawing_rectangle_height
 
+        # The filled background rectangle includes its end row/column (cv2.rectangle is inclusive)
+        self.roi_y2 = min(self.end_y + 1, frame_h)
+        self.roi_x2 = min(self.end_x + 1, frame_w)
+        self.background_alpha = 0.5
+        self.background_roi = np.full(
+            (self.roi_y2 - self.start_y, self.roi_x2 - self.start_x, 3), 255, dtype=np.uint8)
+
     def set_court_drawing_key_points(self):
         drawing_court_img = np.ones((self.drawing_rectangle_height, self.drawing_rectangle_width, 3), dtype=np.uint8) * 255
         
@@ -57,45 +73,178 @@ class MiniCourt():
         self.mini_court_img = img
 
     def draw_background_rectangle(self, frame):
-        shapes = np.zeros_like(frame, np.uint8)
-        cv2.rectangle(shapes, (self.start_x, self.start_y), (self.end_x, self.end_y), (255, 255, 255), cv2.FILLED)
-        out = frame.copy()
-        alpha = 0.5
-        mask = shapes.astype(bool)
-        out[mask] = cv2.addWeighted(frame, alpha, shapes, 1 - alpha, 0)[mask]
-        return out
+        """Blends the white box into the frame in place, touching only its region of interest."""
+        roi = frame[self.start_y:self.roi_y2, self.start_x:self.roi_x2]
+        alpha = self.background_alpha
+        cv2.addWeighted(roi, alpha, self.background_roi, 1 - alpha, 0, dst=roi)
+        return frame
 
     def draw_court(self, frame):
         frame[self.start_y:self.end_y, self.start_x:self.end_x] = self.mini_court_img
         return frame
 
+    def draw_overlay(self, frame):
+        """
+        draw_background_rectangle + draw_court in one step. The opaque court image covers
+        the whole box except its inclusive last row/column, so only that 1px border is blended.
+        """
+        alpha = self.background_alpha
+        right = frame[self.start_y:self.roi_y2, self.end_x:self.roi_x2]
+        bottom = frame[self.end_y:self.roi_y2, self.start_x:self.end_x]
+        for strip in (right, bottom):
+            if strip.size == 0: continue
+            white = self.background_roi[:strip.shape[0], :strip.shape[1]]
+            cv2.addWeighted(strip, alpha, white, 1 - alpha, 0, dst=strip)
+        return self.draw_court(frame)
+
+    def crop(self, frame):
+        """The mini-court box of an annotated frame (a view, not a copy)."""
+        return frame[self.start_y:self.end_y, self.start_x:self.end_x]
+
     def draw_points_on_mini_court(self, frame, positions, color=(0, 0, 255)):
-        for pos in positions:
-            x_meters, y_meters = pos
-            
-            # 1. Map Meters to Local Pixels (Relative to White Box)
-            # x_meters (Length 0-18) -> Y axis on map
-            # y_meters (Width 0-9)   -> X axis on map
-            
-            x_norm = x_meters / 18.0
-            y_norm = y_meters / 9.0
-
-            # Calculate Local Pixels (inside the white box)
-            mini_y = int(self.court_start_y + (x_norm * self.court_drawing_height))
-            mini_x = int(self.court_start_x + (y_norm * self.court_drawing_width))
-
-            # 2. Filter outliers
-            # We check if the point is inside the local box dimensions (0 to width/height)
-            if mini_x < 0 or mini_x > self.drawing_rectangle_width:
-                continue
-            if mini_y < 0 or mini_y > self.drawing_rectangle_height:
-                continue
-
-            # 3. Convert to Global Pixels (Main Frame)
-            global_x = self.start_x + mini_x
-            global_y = self.start_y + mini_y
-            
-            # 4. Draw
-            cv2.circle(frame, (global_x, global_y), 5, color, -1)
-            
-        return frame
\ No newline at end of file
+        return self.draw_entities(frame, [{"positions": positions, "color": color}])
+
+    def meters_to_mini_court(self, positions):
+        """
+        Maps court positions in meters (N, 2) to global frame pixels in one NumPy step.
+        Returns (pixels (M, 2) int, keep mask (N,)): points outside the white box are dropped.
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+
+        # x_meters (Length 0-18) -> Y axis on map
+        # y_meters (Width 0-9)   -> X axis on map
+        keep = np.isfinite(positions).all(axis=1)
+        x_norm = np.where(keep, positions[:, 0], 0) / 18.0
+        y_norm = np.where(keep, positions[:, 1], 0) / 9.0
+
+        # Local pixels inside the white box (astype truncates toward zero, like int())
+        mini_y = (self.court_start_y + x_norm * self.court_drawing_height).astype(np.int64)
+        mini_x = (self.court_start_x + y_norm * self.court_drawing_width).astype(np.int64)
+
+        # Filter outliers
+        keep &= (mini_x >= 0) & (mini_x <= self.drawing_rectangle_width)
+        keep &= (mini_y >= 0) & (mini_y <= self.drawing_rectangle_height)
+
+        pixels = np.stack([self.start_x + mini_x[keep], self.start_y + mini_y[keep]], axis=1)
+        return pixels, keep
+
+    def draw_entities(self, frame, groups):
+        """
+        Draws every entity group on the mini court with one call.
+        groups: list of dicts with
+            "positions": (N, 2) court positions in meters
+            "color":     BGR tuple
+            "name":      key for the stateful layers below (optional)
+            "trail":     number of previous frames to draw as small fading dots (optional)
+            "heatmap":   True to accumulate and draw an occupancy heatmap (optional)
+        Groups are drawn in order, so later groups end up on top.
+        """
+        all_positions = [np.asarray(g["positions"], dtype=np.float64).reshape(-1, 2) for g in groups]
+        group_idx = np.repeat(np.arange(len(groups)), [len(p) for p in all_positions])
+        if len(group_idx) > 0:
+            pixels, keep = self.meters_to_mini_court(np.concatenate(all_positions))
+            group_idx = group_idx[keep]
+        else:
+            pixels = np.empty((0, 2), dtype=np.int64)
+
+        # 1. Heatmap layers (under everything else)
+        for g_i, group in enumerate(groups):
+            if group.get("heatmap"):
+                self.update_heatmap(group["name"], pixels[group_idx == g_i])
+                self.draw_heatmap(frame, group["name"], group["color"])
+
+        # 2. Trails
+        for g_i, group in enumerate(groups):
+            trail = group.get("trail", 0)
+            if trail > 0:
+                history = self.trails.setdefault(group["name"], deque(maxlen=trail))
+                if history.maxlen != trail:
+                    history = self.trails[group["name"]] = deque(history, maxlen=trail)
+                for age, old_pixels in enumerate(reversed(history)):
+                    fade = 1.0 - (age + 1) / (trail + 1)
+                    # Fade towards the white court background
+                    color = tuple(int(c * fade + 255 * (1 - fade)) for c in group["color"])
+                    self.stamp(frame, old_pixels, color, self.trail_sprite)
+                history.append(pixels[group_idx == g_i])
+
+        # 3. Current positions
+        for g_i, group in enumerate(groups):
+            group_pixels = pixels[group_idx == g_i]
+            if len(group_pixels) >= self.sprite_min_points:
+                self.stamp(frame, group_pixels, group["color"], self.dot_sprite)
+            else:
+                for global_x, global_y in group_pixels:
+                    cv2.circle(frame, (int(global_x), int(global_y)), self.dot_radius, group["color"], -1)
+
+        return frame
+
+    def make_dot_sprite(self, radius):
+        """Mask of a filled cv2.circle, so stamping draws exactly the pixels cv2.circle would."""
+        size = 2 * radius + 1
+        sprite = np.zeros((size, size), dtype=np.uint8)
+        cv2.circle(sprite, (radius, radius), radius, 1, -1)
+        return sprite
+
+    def stamp(self, frame, pixels, color, sprite):
+        """
+        Draws the sprite at every pixel position at once: mark the centres in an impulse image
+        over the mini-court region, dilate it with the sprite and copy `color` through the mask.
+        """
+        if len(pixels) == 0: return frame
+        r = sprite.shape[0] // 2
+
+        # Impulse canvas covers the box plus the sprite radius (it may hang over the frame edge)
+        cx0, cy0 = self.start_x - r, self.start_y - r
+        impulses = np.zeros((self.drawing_rectangle_height + 1 + 2 * r,
+                             self.drawing_rectangle_width + 1 + 2 * r), dtype=np.uint8)
+        impulses[pixels[:, 1] - cy0, pixels[:, 0] - cx0] = 1
+        mask = cv2.dilate(impulses, sprite)
+
+        # Crop to the part of the canvas that lies inside the frame
+        x0, y0 = max(cx0, 0), max(cy0, 0)
+        x1, y1 = min(cx0 + mask.shape[1], frame.shape[1]), min(cy0 + mask.shape[0], frame.shape[0])
+        if x1 <= x0 or y1 <= y0: return frame
+        mask = mask[y0 - cy0:y1 - cy0, x0 - cx0:x1 - cx0]
+
+        solid = self.solid_patches.get(color)
+        if solid is None:
+            solid = self.solid_patches[color] = np.empty((*impulses.shape, 3), dtype=np.uint8)
+            solid[:] = color
+        cv2.copyTo(solid[:mask.shape[0], :mask.shape[1]], mask, frame[y0:y1, x0:x1])
+        return frame
+
+    def update_heatmap(self, name, pixels):
+        grid = self.heatmaps.get(name)
+        if grid is None:
+            grid = self.heatmaps[name] = np.zeros(
+                (self.drawing_rectangle_height + 1, self.drawing_rectangle_width + 1), dtype=np.float32)
+        if len(pixels) == 0: return
+
+        local_x = pixels[:, 0] - self.start_x
+        local_y = pixels[:, 1] - self.start_y
+        flat = local_y * grid.shape[1] + local_x
+        grid += np.bincount(flat, minlength=grid.size).reshape(grid.shape).astype(np.float32)
+
+    def draw_heatmap(self, frame, name, color, max_alpha=0.6):
+        """Tints the court with `color`, proportionally to the (blurred) occupancy of `name`."""
+        grid = self.heatmaps.get(name)
+        if grid is None or not grid.any(): return frame
+        self.draw_heat_grid(frame, grid, color, max_alpha)
+        return frame
+
+    def draw_heat_grid(self, frame, grid, color, max_alpha=0.6):
+        """Blends an occupancy grid (box-sized, local pixels) into the mini court as a colour tint."""
+        heat = cv2.GaussianBlur(grid, (0, 0), self.heatmap_sigma)
+        peak = heat.max()
+        if peak <= 0: return frame
+
+        roi = frame[self.start_y:self.start_y + grid.shape[0], self.start_x:self.start_x + grid.shape[1]]
+        heat = heat[:roi.shape[0], :roi.shape[1]]
+        alpha = (heat / peak * max_alpha)[:, :, None]
+        roi[:] = (roi * (1 - alpha) + np.array(color, dtype=np.float32) * alpha).astype(np.uint8)
+        return frame
+
+    def reset_layers(self):
+        self.solid_patches = {}
+        self.trails = {}
+        self.heatmaps = {}
@@ -0,0 +1,213 @@
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import cv2
+import config
+from renderer import FrameRenderer
+from video_io import create_reader, create_writer
+
+def resolve_player_teams(video_path, all_player_detections, team_assigner, start=0):
+    """
+    Replays the serial team logic once in the parent process: calibrate on the first
+    CALIBRATION_FRAMES (from frame `start`, the first one processed), then classify every
+    tracker ID on the first frame it gets a colour.
+    Only frames where an unresolved ID appears are read in full; the others go through grab(),
+    which with FFmpeg still decodes them but skips the conversion to BGR.
+    Afterwards every render worker gets the same, complete `player_team_dict`.
+    `all_player_detections` is a DetectionStore.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if start > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    calibration_end = start + config.CALIBRATION_FRAMES
+
+    # 1. Calibration samples
+    for i in range(start, min(calibration_end, len(all_player_detections))):
+        ret, frame = cap.read()
+        if not ret: break
+        players = all_player_detections[i]
+        if len(players) > 0:
+            team_assigner.collect_samples(frame, players)
+
+    later = all_player_detections[calibration_end:]
+    if later.num_rows == 0 or not team_assigner.fit_model():
+        cap.release()
+        return team_assigner
+
+    # 2. Last frame where each tracker ID is visible (to know when we can stop decoding)
+    tracked = later.tracker_id >= 0
+    frames = later.frame_index()[tracked] + calibration_end
+    last_seen = dict(zip(later.tracker_id[tracked].tolist(), frames.tolist()))
+
+    unresolved = set(last_seen)
+    for i in range(calibration_end, len(all_player_detections)):
+        unresolved = {p_id for p_id in unresolved if last_seen[p_id] >= i}
+        if not unresolved: break
+
+        players = all_player_detections[i]
+        ids = players.tracker_id if players.tracker_id is not None else []
+        if not any(p_id in unresolved for p_id in ids):
+            if not cap.grab(): break
+            continue
+
+        ret, frame = cap.read()
+        if not ret: break
+        team_assigner.get_player_teams(frame, players)
+        unresolved.difference_update(team_assigner.player_team_dict)
+
+    cap.release()
+    print(f"[INFO] Resolved teams for {len(team_assigner.player_team_dict)} tracks.")
+    return team_assigner
+
+def _init_worker(config_values):
+    # Spawned workers import config fresh: re-apply the parent's (possibly overridden) settings
+    for name, value in config_values.items():
+        setattr(config, name, value)
+
+def render_chunk(job):
+    """Worker: renders frames [start, end) into its own segment file."""
+    start, end = job["start"], job["end"]
+    width, height = job["size"]
+
+    renderer = FrameRenderer(np.zeros((height, width, 3), dtype=np.uint8), job["view_transformer"],
+                             calibration_start=job["calibration_start"])
+    renderer.warm_up_ball_trace(job["previous_ball_boxes"])
+    team_assigner = job["team_assigner"]
+
+    rendered = 0
+    with create_reader(job["video_path"], start=start, end=end) as reader, \
+         create_writer(job["segment_path"], job["fps"], (width, height)) as writer:
+        for k, frame in enumerate(reader):
+            annotated_frame = renderer.render(
+                frame, start + k, job["players"][k], job["referees"][k], job["ball_boxes"][k], team_assigner)
+            writer.write(annotated_frame)
+            rendered += 1
+
+    return job["segment_path"], rendered
+
+def join_segments(segment_paths, target, fps, size):
+    """
+    Concatenates the segments without re-encoding: ffmpeg's concat demuxer if the binary
+    is available, otherwise a PyAV packet remux. Re-encodes only as a last resort.
+    """
+    if shutil.which("ffmpeg"):
+        list_path = os.path.join(os.path.dirname(segment_paths[0]), "segments.txt")
+        with open(list_path, 'w') as f:
+            for path in segment_paths:
+                f.write(f"file '{os.path.abspath(path)}'\n")
+        cmd = ["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+               "-i", list_path, "-c", "copy", target]
+        if subprocess.run(cmd).returncode == 0:
+            return
+        print("[WARNING] ffmpeg concat failed, trying PyAV.")
+
+    try:
+        import av
+    except ImportError:
+        av = None
+
+    if av is not None:
+        _remux_with_pyav(av, segment_paths, target)
+        return
+
+    print("[WARNING] Neither ffmpeg nor PyAV found: re-encoding segments (not lossless).")
+    writer = cv2.VideoWriter(target, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    for path in segment_paths:
+        cap = cv2.VideoCapture(path)
+        while True:
+            ret, frame = cap.read()
+            if not ret: break
+            writer.write(frame)
+        cap.release()
+    writer.release()
+
+def _remux_with_pyav(av, segment_paths, target):
+    output = av.open(target, 'w')
+    out_stream = None
+    offset = 0
+    for path in segment_paths:
+        segment = av.open(path)
+        in_stream = segment.streams.video[0]
+        if out_stream is None:
+            out_stream = output.add_stream_from_template(in_stream)
+
+        end = offset
+        for packet in segment.demux(in_stream):
+            if packet.dts is None: continue   # demuxer flush packet
+            packet.pts += offset
+            packet.dts += offset
+            end = max(end, packet.pts + packet.duration)
+            packet.stream = out_stream
+            output.mux(packet)
+        offset = end
+        segment.close()
+    output.close()
+
+def render_parallel(video_path, target, all_player_detections, all_ref_detections,
+                    interpolated_ball_bboxes, view_transformer, team_assigner,
+                    fps, size, workers, chunk_frames, ranges=None):
+    """
+    PASS 3 across a process pool: each chunk seeks to its own start frame and renders
+    to a segment, then the segments are joined into `target` in order.
+    With `ranges` ((start, end) frame ranges) only those frames are rendered, chunks never span two of them.
+    """
+    n_frames = len(interpolated_ball_bboxes)
+    ranges = ranges or [(0, n_frames)]
+    calibration_start = ranges[0][0]
+    team_assigner = resolve_player_teams(video_path, all_player_detections, team_assigner, start=calibration_start)
+
+    segment_dir = tempfile.mkdtemp(prefix="render_", dir=os.path.dirname(os.path.abspath(target)))
+    # Segments are temporary: removed whether the render and the join succeed or not
+    try:
+        trace_length = config.BALL_TRACE_LENGTH
+
+        chunks = [(start, min(start + chunk_frames, range_end, n_frames), range_start)
+                  for range_start, range_end in ranges
+                  for start in range(range_start, min(range_end, n_frames), chunk_frames)]
+        jobs = []
+        for start, end, range_start in chunks:
+            jobs.append({
+                "video_path": video_path,
+                "segment_path": os.path.join(segment_dir, f"segment_{len(jobs):05d}.mp4"),
+                "start": start,
+                "end": end,
+                "fps": fps,
+                "size": size,
+                "players": all_player_detections[start:end],
+                "referees": all_ref_detections[start:end],
+                "ball_boxes": interpolated_ball_bboxes[start:end],
+                # Enough history to cover `trace_length` frames that actually show the ball (in this range)
+                "previous_ball_boxes": _previous_ball_boxes(
+                    interpolated_ball_bboxes[range_start:], start - range_start, trace_length),
+                "calibration_start": calibration_start,
+                "team_assigner": team_assigner,
+                "view_transformer": view_transformer,
+            })
+
+        print(f"[INFO] PASS 3: Rendering {len(jobs)} chunks on {workers} worker processes...")
+        config_values = {name: value for name, value in vars(config).items() if name.isupper()}
+        if config.MINI_COURT_TRAIL_FRAMES or config.MINI_COURT_HEATMAP:
+            # Both layers depend on every earlier frame, which a chunk does not see
+            print("[WARNING] Mini-court trails/heatmaps are not supported in parallel rendering: disabled.")
+            config_values["MINI_COURT_TRAIL_FRAMES"] = 0
+            config_values["MINI_COURT_HEATMAP"] = False
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config_values,)) as pool:
+            segments = []
+            for segment_path, rendered in pool.map(render_chunk, jobs):
+                segments.append(segment_path)
+                print(f"      Rendered segment {len(segments)}/{len(jobs)} ({rendered} frames)")
+
+        join_segments(segments, target, fps, size)
+    finally:
+        shutil.rmtree(segment_dir, ignore_errors=True)
+
+def _previous_ball_boxes(ball_boxes, start, trace_length):
+    previous = []
+    for box in reversed(ball_boxes[:start]):
+        if box is not None and not np.isnan(box[0]):
+            previous.append(box)
+            if len(previous) == trace_length: break
+    return previous[::-1]
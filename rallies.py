@@ -0,0 +1,175 @@
+import json
+import os
+import numpy as np
+import cv2
+from box_propagation import small_gray
+from detection_cache import file_fingerprint
+
+# The index is saved next to the video as <video stem>.rallies.json
+INDEX_SUFFIX = ".rallies.json"
+
+def index_path(video_path):
+    return os.path.splitext(video_path)[0] + INDEX_SUFFIX
+
+def motion_energy(video_path, scale=0.125, step=2, progress_every=5000):
+    """
+    Frame-difference energy: mean absolute grey-level change per pixel between frames
+    `step` apart, on frames downscaled by `scale`. Frames in between are only grabbed (no
+    colour conversion or resize) and get the energy of the next sampled frame.
+    Returns a (frames,) float32 array and the video's fps.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    energy = []
+    sampled = []
+    previous = None
+    i = 0
+    while True:
+        if i % step:
+            if not cap.grab(): break
+        else:
+            ret, frame = cap.read()
+            if not ret: break
+            gray = small_gray(frame, scale)
+            if previous is not None:
+                energy.append(float(cv2.absdiff(gray, previous).mean()))
+                sampled.append(i)
+            previous = gray
+        i += 1
+        if progress_every and i % progress_every == 0:
+            print(f"      Scanned {i} frames...")
+    cap.release()
+
+    if not sampled:
+        return np.zeros(i, dtype=np.float32), fps
+    return np.interp(np.arange(i), sampled, energy).astype(np.float32), fps
+
+def ball_motion(ball_boxes, fps, width, min_speed=0.2):
+    """
+    Frames where the interpolated ball is tracked and moving at least `min_speed` frame
+    widths per second. Dead-ball gaps (NaN rows) count as not moving.
+    """
+    boxes = np.asarray(ball_boxes, dtype=np.float32).reshape(-1, 4)
+    centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+    speed = np.zeros(len(boxes), dtype=np.float32)
+    if len(boxes) > 1:
+        speed[1:] = np.linalg.norm(np.diff(centers, axis=0), axis=1) * fps / width
+    return np.nan_to_num(speed, nan=0.0) >= min_speed
+
+def otsu_threshold(values):
+    """Otsu's threshold of a 1-D signal (the level that best splits it into two classes)."""
+    low, high = float(np.min(values)), float(np.max(values))
+    if high - low < 1e-6:
+        return high
+    scaled = np.round((values - low) / (high - low) * 255).astype(np.uint8).reshape(-1, 1)
+    level, _ = cv2.threshold(scaled, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return low + level / 255 * (high - low)
+
+def moving_average(values, window):
+    window = max(1, int(window))
+    if window == 1:
+        return np.asarray(values, dtype=np.float32)
+    kernel = np.ones(window, dtype=np.float32) / window
+    return np.convolve(np.asarray(values, dtype=np.float32), kernel, mode="same")
+
+def find_rallies(energy, fps, ball_moving=None, motion_threshold=None, smoothing=1.0,
+                 min_duration=3.0, min_gap=2.0, padding=1.0):
+    """
+    Rallies as (start, end) frame ranges, end exclusive.
+
+    A frame is in play when, averaged over `smoothing` seconds, the in-play votes reach 0.5:
+    one vote for scene motion (smoothed `energy` above `motion_threshold`, Otsu's threshold
+    when None) and, when the ball track is known, one for `ball_moving`. Stretches shorter
+    than `min_gap` seconds between rallies are bridged, rallies shorter than `min_duration`
+    seconds dropped, and the rest padded by `padding` seconds on both sides.
+    Returns (ranges, the motion threshold used).
+    """
+    window = round(smoothing * fps)
+    smoothed = moving_average(energy, window)
+    if motion_threshold is None:
+        motion_threshold = otsu_threshold(smoothed) if len(smoothed) else 0.0
+    votes = [smoothed > motion_threshold]
+    if ball_moving is not None:
+        # The cached ball track may be a few frames shorter or longer than the decoded video
+        moving = np.zeros(len(energy), dtype=bool)
+        n = min(len(energy), len(ball_moving))
+        moving[:n] = ball_moving[:n]
+        votes.append(moving)
+    in_play = moving_average(np.mean(votes, axis=0), window) >= 0.5
+
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], in_play.astype(np.int8), [0]])))
+    runs = list(zip(edges[0::2].tolist(), edges[1::2].tolist()))
+
+    bridged = []
+    for start, end in runs:
+        if bridged and start - bridged[-1][1] < min_gap * fps:
+            bridged[-1] = (bridged[-1][0], end)
+        else:
+            bridged.append((start, end))
+    pad = round(padding * fps)
+    rallies = [(max(0, start - pad), min(len(energy), end + pad))
+               for start, end in bridged if end - start >= min_duration * fps]
+    return merge_ranges(rallies), float(motion_threshold)
+
+def merge_ranges(ranges, frame_count=None):
+    """Sorted, non-overlapping (start, end) ranges, clipped to `frame_count` if given. Empty ones are dropped."""
+    merged = []
+    for start, end in sorted((int(s), int(e)) for s, e in ranges):
+        if frame_count is not None:
+            start, end = max(0, start), min(end, frame_count)
+        if end <= start: continue
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def parse_ranges(text):
+    """"100-500,900-1200" -> [(100, 500), (900, 1200)] (end exclusive)."""
+    ranges = []
+    for part in text.split(","):
+        start, _, end = part.strip().partition("-")
+        if not end:
+            raise ValueError(f"Frame range '{part}' is not START-END")
+        ranges.append((int(start), int(end)))
+    return ranges
+
+# --- Index file ---
+def build_index(video_path, energy, fps, rallies, motion_threshold, signals):
+    return {
+        "video": os.path.basename(video_path),
+        "fingerprint": file_fingerprint(video_path),
+        "frames": len(energy),
+        "fps": fps,
+        "signals": signals,
+        "motion_threshold": round(motion_threshold, 3),
+        "rallies": [{"id": k + 1, "start": start, "end": end,
+                     "start_seconds": round(start / fps, 2), "end_seconds": round(end / fps, 2)}
+                    for k, (start, end) in enumerate(rallies)],
+    }
+
+def save_index(index, path):
+    with open(path, 'w') as f:
+        json.dump(index, f, indent=2)
+
+def load_index(video_path):
+    """The saved rally index of a video, or None when there is none or the video has changed since."""
+    path = index_path(video_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        index = json.load(f)
+    if index.get("fingerprint") != file_fingerprint(video_path):
+        print(f"[WARNING] {path} was built for a different version of the video: ignoring it.")
+        return None
+    return index
+
+def rally_ranges(index, rally_ids):
+    """Frame ranges of the rallies `rally_ids` (1-based, as in the index)."""
+    by_id = {rally["id"]: (rally["start"], rally["end"]) for rally in index["rallies"]}
+    missing = [rally_id for rally_id in rally_ids if rally_id not in by_id]
+    if missing:
+        raise ValueError(f"Rallies {missing} are not in the index (it has {len(by_id)})")
+    return [by_id[rally_id] for rally_id in rally_ids]
@@ -0,0 +1,200 @@
+import numpy as np
+import cv2
+import supervision as sv
+import config
+import utils
+from mini_court import MiniCourt
+from sprites import LabelSprites, LabelStyle, EllipseSprites
+
+#  COLOR EXTRACTION ---
+def get_color_tuple(color_obj):
+    if hasattr(color_obj, 'by_idx'):
+        return color_obj.by_idx(0).as_bgr()
+    elif hasattr(color_obj, 'as_bgr'):
+        return color_obj.as_bgr()
+    return color_obj
+
+class FrameRenderer:
+    """
+    Draws one output frame (team assignment, mini-court and annotations).
+    Shared by the three-pass and streaming pipelines so both produce the same video.
+    Time per drawing stage goes to `timer` (a utils.StageTimer) when given.
+    With `analytics` (a CourtAnalytics), every frame's players are added to it after calibration.
+    Team colours are calibrated on the CALIBRATION_FRAMES frames from `calibration_start` on.
+    """
+    def __init__(self, first_frame, view_transformer, timer=None, analytics=None, calibration_start=0):
+        self.view_transformer = view_transformer
+        self.calibration_start = calibration_start
+        self.calibration_end = calibration_start + config.CALIBRATION_FRAMES
+        self.timer = timer if timer is not None else utils.StageTimer()
+        self.analytics = analytics
+        self.mini_court = MiniCourt(first_frame)
+
+        # Mini-court dot colors (BGR)
+        self.color_team_1 = get_color_tuple(config.COLOR_TEAM_1)
+        self.color_team_2 = get_color_tuple(config.COLOR_TEAM_2)
+        self.color_ref = get_color_tuple(config.COLOR_REF)
+        self.color_ball = get_color_tuple(config.COLOR_BALL)
+
+        # --- ANNOTATORS ---
+        self.ref_annotator = sv.BoxAnnotator(color=config.COLOR_REF, thickness=4)
+
+        # Ellipses and labels are cached sprites (same look as sv.EllipseAnnotator / sv.LabelAnnotator)
+        self.ellipses = EllipseSprites(thickness=2)
+        self.label_sprites = LabelSprites(capacity=config.LABEL_CACHE_SIZE)
+        black, white = sv.Color.BLACK.as_bgr(), sv.Color.WHITE.as_bgr()
+        # Player IDs
+        self.label_style_1 = LabelStyle(self.color_team_1, black, position="bottom")
+        self.label_style_2 = LabelStyle(self.color_team_2, white, position="bottom")
+        self.label_style_ref = LabelStyle(self.color_ref, white, position="top")
+        # Real-world coordinates
+        self.coord_style = LabelStyle(white, black, position="top", text_scale=0.5, padding=5)
+
+        self.trace_annotator = sv.TraceAnnotator(color=config.COLOR_BALL, trace_length=config.BALL_TRACE_LENGTH)
+        self.dot_annotator = sv.DotAnnotator(color=config.COLOR_BALL, radius=4)
+
+    def warm_up_ball_trace(self, previous_ball_boxes):
+        """
+        Replays earlier ball positions into the trace annotator, so rendering that
+        starts mid-video draws the same ball trail as a render from frame 0.
+        """
+        boxes = [box for box in previous_ball_boxes if box is not None and not np.isnan(box[0])]
+        trace_length = self.trace_annotator.trace.max_size
+        for box in boxes[-trace_length:]:
+            balls = sv.Detections(
+                xyxy=np.array([box], dtype=np.float32),
+                class_id=np.array([config.ID_BALL]),
+                tracker_id=np.array([1]))
+            self.trace_annotator.trace.put(balls)
+
+    def start_segment(self):
+        """The next frame does not follow the last one (a new frame range): the ball trace and trails restart."""
+        self.trace_annotator = sv.TraceAnnotator(color=config.COLOR_BALL, trace_length=config.BALL_TRACE_LENGTH)
+        self.mini_court.trails = {}
+
+    def render(self, frame, frame_idx, players, referees, ball_box, team_assigner):
+        i = frame_idx
+        timer = self.timer
+
+        # 1. Setup Ball
+        if ball_box is None or np.isnan(ball_box[0]):
+            balls = sv.Detections.empty()
+        else:
+            xyxy = np.array([ball_box], dtype=np.float32)
+            class_id = np.array([config.ID_BALL])
+            confidence = np.array([1.0])
+            tracker_id = np.array([1])
+            balls = sv.Detections(xyxy=xyxy, class_id=class_id, confidence=confidence, tracker_id=tracker_id)
+
+        # 2. Team Assignment
+        players_1 = sv.Detections.empty()
+        players_2 = sv.Detections.empty()
+        players_neutral = sv.Detections.empty()
+
+        with timer.stage("team_assigner"):
+            if len(players) > 0:
+                if i < self.calibration_end:
+                    team_assigner.collect_samples(frame, players)
+                    players_neutral = players
+                    cv2.putText(frame, f"Calibrating... {i - self.calibration_start}/{config.CALIBRATION_FRAMES}", (50,50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0,0,255), 2)
+                else:
+                    if not team_assigner.trained:
+                        team_assigner.fit_model()
+
+                    team_ids = team_assigner.get_player_teams(frame, players)
+                    players_1 = players[team_ids == 1]
+                    players_2 = players[team_ids == 2]
+
+        # 3. VIEW TRANSFORMATION
+        with timer.stage("view_transformer"):
+            # Calculate real-world positions (Meters)
+            points_feet_1 = players_1.get_anchors_coordinates(sv.Position.BOTTOM_CENTER)
+            points_feet_2 = players_2.get_anchors_coordinates(sv.Position.BOTTOM_CENTER)
+            points_ref = referees.get_anchors_coordinates(sv.Position.BOTTOM_CENTER) # Referees
+
+            # Transform Points
+            transformed_p1 = self.view_transformer.transform_points(points_feet_1, i)
+            transformed_p2 = self.view_transformer.transform_points(points_feet_2, i)
+            transformed_ref = self.view_transformer.transform_points(points_ref, i) # Transform Referees
+
+            # Ball position
+            points_ball = None
+            if len(balls) > 0:
+                b_box = balls.xyxy[0]
+                b_center = np.array([[(b_box[0]+b_box[2])/2, (b_box[1]+b_box[3])/2]])
+                points_ball = self.view_transformer.transform_points(b_center, i)
+
+            # Coordinate labels (team 1 then team 2), quantized to the 0.1 m they show
+            all_points = np.concatenate([np.reshape(transformed_p1, (-1, 2)), np.reshape(transformed_p2, (-1, 2))])
+            coord_keys = [tuple(key) for key in np.round(all_points * 10).astype(int).tolist()]
+
+        # Court analytics (teams are only known after calibration)
+        analytics = self.analytics
+        if analytics is not None and i >= self.calibration_end:
+            with timer.stage("analytics"):
+                tracked = [(p, t, team) for p, t, team in ((players_1, transformed_p1, 1), (players_2, transformed_p2, 2))
+                           if len(p) > 0 and p.tracker_id is not None]
+                if tracked:
+                    analytics.update(
+                        i,
+                        np.concatenate([p.tracker_id for p, _, _ in tracked]),
+                        np.concatenate([np.full(len(p), team) for p, _, team in tracked]),
+                        np.concatenate([t for _, t, _ in tracked]),
+                        np.concatenate([p.xyxy for p, _, _ in tracked]))
+
+        # --- DRAWING ---
+        annotated_frame = frame.copy()
+
+        # A. Mini Court
+        with timer.stage("mini_court"):
+            mini_court = self.mini_court
+            annotated_frame = mini_court.draw_overlay(annotated_frame)
+
+            if i >= self.calibration_end:
+                # Team 1, Team 2, Referee and Ball dots in one vectorized call
+                trail = config.MINI_COURT_TRAIL_FRAMES
+                heatmap = config.MINI_COURT_HEATMAP
+                if heatmap and analytics is not None:
+                    # Occupancy from the analytics grids (metres, jumps excluded) instead of the pixel layer
+                    heatmap = False
+                    for team, color in ((1, self.color_team_1), (2, self.color_team_2)):
+                        mini_court.draw_heat_grid(annotated_frame, analytics.box_grid(mini_court, team=team), color)
+                mini_court.draw_entities(annotated_frame, [
+                    {"name": "team_1", "positions": transformed_p1, "color": self.color_team_1, "trail": trail, "heatmap": heatmap},
+                    {"name": "team_2", "positions": transformed_p2, "color": self.color_team_2, "trail": trail, "heatmap": heatmap},
+                    {"name": "referees", "positions": transformed_ref, "color": self.color_ref, "trail": trail},
+                    {"name": "ball", "positions": points_ball if points_ball is not None else [], "color": self.color_ball, "trail": trail},
+                ])
+
+        # B. Standard Annotations
+        with timer.stage("annotators"):
+            sprites = self.label_sprites
+            # Referees
+            annotated_frame = self.ref_annotator.annotate(scene=annotated_frame, detections=referees)
+            if referees.tracker_id is not None:
+                sprites.draw(annotated_frame, self.label_style_ref, referees.get_anchors_coordinates(sv.Position.TOP_CENTER).astype(int),
+                             referees.tracker_id, lambda t: f"Ref {t}")
+
+            # Teams 1 and 2
+            for team_players, color, style in ((players_1, self.color_team_1, self.label_style_1),
+                                               (players_2, self.color_team_2, self.label_style_2)):
+                self.ellipses.draw(annotated_frame, team_players.xyxy, color)
+                if team_players.tracker_id is not None:
+                    sprites.draw(annotated_frame, style, team_players.get_anchors_coordinates(sv.Position.BOTTOM_CENTER).astype(int),
+                                 team_players.tracker_id, lambda t: f"#{t}")
+
+            # C. Coordinates Overlay
+            if len(players) > 0 and i >= self.calibration_end:
+                anchors = np.concatenate([players_1.get_anchors_coordinates(sv.Position.TOP_CENTER),
+                                          players_2.get_anchors_coordinates(sv.Position.TOP_CENTER)]).astype(int)
+                sprites.draw(annotated_frame, self.coord_style, anchors, coord_keys,
+                             lambda key: f"({key[0] / 10:.1f}m, {key[1] / 10:.1f}m)")
+
+            # D. Ball Tracing
+            if len(balls) > 0:
+                annotated_frame = self.trace_annotator.annotate(scene=annotated_frame, detections=balls)
+                annotated_frame = self.dot_annotator.annotate(scene=annotated_frame, detections=balls)
+                for box in balls.xyxy:
+                    annotated_frame = utils.draw_triangle(annotated_frame, box)
+
+        return annotated_frame
@@ -0,0 +1,163 @@
+import collections
+import numpy as np
+import cv2
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+class LabelStyle:
+    """Look of a label, as the sv.LabelAnnotator arguments: box color, text color (BGR), anchor and text size."""
+    def __init__(self, background, text_color, position="top", text_scale=0.5, thickness=1, padding=10):
+        self.background = tuple(int(c) for c in background)
+        self.text_color = tuple(int(c) for c in text_color)
+        self.position = position    # "top": box above the anchor, "bottom": below it
+        self.text_scale = text_scale
+        self.thickness = thickness
+        self.padding = padding
+
+class Sprite:
+    """A rasterized label: BGR pixels, alpha (None = opaque) and the offset of its top-left corner from the anchor."""
+    __slots__ = ("image", "alpha", "dx", "dy")
+
+    def __init__(self, image, alpha, dx, dy):
+        self.image, self.alpha, self.dx, self.dy = image, alpha, dx, dy
+
+class LabelSprites:
+    """
+    Text labels rasterized once and blitted onto frames, instead of measuring and drawing the
+    text with cv2.putText for every label of every frame (what sv.LabelAnnotator does).
+
+    Sprites are kept in one LRU cache of `capacity` entries, keyed by (style, key): e.g. the
+    tracker ID for "#7" labels, or the quantized court position for coordinate labels.
+    A sprite has the same pixels as sv.LabelAnnotator's box and text at that anchor. Anti-aliased
+    glyph pixels that stick out of the box are kept in an alpha margin and blended; a sprite
+    without any is copied as is.
+    """
+    def __init__(self, capacity=512):
+        self.capacity = capacity
+        self.sprites = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, style, key, text):
+        """The sprite of `key` in `style`; `text` (a string, or a function of the key) is only used on a miss."""
+        cache_key = (style, key)
+        sprite = self.sprites.get(cache_key)
+        if sprite is not None:
+            self.sprites.move_to_end(cache_key)
+            self.hits += 1
+            return sprite
+
+        self.misses += 1
+        sprite = rasterize(text(key) if callable(text) else text, style)
+        self.sprites[cache_key] = sprite
+        if len(self.sprites) > self.capacity:
+            self.sprites.popitem(last=False)
+        return sprite
+
+    def draw(self, frame, style, anchors, keys, text):
+        """Blits the label of every key at its anchor ((N, 2) int pixels), in order, like sv.LabelAnnotator."""
+        for (x, y), key in zip(anchors, keys):
+            blit(frame, self.get(style, key, text), int(x), int(y))
+        return frame
+
+class EllipseSprites:
+    """
+    The arc sv.EllipseAnnotator draws under a player's feet, as pixel offsets cached per box
+    width (LRU, `capacity` widths). All ellipses of one color are set with a single indexed
+    assignment instead of one cv2.ellipse call each, with the same pixels.
+    """
+    def __init__(self, thickness=2, start_angle=-45, end_angle=235, capacity=256):
+        self.thickness = thickness
+        self.start_angle = start_angle
+        self.end_angle = end_angle
+        self.capacity = capacity
+        self.offsets = collections.OrderedDict()
+
+    def get(self, width):
+        """(rows, cols) of the ellipse pixels relative to its center, and their (top, bottom, left, right) extent."""
+        offsets = self.offsets.get(width)
+        if offsets is not None:
+            self.offsets.move_to_end(width)
+            return offsets
+
+        axes = (int(width), int(0.35 * width))
+        margin = self.thickness + 2
+        canvas = np.zeros((2 * axes[1] + 2 * margin + 1, 2 * axes[0] + 2 * margin + 1), dtype=np.uint8)
+        center = (axes[0] + margin, axes[1] + margin)
+        cv2.ellipse(canvas, center, axes, 0.0, self.start_angle, self.end_angle, 255, self.thickness, cv2.LINE_4)
+        rows, cols = np.nonzero(canvas)
+        rows, cols = rows - center[1], cols - center[0]
+        extent = (rows.min(), rows.max(), cols.min(), cols.max()) if len(rows) else (0, 0, 0, 0)
+        offsets = self.offsets[width] = (rows, cols, extent)
+        if len(self.offsets) > self.capacity:
+            self.offsets.popitem(last=False)
+        return offsets
+
+    def draw(self, frame, xyxy, color):
+        """Draws the ellipse of every box (xyxy) in `color` (BGR)."""
+        if len(xyxy) == 0: return frame
+        height, width = frame.shape[:2]
+        rows, cols = [], []
+        for x1, _, x2, y2 in np.asarray(xyxy).astype(int):
+            center = (int((x1 + x2) / 2), int(y2))
+            dy, dx, (top, bottom, left, right) = self.get(int(x2 - x1))
+            if len(dy) == 0: continue
+            if (center[1] + top < 0 or center[1] + bottom >= height
+                    or center[0] + left < 0 or center[0] + right >= width):
+                # cv2 rasterizes shapes cut by the frame border a little differently: let it draw those
+                w = int(x2 - x1)
+                cv2.ellipse(frame, center, (w, int(0.35 * w)), 0.0, self.start_angle, self.end_angle,
+                            color, self.thickness, cv2.LINE_4)
+                continue
+            rows.append(dy + center[1])
+            cols.append(dx + center[0])
+        if rows:
+            frame[np.concatenate(rows), np.concatenate(cols)] = color
+        return frame
+
+def rasterize(text, style):
+    """Draws the label as sv.LabelAnnotator would with its anchor at (0, 0)."""
+    pad = style.padding
+    (text_w, text_h), baseline = cv2.getTextSize(text, FONT, style.text_scale, style.thickness)
+    width, height = text_w + 2 * pad, text_h + 2 * pad
+    # Box corners relative to the anchor (cv2.rectangle fills both corners inclusive)
+    x1 = -(width // 2)
+    x2 = width // 2
+    y1 = -height if style.position == "top" else 0
+    y2 = y1 + height
+
+    # Room for glyph parts outside the box (descenders, anti-aliasing)
+    margin = baseline + style.thickness + 2
+    size = (y2 - y1 + 1 + 2 * margin, x2 - x1 + 1 + 2 * margin)
+    box = (margin, margin), (margin + x2 - x1, margin + y2 - y1)
+    org = (margin + pad, margin + pad + text_h)
+
+    image = np.empty((*size, 3), dtype=np.uint8)
+    image[:] = style.text_color
+    cv2.rectangle(image, *box, style.background, -1)
+    cv2.putText(image, text, org, FONT, style.text_scale, style.text_color, style.thickness, cv2.LINE_AA)
+    alpha = np.zeros(size, dtype=np.uint8)
+    cv2.putText(alpha, text, org, FONT, style.text_scale, 255, style.thickness, cv2.LINE_AA)
+    cv2.rectangle(alpha, *box, 255, -1)
+
+    rows, cols = np.nonzero(alpha)
+    top, bottom, left, right = rows.min(), rows.max() + 1, cols.min(), cols.max() + 1
+    image, alpha = image[top:bottom, left:right], alpha[top:bottom, left:right]
+    opaque = bool((alpha == 255).all())
+    return Sprite(np.ascontiguousarray(image), None if opaque else alpha[..., None].astype(np.uint16),
+                  x1 - margin + left, y1 - margin + top)
+
+def blit(frame, sprite, x, y):
+    """Draws `sprite` with its anchor at (x, y), clipped to the frame."""
+    h, w = sprite.image.shape[:2]
+    x0, y0 = x + sprite.dx, y + sprite.dy
+    fx0, fy0 = max(x0, 0), max(y0, 0)
+    fx1, fy1 = min(x0 + w, frame.shape[1]), min(y0 + h, frame.shape[0])
+    if fx0 >= fx1 or fy0 >= fy1: return
+    part = (slice(fy0 - y0, fy1 - y0), slice(fx0 - x0, fx1 - x0))
+    region = frame[fy0:fy1, fx0:fx1]
+    if sprite.alpha is None:
+        region[:] = sprite.image[part]
+    else:
+        alpha = sprite.alpha[part]
+        region[:] = (sprite.image[part] * alpha + region * (255 - alpha) + 127) // 255
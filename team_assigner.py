@@ -1,9 +1,17 @@
-from sklearn.cluster import KMeans
+import threading
 import numpy as np
 import cv2
+import supervision as sv
+
+# sklearn (which imports pandas and scipy) is imported where a model is fitted,
+# so importing this module stays cheap
 
 class TeamAssigner:
-    def __init__(self):
+    def __init__(self, sample_step=1):
+        # Colour patches are stride-sampled: every `sample_step`-th pixel of the full frame, about as
+        # many samples as at config.ANALYSIS_WIDTH. These are single source pixels, not the averaged
+        # pixels of the resized frame YOLO sees, so the colours differ slightly from that frame
+        self.sample_step = sample_step
         self.team_colors = {}
         self.player_team_dict = {}
         self.kmeans = None
@@ -26,7 +34,8 @@ class TeamAssigner:
         patch_y1 = max(0, center_y - patch_h // 2)
         patch_y2 = min(frame.shape[0], center_y + patch_h // 2)
         
-        image = frame[patch_y1:patch_y2, patch_x1:patch_x2]
+        step = self.sample_step
+        image = frame[patch_y1:patch_y2:step, patch_x1:patch_x2:step]
         
         if image.size == 0: return None
 
@@ -36,6 +45,54 @@ class TeamAssigner:
         
         return np.array([mean_hsv[0], mean_hsv[1]])
 
+    def get_player_colors(self, frame, xyxy):
+        """
+        Batch version of get_player_color: mean (Hue, Saturation) of the torso patch of every box.
+        Gathers the pixels of all patches into one strip, converts it to HSV with a single
+        cvtColor call and reduces each patch with np.add.reduceat (no per-box Python work).
+        Rows are NaN where the patch is empty (get_player_color returns None there).
+        """
+        colors = np.full((len(xyxy), 2), np.nan)
+        if len(xyxy) == 0: return colors
+
+        # Same patch geometry as get_player_color (int() truncates toward zero, like astype)
+        x1, y1, x2, y2 = np.asarray(xyxy).astype(np.int64).T
+        w = x2 - x1
+        h = y2 - y1
+
+        center_x = (x1 + w / 2).astype(np.int64)
+        center_y = (y1 + h * 0.2).astype(np.int64)
+        patch_w = (w * 0.2).astype(np.int64)
+        patch_h = (h * 0.2).astype(np.int64)
+
+        patch_x1 = np.maximum(0, center_x - patch_w // 2)
+        patch_x2 = np.minimum(frame.shape[1], center_x + patch_w // 2)
+        patch_y1 = np.maximum(0, center_y - patch_h // 2)
+        patch_y2 = np.minimum(frame.shape[0], center_y + patch_h // 2)
+
+        valid = (patch_x2 > patch_x1) & (patch_y2 > patch_y1)
+        if not valid.any(): return colors
+        px1, py1 = patch_x1[valid], patch_y1[valid]
+        # Sampled pixels per patch row/column (stride sampling: every sample_step-th pixel, like get_player_color)
+        step = self.sample_step
+        pw = (patch_x2[valid] - px1 + step - 1) // step
+        ph = (patch_y2[valid] - py1 + step - 1) // step
+
+        # Row/column of every sampled pixel of every patch, patch after patch
+        area = pw * ph
+        starts = np.concatenate([[0], np.cumsum(area)[:-1]])
+        patch_idx = np.repeat(np.arange(len(area)), area)
+        local = np.arange(area.sum()) - starts[patch_idx]
+        rows = py1[patch_idx] + local // pw[patch_idx] * step
+        cols = px1[patch_idx] + local % pw[patch_idx] * step
+
+        # Convert to HSV (Hue, Saturation, Value) once for all patches
+        strip = frame[rows, cols].reshape(1, -1, 3)
+        hsv_strip = cv2.cvtColor(strip, cv2.COLOR_BGR2HSV)[0, :, :2].astype(np.float64)
+
+        colors[valid] = np.add.reduceat(hsv_strip, starts, axis=0) / area[:, None]
+        return colors
+
     def collect_samples(self, frame, player_detections):
         """
         Phase 1: Spatially separate samples.
@@ -45,9 +102,9 @@ class TeamAssigner:
         frame_width = frame.shape[1]
         center_x = frame_width / 2
 
-        for bbox in player_detections.xyxy:
-            color = self.get_player_color(frame, bbox)
-            if color is None: continue
+        colors = self.get_player_colors(frame, player_detections.xyxy)
+        for bbox, color in zip(player_detections.xyxy, colors):
+            if np.isnan(color[0]): continue
 
             # Determine side based on player center
             p_x = (bbox[0] + bbox[2]) / 2
@@ -64,6 +121,7 @@ class TeamAssigner:
         Ignores Liberos and outliers.
         """
         if len(samples) < 5: return np.mean(samples, axis=0)
+        from sklearn.cluster import KMeans
 
         # Cluster samples into 2 groups (Main Jersey vs Libero/Noise)
         kmeans = KMeans(n_clusters=2, init="k-means++", n_init=10)
@@ -96,6 +154,7 @@ class TeamAssigner:
         # We create a synthetic dataset of just these 2 pure colors
         # This forces the decision boundary to be exactly between them
         training_data = np.array([color_left, color_right])
+        from sklearn.cluster import KMeans
         
         self.kmeans = KMeans(n_clusters=2, init=training_data, n_init=1) # Force init at calculated centers
         self.kmeans.fit(training_data)
@@ -121,4 +180,208 @@ class TeamAssigner:
         team_id += 1 
 
         self.player_team_dict[player_id] = team_id
-        return team_id
\ No newline at end of file
+        return team_id
+
+    def get_player_teams(self, frame, player_detections):
+        """
+        Batch version of get_player_team for a whole sv.Detections.
+        Known tracker IDs come from player_team_dict; new ones are classified together
+        with a nearest-centroid step (same decision as KMeans.predict with 2 centers).
+        Returns an int array of team IDs (0 = unknown).
+        """
+        n = len(player_detections)
+        team_ids = np.zeros(n, dtype=int)
+        if n == 0 or not self.trained or self.kmeans is None: return team_ids
+
+        if player_detections.tracker_id is not None:
+            player_ids = player_detections.tracker_id
+        else:
+            player_ids = np.arange(n)
+
+        unknown = []
+        for idx, p_id in enumerate(player_ids):
+            team_id = self.player_team_dict.get(p_id)
+            if team_id is None:
+                unknown.append(idx)
+            else:
+                team_ids[idx] = team_id
+
+        if not unknown: return team_ids
+
+        unknown = np.array(unknown)
+        colors = self.get_player_colors(frame, player_detections.xyxy[unknown])
+        has_color = ~np.isnan(colors[:, 0])
+        unknown, colors = unknown[has_color], colors[has_color]
+
+        centers = self.kmeans.cluster_centers_
+        distances = ((colors[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        predicted = distances.argmin(axis=1) + 1
+
+        for idx, team_id in zip(unknown, predicted):
+            p_id = player_ids[idx]
+            # A duplicate ID in the same frame keeps the first classification (like the serial path)
+            team_ids[idx] = self.player_team_dict.setdefault(p_id, team_id)
+        return team_ids
+
+class SampleReservoir:
+    """Fixed-size uniform sample of an unbounded colour stream (reservoir sampling, Algorithm R)."""
+    def __init__(self, size, dims=2, seed=0):
+        self.size = size
+        self.data = np.empty((size, dims))
+        self.seen = 0
+        self.rng = np.random.default_rng(seed)
+
+    def add(self, samples):
+        for sample in samples:
+            if self.seen < self.size:
+                self.data[self.seen] = sample
+            else:
+                j = self.rng.integers(0, self.seen + 1)
+                if j < self.size:
+                    self.data[j] = sample
+            self.seen += 1
+
+    def samples(self):
+        return self.data[:min(self.seen, self.size)].copy()
+
+    def __len__(self):
+        return min(self.seen, self.size)
+
+class OnlineTeamAssigner(TeamAssigner):
+    """
+    Streaming team model with bounded memory.
+    - Colour samples go into fixed-size reservoirs (for the whole match, not just calibration), one
+      per team: by court side until the first fit, then by the nearest team colour. Teams swap
+      sides between sets, so pools kept by side would end up holding both jerseys.
+    - Centroids are refit on a worker thread with MiniBatchKMeans and swapped in atomically,
+      so the render loop never waits on clustering.
+    - Each track keeps exponentially decaying team votes, so an early misread gets corrected.
+    """
+    def __init__(self, reservoir_size=2000, refit_interval=250, vote_decay=0.95, sample_step=1):
+        super().__init__(sample_step)
+        self.left_samples = SampleReservoir(reservoir_size, seed=1)
+        self.right_samples = SampleReservoir(reservoir_size, seed=2)
+        self.refit_interval = refit_interval
+        self.vote_decay = vote_decay
+
+        self.centers = None
+        self.track_votes = {}        # tracker_id -> [votes team 1, votes team 2]
+        self.track_last_seen = {}
+        self.frames_seen = 0
+
+        self.lock = threading.Lock()
+        self.refit_thread = None
+
+    def collect_samples(self, frame, player_detections, colors=None):
+        if colors is None:
+            colors = self.get_player_colors(frame, player_detections.xyxy)
+        has_color = ~np.isnan(colors[:, 0])
+        if not has_color.any(): return
+
+        colors = colors[has_color]
+        with self.lock:
+            centers = self.centers
+        if centers is None:
+            # Before the first fit: teams are told apart by court side
+            p_x = (player_detections.xyxy[has_color, 0] + player_detections.xyxy[has_color, 2]) / 2
+            first_team = p_x < frame.shape[1] / 2
+        else:
+            # Then by the nearest team colour, so each pool keeps one team's jerseys after a side swap
+            distances = ((colors[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+            first_team = distances[:, 0] <= distances[:, 1]
+        self.left_samples.add(colors[first_team])
+        self.right_samples.add(colors[~first_team])
+
+    def fit_model(self):
+        """Starts a background fit; `trained` turns True once the first centroids are in."""
+        if len(self.left_samples) == 0 or len(self.right_samples) == 0:
+            print("[WARNING] Missing data for one side! Cannot train aggressively.")
+            return False
+        self.start_refit()
+        return self.trained
+
+    def start_refit(self):
+        if self.refit_thread is not None and self.refit_thread.is_alive(): return
+        left, right = self.left_samples.samples(), self.right_samples.samples()
+        if len(left) == 0 or len(right) == 0: return
+        self.refit_thread = threading.Thread(target=self._refit, args=(left, right), daemon=True)
+        self.refit_thread.start()
+
+    def _refit(self, left, right):
+        centers = np.array([self.get_dominant_color(left), self.get_dominant_color(right)])
+
+        previous = self.centers
+        if previous is not None:
+            # Keep team IDs attached to jersey colours. The pools are already per team after the first
+            # fit, so this only matters if a refit's dominant colours come out crossed
+            straight = np.linalg.norm(centers - previous, axis=1).sum()
+            crossed = np.linalg.norm(centers[::-1] - previous, axis=1).sum()
+            if crossed < straight:
+                centers = centers[::-1].copy()
+
+        with self.lock:
+            self.centers = centers
+            self.team_colors = {1: centers[0], 2: centers[1]}
+            self.trained = True
+
+    def get_dominant_color(self, samples):
+        if len(samples) < 5: return np.mean(samples, axis=0)
+        from sklearn.cluster import MiniBatchKMeans
+
+        kmeans = MiniBatchKMeans(n_clusters=2, n_init=3, batch_size=256, random_state=0)
+        kmeans.fit(samples)
+        counts = np.bincount(kmeans.labels_, minlength=2)
+        return kmeans.cluster_centers_[counts.argmax()]
+
+    def get_player_teams(self, frame, player_detections):
+        n = len(player_detections)
+        team_ids = np.zeros(n, dtype=int)
+        if n == 0: return team_ids
+
+        self.frames_seen += 1
+        colors = self.get_player_colors(frame, player_detections.xyxy)
+        self.collect_samples(frame, player_detections, colors)
+
+        if self.trained and self.frames_seen % self.refit_interval == 0:
+            self.start_refit()
+            self.forget_lost_tracks()
+
+        with self.lock:
+            centers = self.centers
+        if centers is None: return team_ids
+
+        if player_detections.tracker_id is not None:
+            player_ids = player_detections.tracker_id
+        else:
+            player_ids = np.arange(n)
+
+        has_color = ~np.isnan(colors[:, 0])
+        distances = ((colors[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        predicted = np.where(has_color, np.nan_to_num(distances).argmin(axis=1), -1)
+
+        for idx, p_id in enumerate(player_ids):
+            votes = self.track_votes.get(p_id)
+            if votes is None:
+                votes = self.track_votes[p_id] = np.zeros(2)
+            votes *= self.vote_decay
+            if predicted[idx] >= 0:
+                votes[predicted[idx]] += 1.0
+            self.track_last_seen[p_id] = self.frames_seen
+
+            if votes.any():
+                team_ids[idx] = votes.argmax() + 1
+                self.player_team_dict[p_id] = team_ids[idx]
+        return team_ids
+
+    def get_player_team(self, frame, bbox, player_id):
+        detections = sv.Detections(xyxy=np.array([bbox]), tracker_id=np.array([player_id]))
+        return self.get_player_teams(frame, detections)[0]
+
+    def forget_lost_tracks(self, max_age=None):
+        """Drops votes of tracks not seen for a while, so memory stays bounded over a match."""
+        max_age = max_age or 10 * self.refit_interval
+        for p_id, last_seen in list(self.track_last_seen.items()):
+            if self.frames_seen - last_seen > max_age:
+                del self.track_last_seen[p_id]
+                self.track_votes.pop(p_id, None)
+                self.player_team_dict.pop(p_id, None)
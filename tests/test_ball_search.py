@@ -0,0 +1,50 @@
+"""BallSearcher: picking the ball along its trajectory, without a native-resolution detector."""
+import numpy as np
+import supervision as sv
+from ball_search import BallSearcher
+
+FRAME = np.zeros((720, 1280, 3), dtype=np.uint8)
+
+def ball(cx, cy, size=16, confidence=0.9):
+    half = size / 2
+    return [cx - half, cy - half, cx + half, cy + half], confidence
+
+def detections(*balls):
+    if not balls:
+        return sv.Detections.empty()
+    xyxy, confidence = zip(*balls)
+    return sv.Detections(xyxy=np.array(xyxy, dtype=np.float32), confidence=np.array(confidence, dtype=np.float32))
+
+def center(box):
+    return (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+
+def test_picks_ball_nearest_to_prediction():
+    searcher = BallSearcher()
+    for x in (100, 130, 160):
+        searcher.select(FRAME, detections(ball(x, 300)))
+    # A more confident false positive far away loses to the ball on the trajectory
+    box = searcher.select(FRAME, detections(ball(1000, 600, confidence=0.99), ball(190, 300, confidence=0.4)))
+    assert center(box) == (190, 300)
+
+def test_sudden_direction_change_keeps_the_ball():
+    searcher = BallSearcher(roi_size=100)
+    for x in (400, 440, 480, 520):
+        assert searcher.select(FRAME, detections(ball(x, 300))) is not None
+    # A spike: the ball comes back the other way, far outside the window around the prediction (560, 300)
+    box = searcher.select(FRAME, detections(ball(420, 180)))
+    assert box is not None and center(box) == (420, 180)
+    assert searcher.misses == 0
+
+    # The track follows the new direction
+    box = searcher.select(FRAME, detections(ball(320, 60)))
+    assert center(box) == (320, 60)
+
+def test_missing_ball_counts_misses_until_lost():
+    searcher = BallSearcher(max_misses=3)
+    for x in (100, 130):
+        searcher.select(FRAME, detections(ball(x, 300)))
+    for _ in range(3):
+        assert searcher.select(FRAME, detections()) is None
+    assert searcher.predict() is None
+    box = searcher.select(FRAME, detections(ball(900, 500)))
+    assert center(box) == (900, 500)
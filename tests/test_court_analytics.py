@@ -0,0 +1,67 @@
+"""CourtAnalytics.update on scripted tracks: distance, rejected steps, sprints, jumps, occupancy."""
+import numpy as np
+import pytest
+from court_analytics import CourtAnalytics
+
+FPS = 25
+
+def box(bottom, height=200):
+    return [100, bottom - height, 160, bottom]
+
+def test_scripted_match():
+    # No smoothing, so distances are the exact sums of the scripted steps
+    analytics = CourtAnalytics(FPS, smoothing=1.0, max_speed=9.0, sprint_speed=4.0, sprint_frames=10,
+                               jump_ratio=0.15, jump_frames=3)
+    for f in range(61):
+        if f < 50:
+            walker = (1 + 0.2 * f, 4.5)               # 5 m/s
+        elif f == 50:
+            walker = (15.0, 4.5)                      # Teleport: an ID swap or a projection glitch
+        else:
+            walker = (15 + 0.04 * (f - 50), 4.5)      # 1 m/s
+        # Player 2 stands still and jumps at frames 20-24: feet 60 px (0.3 box heights) up
+        jumper_bottom = 440 if 20 <= f < 25 else 500
+        analytics.update(f, np.array([1, 2]), np.array([1, 2]), np.array([walker, (6.0, 3.0)]),
+                         np.array([box(600), box(jumper_bottom)], dtype=np.float32))
+
+    players = analytics.summary()["players"]
+    walker, jumper = players["1"], players["2"]
+    assert walker["distance_m"] == pytest.approx(49 * 0.2 + 10 * 0.04, abs=1e-3)
+    assert walker["rejected_steps"] == 1
+    assert walker["sprints"] == 1
+    assert walker["top_speed_ms"] == pytest.approx(5.0, abs=1e-2)
+    assert walker["jumps"] == 0
+
+    assert jumper["jumps"] == 1
+    assert jumper["distance_m"] == 0 and jumper["rejected_steps"] == 0 and jumper["sprints"] == 0
+
+    # Occupancy in seconds: every frame on the ground counts once, airborne frames do not
+    assert analytics.grid(tracker_id=1).sum() == pytest.approx(61 / FPS)
+    assert analytics.grid(tracker_id=2).sum() == pytest.approx(56 / FPS)
+    assert analytics.grid(team=1).sum() == pytest.approx(61 / FPS)
+    assert analytics.grid(team=2).sum() == pytest.approx(56 / FPS)
+    cell = np.floor((np.array([6.0, 3.0]) + analytics.margin) / analytics.cell_size).astype(int)
+    assert analytics.grid(tracker_id=2)[tuple(cell)] == pytest.approx(56 / FPS)
+
+def test_slots_grow_past_64_tracks():
+    analytics = CourtAnalytics(FPS, smoothing=1.0)
+    ids = np.arange(64)
+    positions = np.stack([np.full(64, 5.0), np.linspace(0, 9, 64)], axis=1)
+    analytics.update(0, ids, np.ones(64, dtype=int), positions)
+    analytics.update(1, ids, np.ones(64, dtype=int), positions + [0.1, 0])
+    assert len(analytics.team) == 64
+
+    # 40 new tracks in one frame: the slot arrays are reallocated, the first 64 keep their stats
+    ids = np.arange(104)
+    positions = np.stack([np.full(104, 5.2), np.linspace(0, 9, 104)], axis=1)
+    positions[:64, 1] = np.linspace(0, 9, 64)
+    analytics.update(2, ids, np.full(104, 2), positions)
+    assert len(analytics.team) >= 104
+    assert len(analytics.tracker_ids) == 104
+
+    players = analytics.summary()["players"]
+    assert players["10"]["distance_m"] == pytest.approx(0.2, abs=1e-4)
+    assert players["100"]["distance_m"] == 0 and players["100"]["seconds_tracked"] == pytest.approx(1 / FPS)
+    assert analytics.grid(tracker_id=10).sum() == pytest.approx(3 / FPS)
+    assert analytics.grid(tracker_id=100).sum() == pytest.approx(1 / FPS)
+    assert analytics.grid(team=1).sum() + analytics.grid(team=2).sum() == pytest.approx((64 * 3 + 40) / FPS)
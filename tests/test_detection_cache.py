@@ -0,0 +1,80 @@
+"""detection_cache: an interrupted replace keeps the previous complete entry readable."""
+import os
+import numpy as np
+import pytest
+import supervision as sv
+import detection_cache
+from detection_store import DetectionStore
+
+KEY = "0123abcd"
+
+def make_store(frames):
+    store = DetectionStore()
+    for i in range(frames):
+        store.append(sv.Detections(xyxy=np.array([[i, i, i + 20, i + 40]], dtype=np.float32),
+                                   class_id=np.array([1]), tracker_id=np.array([i + 1])), None)
+    return store
+
+class Interrupted(Exception):
+    pass
+
+def interrupt_after(monkeypatch, renames):
+    """Makes os.replace fail once `renames` renames have gone through, as if the process died there."""
+    done = []
+    replace = os.replace
+    def failing_replace(src, dst):
+        if len(done) == renames:
+            raise Interrupted(f"{src} -> {dst}")
+        done.append(dst)
+        replace(src, dst)
+    monkeypatch.setattr(os, "replace", failing_replace)
+
+@pytest.mark.parametrize("renames", [0, 1])
+def test_interrupted_save_keeps_previous_entry(tmp_path, monkeypatch, renames):
+    cache_dir = str(tmp_path)
+    detection_cache.save(make_store(10), cache_dir, KEY, arrays={"ball_track": np.arange(10)})
+
+    interrupt_after(monkeypatch, renames)
+    with pytest.raises(Interrupted):
+        detection_cache.save(make_store(20), cache_dir, KEY, arrays={"ball_track": np.arange(20)})
+    monkeypatch.undo()
+
+    # renames=1: the old entry was moved to the backup, the new one not yet in place
+    assert os.path.exists(os.path.join(cache_dir, KEY)) == (renames == 0)
+    cached = detection_cache.load(cache_dir, KEY)
+    assert cached is not None and len(cached) == 10
+    assert len(detection_cache.load_array(cache_dir, KEY, "ball_track")) == 10
+
+    # The next save replaces it and cleans up
+    detection_cache.save(make_store(20), cache_dir, KEY)
+    assert len(detection_cache.load(cache_dir, KEY)) == 20
+    assert sorted(os.listdir(cache_dir)) == [KEY]
+
+@pytest.mark.parametrize("renames", [0, 1])
+def test_interrupted_checkpoint_keeps_previous_checkpoint(tmp_path, monkeypatch, renames):
+    cache_dir = str(tmp_path)
+    detection_cache.checkpoint(make_store(10), cache_dir, KEY, {"frame": 10})
+
+    interrupt_after(monkeypatch, renames)
+    with pytest.raises(Interrupted):
+        detection_cache.checkpoint(make_store(20), cache_dir, KEY, {"frame": 20})
+    monkeypatch.undo()
+
+    cached, state = detection_cache.load_checkpoint(cache_dir, KEY)
+    assert len(cached) == 10 and state == {"frame": 10}
+    np.testing.assert_array_equal(cached.xyxy, make_store(10).xyxy)
+
+    # Saving the finished entry drops the checkpoint and its backup
+    detection_cache.save(make_store(30), cache_dir, KEY)
+    assert detection_cache.load_checkpoint(cache_dir, KEY) == (None, None)
+    assert sorted(os.listdir(cache_dir)) == [KEY]
+
+def test_new_entry_wins_over_leftover_backup(tmp_path, monkeypatch):
+    # Killed after the new entry was moved in, before the backup was deleted
+    cache_dir = str(tmp_path)
+    detection_cache.save(make_store(10), cache_dir, KEY)
+    monkeypatch.setattr(detection_cache.shutil, "rmtree", lambda *args, **kwargs: None)
+    detection_cache.save(make_store(20), cache_dir, KEY)
+    monkeypatch.undo()
+    assert os.path.exists(os.path.join(cache_dir, KEY + detection_cache.BACKUP_SUFFIX))
+    assert len(detection_cache.load(cache_dir, KEY)) == 20
@@ -0,0 +1,116 @@
+"""DetectionStore: ragged columns against the per-frame sv.Detections they replace."""
+import pickle
+import numpy as np
+import pytest
+import supervision as sv
+from detection_store import DetectionStore
+
+NAMES = {0: "ball", 1: "player", 2: "referee"}
+
+def make_frames(count=40, seed=0):
+    """Random per-frame detections, every fifth frame empty; a ball box on odd frames."""
+    rng = np.random.default_rng(seed)
+    frames, balls = [], []
+    for i in range(count):
+        n = 0 if i % 5 == 0 else int(rng.integers(1, 9))
+        xy = rng.uniform(0, 1000, (n, 2)).astype(np.float32)
+        class_id = rng.integers(0, 3, n)
+        frames.append(sv.Detections(
+            xyxy=np.hstack([xy, xy + 30]),
+            class_id=class_id,
+            confidence=rng.uniform(0.2, 1, n).astype(np.float32),
+            tracker_id=rng.integers(1, 50, n),
+            data={"class_name": np.array([NAMES[c] for c in class_id])},
+        ))
+        balls.append(np.array([i, i, i + 10, i + 10], dtype=np.float32) if i % 2 else None)
+    return frames, balls
+
+def build(frames, balls, **kwargs):
+    store = DetectionStore(**kwargs)
+    for detections, ball in zip(frames, balls):
+        store.append(detections, ball)
+    return store
+
+def assert_same(store, frames, balls):
+    assert len(store) == len(frames)
+    for i, expected in enumerate(frames):
+        actual = store[i]
+        assert len(actual) == len(expected)
+        if balls[i] is None:
+            assert store.ball_box(i) is None
+        else:
+            np.testing.assert_array_equal(store.ball_box(i), balls[i])
+        if len(expected) == 0:
+            continue
+        np.testing.assert_array_equal(actual.xyxy, expected.xyxy)
+        np.testing.assert_array_equal(actual.class_id, expected.class_id)
+        np.testing.assert_array_equal(actual.confidence, expected.confidence)
+        np.testing.assert_array_equal(actual.tracker_id, expected.tracker_id)
+        np.testing.assert_array_equal(actual.data["class_name"], expected.data["class_name"])
+
+def test_round_trip_with_growth_and_empty_frames():
+    frames, balls = make_frames()
+    # Tiny capacities: the columns and the per-frame arrays grow several times
+    store = build(frames, balls, capacity=4, frame_capacity=2)
+    store.append_empty(3)
+    frames += [sv.Detections.empty()] * 3
+    balls += [None] * 3
+    assert_same(store, frames, balls)
+    assert store[-1].is_empty() and store.ball_box(len(store) - 1) is None
+    np.testing.assert_array_equal(store.frame_index(), np.repeat(np.arange(len(frames)), [len(d) for d in frames]))
+
+def test_untracked_detections():
+    store = DetectionStore()
+    store.append(sv.Detections(xyxy=np.zeros((2, 4), dtype=np.float32), class_id=np.array([1, 1])))
+    assert store[0].tracker_id is None
+    assert np.isnan(store[0].confidence).all()
+
+def test_slices_are_rebased_views():
+    frames, balls = make_frames()
+    store = build(frames, balls)
+    part = store[10:25]
+    assert_same(part, frames[10:25], balls[10:25])
+    assert len(store[30:10]) == 0
+    with pytest.raises(ValueError):
+        store[::2]
+    with pytest.raises(IndexError):
+        store[len(store)]
+
+    # Appending to a slice copies it and leaves the parent untouched
+    before = store.xyxy.copy()
+    part.append(frames[0], None)
+    np.testing.assert_array_equal(store.xyxy, before)
+    assert_same(part, frames[10:25] + frames[:1], balls[10:25] + [None])
+
+def test_split_by_class():
+    frames, balls = make_frames()
+    players, = build(frames, balls).split(1)
+    assert_same(players, [d[d.class_id == 1] for d in frames], balls)
+
+def test_save_and_mmap_load(tmp_path):
+    frames, balls = make_frames()
+    store = build(frames, balls)
+    store.save(str(tmp_path / "store"), meta={"fps": 25})
+
+    loaded = DetectionStore.load(str(tmp_path / "store"))
+    assert isinstance(loaded.columns["xyxy"], np.memmap)
+    assert loaded.meta["fps"] == 25 and loaded.class_names == store.class_names
+    assert_same(loaded, frames, balls)
+
+    # Appending to a memory-mapped store copies the columns, the files stay as saved
+    loaded.append(frames[1], balls[1])
+    assert_same(loaded, frames + frames[1:2], balls + balls[1:2])
+    assert_same(DetectionStore.load(str(tmp_path / "store"), mmap=False), frames, balls)
+
+def test_pickle_keeps_only_filled_part():
+    frames, balls = make_frames()
+    store = build(frames, balls, capacity=100000)
+    data = pickle.dumps(store)
+    assert len(data) < 100000 * 4 * 4
+    restored = pickle.loads(data)
+    assert len(restored.columns["xyxy"]) == store.num_rows
+    assert_same(restored, frames, balls)
+
+    # The restored store can keep growing
+    restored.append(frames[3], balls[3])
+    assert_same(restored, frames + frames[3:4], balls + balls[3:4])
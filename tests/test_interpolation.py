@@ -0,0 +1,79 @@
+"""Ball interpolation: interpolate_ball_positions and its streaming version."""
+import numpy as np
+import pytest
+from utils import StreamingBallInterpolator, interpolate_ball_positions
+
+def box(x):
+    return np.array([x, 2 * x, x + 10, 2 * x + 10], dtype=np.float32)
+
+def detections(pattern):
+    """'x' = ball detected (at x = frame number), '.' = missed."""
+    return [box(i) if c == "x" else None for i, c in enumerate(pattern)]
+
+def nan_rows(boxes):
+    return np.flatnonzero(np.isnan(boxes[:, 0])).tolist()
+
+def test_interior_gap_is_linear():
+    boxes = interpolate_ball_positions(detections("x...x"))
+    np.testing.assert_allclose(boxes, [box(i) for i in range(5)])
+
+def test_leading_gap_stays_nan_and_trailing_gap_holds_last():
+    boxes = interpolate_ball_positions(detections("..x.x.."))
+    assert nan_rows(boxes) == [0, 1]
+    np.testing.assert_allclose(boxes[2:5], [box(i) for i in range(2, 5)])
+    np.testing.assert_allclose(boxes[5:], [box(4), box(4)])
+
+def test_no_detection_at_all():
+    assert nan_rows(interpolate_ball_positions(detections("....."))) == [0, 1, 2, 3, 4]
+
+def test_float32_buffer_is_filled_in_place():
+    buffer = np.full((5, 4), np.nan, dtype=np.float32)
+    buffer[0], buffer[4] = box(0), box(4)
+    assert interpolate_ball_positions(buffer) is not None
+    np.testing.assert_allclose(buffer[2], box(2))
+
+def test_gaps_longer_than_max_gap_stay_nan():
+    # Gaps of 2 (kept), 3 (kept, == max_gap), 4 (dropped), trailing 4 (dropped)
+    pattern = "x..x...x....x...."
+    boxes = interpolate_ball_positions(detections(pattern), max_gap=3)
+    assert nan_rows(boxes) == [8, 9, 10, 11, 13, 14, 15, 16]
+    np.testing.assert_allclose(boxes[:8], [box(i) for i in range(8)])
+
+    # A trailing gap within max_gap holds the last position
+    boxes = interpolate_ball_positions(detections("x.x.."), max_gap=3)
+    np.testing.assert_allclose(boxes[3:], [box(2), box(2)])
+
+def run_streaming(ball_detections, **kwargs):
+    interpolator = StreamingBallInterpolator(**kwargs)
+    released = []
+    for i, bbox in enumerate(ball_detections):
+        released += interpolator.push(i, bbox)
+    released += interpolator.flush()
+    frames = [payload for payload, _ in released]
+    assert frames == list(range(len(ball_detections))), "frames released out of order"
+    return np.array([bbox for _, bbox in released], dtype=np.float32)
+
+@pytest.mark.parametrize("max_gap", [None, 0, 2, 5])
+@pytest.mark.parametrize("seed", range(5))
+def test_streaming_matches_batch(seed, max_gap):
+    rng = np.random.default_rng(seed)
+    pattern = "".join(rng.choice(["x", "."], p=[0.4, 0.6], size=200))
+    ball_detections = detections(pattern)
+    expected = interpolate_ball_positions(ball_detections, max_gap=max_gap)
+    # The lookahead covers the longest gap: past it the streaming version holds the last position instead
+    actual = run_streaming(ball_detections, max_lookahead=len(pattern), max_gap=max_gap)
+    np.testing.assert_allclose(actual, expected, atol=1e-4)
+
+def test_streaming_holds_back_only_while_ball_is_missing():
+    interpolator = StreamingBallInterpolator(max_lookahead=3)
+    assert [p for p, _ in interpolator.push(0, box(0))] == [0]
+    assert interpolator.push(1, None) == []
+    assert interpolator.push(2, None) == []
+    assert [p for p, _ in interpolator.push(3, box(3))] == [1, 2, 3]
+
+    # Past the lookahead the oldest frame is released with the last position
+    for i in range(4, 7):
+        assert interpolator.push(i, None) == []
+    (payload, bbox), = interpolator.push(7, None)
+    assert payload == 4
+    np.testing.assert_allclose(bbox, box(3))
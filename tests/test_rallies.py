@@ -0,0 +1,59 @@
+"""Rally detection on scripted motion signals, and the frame range helpers."""
+import numpy as np
+import pytest
+from rallies import find_rallies, merge_ranges, parse_ranges
+
+FPS = 10
+
+def energy(frames, *in_play):
+    """Motion energy 1 on the (start, end) ranges, 0 elsewhere."""
+    signal = np.zeros(frames, dtype=np.float32)
+    for start, end in in_play:
+        signal[start:end] = 1
+    return signal
+
+def rallies(signal, **kwargs):
+    # No smoothing (window of one frame) and a fixed threshold: the runs are exactly the scripted ranges
+    ranges, _ = find_rallies(signal, FPS, motion_threshold=0.5, smoothing=1 / FPS,
+                             min_duration=3.0, min_gap=2.0, **kwargs)
+    return ranges
+
+def test_short_gaps_are_bridged_and_short_bursts_dropped():
+    # 1 s pause inside a rally (bridged), a 2 s burst (dropped), a 3 s pause between rallies (kept)
+    signal = energy(300, (20, 60), (70, 120), (150, 170), (200, 280))
+    assert rallies(signal, padding=0) == [(20, 120), (200, 280)]
+    assert rallies(signal, padding=1.0) == [(10, 130), (190, 290)]
+
+def test_gap_of_exactly_min_gap_is_not_bridged():
+    signal = energy(200, (10, 50), (70, 110))
+    assert rallies(signal, padding=0) == [(10, 50), (70, 110)]
+    ranges, _ = find_rallies(signal, FPS, motion_threshold=0.5, smoothing=1 / FPS, min_duration=3.0,
+                             min_gap=2.1, padding=0)
+    assert ranges == [(10, 110)]
+
+def test_padding_is_clipped_to_the_video():
+    signal = energy(300, (3, 50), (260, 300))
+    assert rallies(signal, padding=1.0) == [(0, 60), (250, 300)]
+
+def test_padded_rallies_that_touch_are_merged():
+    # A 3 s pause, not bridged, but 2 s of padding on both sides closes it
+    signal = energy(300, (20, 60), (90, 140))
+    assert rallies(signal, padding=2.0) == [(0, 160)]
+
+def test_ball_track_of_another_length():
+    signal = energy(100, (10, 60))
+    ranges, threshold = find_rallies(signal, FPS, ball_moving=np.ones(80, dtype=bool), motion_threshold=0.5,
+                                     smoothing=1 / FPS, padding=0)
+    assert threshold == 0.5
+    assert ranges == [(0, 80)]
+
+def test_merge_ranges():
+    assert merge_ranges([(50, 60), (0, 10), (5, 20), (20, 30), (40, 40)]) == [(0, 30), (50, 60)]
+    assert merge_ranges([(-5, 10), (90, 120), (130, 140)], frame_count=100) == [(0, 10), (90, 100)]
+
+def test_parse_ranges():
+    assert parse_ranges("100-500, 900-1200") == [(100, 500), (900, 1200)]
+    with pytest.raises(ValueError):
+        parse_ranges("100")
+    with pytest.raises(ValueError):
+        parse_ranges("100-500,900")
@@ -0,0 +1,28 @@
+"""
+Startup budget: `import main` and the first annotated frame of a synthetic video, each measured
+in a fresh interpreter by benchmarks/bench_startup.py (stub detector, no weights needed).
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks"))
+import bench_startup
+
+@pytest.fixture(scope="module")
+def startup(tmp_path_factory):
+    return bench_startup.measure_startup(str(tmp_path_factory.mktemp("startup")), frames=30, repeat=2)
+
+def test_import_loads_no_heavy_modules(startup):
+    loaded = set(startup["heavy_modules"]) & {"sklearn", "pandas", "ultralytics", "onnxruntime"}
+    assert not loaded, f"import main loads {sorted(loaded)}"
+
+def test_import_builds_nothing(startup):
+    assert startup["built"] == [], f"import main builds {startup['built']}"
+
+def test_import_budget(startup):
+    assert startup["import_seconds"] <= bench_startup.IMPORT_BUDGET
+
+def test_first_frame_budget(startup):
+    assert startup["first_frame_seconds"] is not None, "no frame was rendered"
+    assert startup["first_frame_seconds"] <= bench_startup.FIRST_FRAME_BUDGET
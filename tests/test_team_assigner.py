@@ -0,0 +1,53 @@
+"""OnlineTeamAssigner: team colour pools across a side swap."""
+import numpy as np
+import supervision as sv
+from team_assigner import OnlineTeamAssigner
+
+GREEN, BLUE = (0, 200, 0), (200, 0, 0)   # BGR jerseys, far apart in hue
+
+def scene(left_color, right_color, left_players, right_players):
+    """A frame with solid-colour players on both halves, and their detections."""
+    frame = np.full((360, 640, 3), 90, dtype=np.uint8)
+    boxes = []
+    for k in range(left_players):
+        boxes.append([20 + 45 * k, 100, 60 + 45 * k, 220])
+    for k in range(right_players):
+        boxes.append([340 + 45 * k, 100, 380 + 45 * k, 220])
+    for k, (x1, y1, x2, y2) in enumerate(boxes):
+        frame[y1:y2, x1:x2] = left_color if k < left_players else right_color
+    xyxy = np.array(boxes, dtype=np.float32)
+    return frame, sv.Detections(xyxy=xyxy, tracker_id=np.arange(1, len(boxes) + 1))
+
+def run(assigner, frame, detections, frames):
+    teams = None
+    for _ in range(frames):
+        teams = assigner.get_player_teams(frame, detections)
+        if assigner.refit_thread is not None:
+            assigner.refit_thread.join()
+    return teams
+
+def test_side_swap_keeps_team_colours_apart():
+    # 6 green players against 5 blue, 50 frames per side. Pools kept by court side would both end up
+    # mostly green (left: 300 green before, 250 blue after; right: 250 blue before, 300 green after)
+    assigner = OnlineTeamAssigner(reservoir_size=5000, refit_interval=10)
+    frame, detections = scene(GREEN, BLUE, 6, 5)
+    for _ in range(50):
+        assigner.collect_samples(frame, detections)
+    assigner.fit_model()
+    assigner.refit_thread.join()
+    green, blue = assigner.get_player_colors(frame, detections.xyxy[[0, -1]])
+    assert np.allclose(assigner.centers, [green, blue])
+
+    frame, detections = scene(BLUE, GREEN, 5, 6)
+    run(assigner, frame, detections, 50)
+    assigner.start_refit()
+    assigner.refit_thread.join()
+
+    gap = np.linalg.norm(assigner.centers[0] - assigner.centers[1])
+    assert gap > 0.5 * np.linalg.norm(green - blue)
+    assert np.allclose(assigner.centers, [green, blue])
+
+    # New tracks after the swap: the two jerseys are classified as different teams
+    detections.tracker_id = detections.tracker_id + 100
+    teams = run(assigner, frame, detections, 1)
+    assert set(teams[:5]) == {2} and set(teams[5:]) == {1}
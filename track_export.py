@@ -0,0 +1,144 @@
+import numpy as np
+
+# Dictionary of the "class" column (stored as int8 codes)
+CLASS_NAMES = ["player", "referee", "ball"]
+PLAYER, REFEREE, BALL = range(3)
+
+class TrackTableWriter:
+    """
+    Columnar track table, one row per entity per frame. Rows are buffered and written in
+    chunks of `chunk_rows` (one Parquet row group / Arrow record batch each), so memory stays
+    flat for a full match. Files ending in .arrow/.feather are written as Arrow IPC, anything
+    else as Parquet.
+    """
+    def __init__(self, path, chunk_rows=100_000):
+        import pyarrow as pa
+        self.pa = pa
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.schema = pa.schema([
+            ("frame", pa.int32()),
+            ("tracker_id", pa.int32()),          # -1 for the ball
+            ("class", pa.dictionary(pa.int8(), pa.string())),
+            ("team", pa.int8()),                 # 1 / 2, 0 = unknown or not a player
+            ("anchor_x", pa.float32()),          # Pixels: feet (bottom center), ball center
+            ("anchor_y", pa.float32()),
+            ("court_x", pa.float32()),           # Metres along the court length
+            ("court_y", pa.float32()),           # Metres across the court
+            ("interpolated", pa.bool_()),        # Ball position filled in by PASS 2
+        ])
+        self.pending = []
+        self.pending_rows = 0
+        self.rows = 0
+
+        if path.endswith((".arrow", ".feather")):
+            self.writer = pa.ipc.new_file(path, self.schema)
+        else:
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def append(self, columns):
+        """`columns`: dict of equal-length NumPy arrays, "class" as int8 codes into CLASS_NAMES."""
+        n = len(columns["frame"])
+        if n == 0: return
+        self.pending.append(columns)
+        self.pending_rows += n
+        if self.pending_rows >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.pending: return
+        pa = self.pa
+        arrays = []
+        for field in self.schema:
+            values = np.concatenate([columns[field.name] for columns in self.pending])
+            if field.name == "class":
+                arrays.append(pa.DictionaryArray.from_arrays(values.astype(np.int8), pa.array(CLASS_NAMES)))
+            else:
+                arrays.append(pa.array(values.astype(field.type.to_pandas_dtype()), type=field.type))
+        self.writer.write_batch(pa.record_batch(arrays, schema=self.schema))
+
+        self.rows += self.pending_rows
+        self.pending = []
+        self.pending_rows = 0
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def export_tracks(path, all_player_detections, all_ref_detections, raw_ball_boxes, ball_boxes,
+                  player_team_dict, view_transformer, chunk_frames=1000, ranges=None):
+    """
+    Writes players, referees and the ball of every frame to `path`.
+    Players and referees are DetectionStores, the ball boxes (frames, 4) arrays with NaN rows
+    (`raw_ball_boxes` before interpolation). Rows of `chunk_frames` frames are built from the
+    store columns in bulk and projected to the court with one transform_points call.
+    With `ranges` ((start, end) frame ranges) only those frames are written.
+    Returns the number of rows written.
+    """
+    n_frames = len(ball_boxes)
+    raw_missing = np.isnan(np.asarray(raw_ball_boxes, dtype=np.float32)[:, 0])
+    chunks = [(start, min(start + chunk_frames, range_end, n_frames))
+              for range_start, range_end in (ranges or [(0, n_frames)])
+              for start in range(range_start, min(range_end, n_frames), chunk_frames)]
+    with TrackTableWriter(path) as writer:
+        for start, end in chunks:
+            parts = [
+                _people_rows(all_player_detections[start:end], start, PLAYER, player_team_dict),
+                _people_rows(all_ref_detections[start:end], start, REFEREE, None),
+            ]
+
+            boxes = np.asarray(ball_boxes[start:end], dtype=np.float32)
+            found = np.flatnonzero(~np.isnan(boxes[:, 0]))
+            parts.append({
+                "frame": start + found,
+                "tracker_id": np.full(len(found), -1),
+                "class": np.full(len(found), BALL),
+                "team": np.zeros(len(found)),
+                "anchor": (boxes[found, :2] + boxes[found, 2:]) / 2,
+                "interpolated": raw_missing[start + found],
+            })
+
+            columns = {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+            if len(columns["frame"]) == 0: continue
+            # Frame-major like the video: players, referees, then the ball within each frame
+            order = np.argsort(columns["frame"], kind="stable")
+            columns = {name: values[order] for name, values in columns.items()}
+
+            anchors = columns.pop("anchor")
+            court = np.asarray(view_transformer.transform_points(anchors, columns["frame"]))
+            columns.update({
+                "anchor_x": anchors[:, 0], "anchor_y": anchors[:, 1],
+                "court_x": court[:, 0], "court_y": court[:, 1],
+            })
+            writer.append(columns)
+    return writer.rows
+
+def _people_rows(store, frame_start, class_code, team_dict):
+    xyxy = store.xyxy
+    ids = store.tracker_id
+    n = len(ids)
+    teams = np.zeros(n, dtype=np.int8)
+    if team_dict and n > 0:
+        # Vectorized dict lookup: sorted keys + searchsorted
+        keys = np.array(list(team_dict.keys()), dtype=np.int64)
+        values = np.array(list(team_dict.values()), dtype=np.int8)
+        order = np.argsort(keys)
+        keys, values = keys[order], values[order]
+        pos = np.minimum(np.searchsorted(keys, ids), len(keys) - 1)
+        hit = keys[pos] == ids
+        teams[hit] = values[pos[hit]]
+    return {
+        "frame": frame_start + store.frame_index(),
+        "tracker_id": ids,
+        "class": np.full(n, class_code),
+        "team": teams,
+        "anchor": np.stack([(xyxy[:, 0] + xyxy[:, 2]) / 2, xyxy[:, 3]], axis=1).reshape(-1, 2),
+        "interpolated": np.zeros(n, dtype=bool),
+    }
@@ -1,30 +1,200 @@
+import threading
+import time
+from contextlib import contextmanager
 import cv2
 import numpy as np
-import pandas as pd
 import config
 
-def interpolate_ball_positions(ball_detections):
+def interpolate_ball_positions(ball_detections, max_gap=None):
     """
-    Takes a list of bounding boxes (some might be None/Empty).
-    Returns a list of interpolated bounding boxes.
+    Takes a list of bounding boxes (some might be None/Empty), or an (N, 4) float32
+    array with NaN rows for missing frames (filled in place).
+    Returns an (N, 4) float32 array of interpolated bounding boxes.
+
+    Gaps BETWEEN detections are filled linearly, frames after the last detection keep
+    the last position, frames before the first one stay NaN.
+    Gaps longer than `max_gap` frames are left NaN (dead ball, not a missed detection).
+    """
+    boxes = to_ball_buffer(ball_detections)
+    missing = np.isnan(boxes[:, 0])
+    known = np.flatnonzero(~missing)
+    if len(known) == 0: return boxes
+
+    # 1. Linear interpolation inside [first, last] detection
+    inside = np.flatnonzero(missing[known[0]:known[-1]]) + known[0]
+    if len(inside) > 0:
+        for c in range(4):
+            boxes[inside, c] = np.interp(inside, known, boxes[known, c])
+
+    # 2. Trailing frames hold the last position
+    boxes[known[-1] + 1:] = boxes[known[-1]]
+
+    # 3. Undo gaps that are too long to be a missed detection
+    if max_gap is not None:
+        gap_starts = known[:-1][np.diff(known) - 1 > max_gap] + 1
+        gap_ends = known[1:][np.diff(known) - 1 > max_gap]
+        for gap_start, gap_end in zip(gap_starts, gap_ends):
+            boxes[gap_start:gap_end] = np.nan
+        if len(boxes) - 1 - known[-1] > max_gap:
+            boxes[known[-1] + 1:] = np.nan
+
+    return boxes
+
+def to_ball_buffer(ball_detections):
+    """(N, 4) float32 buffer with NaN rows for missing boxes. Float32 arrays are used as-is."""
+    if isinstance(ball_detections, np.ndarray) and ball_detections.dtype == np.float32:
+        return ball_detections.reshape(-1, 4)
+
+    boxes = np.full((len(ball_detections), 4), np.nan, dtype=np.float32)
+    for i, bbox in enumerate(ball_detections):
+        if bbox is not None and len(bbox) > 0:
+            boxes[i] = bbox
+    return boxes
+
+class StreamingBallInterpolator:
     """
-    # Convert input to a format Pandas likes
-    data = []
-    for bbox in ball_detections:
+    Incremental version of interpolate_ball_positions.
+    Holds frames back only while the ball is missing (at most `max_lookahead` of them)
+    and releases them as soon as the next detection closes the gap.
+    Once a gap is longer than `max_gap` it can only end up NaN, so its frames are released right away.
+    """
+    def __init__(self, max_lookahead=60, max_gap=None):
+        self.max_lookahead = max_lookahead
+        self.max_gap = max_gap
+        self.frame_idx = 0
+        self.last_bbox = None      # Last real detection
+        self.last_idx = -1
+        self.gap_length = 0        # Missing frames since the last detection
+        self.pending = []          # [(frame_idx, payload)] waiting for the gap to close
+
+    def push(self, payload, bbox):
+        """
+        Adds one frame. Returns the list of (payload, bbox) pairs that are ready, in frame order.
+        """
+        idx = self.frame_idx
+        self.frame_idx += 1
+        ready = []
+
         if bbox is None or len(bbox) == 0:
-            data.append([np.nan, np.nan, np.nan, np.nan])
+            self.gap_length += 1
+            if self.last_bbox is None or self.gap_too_long():
+                # Nothing to interpolate from, or a dead-ball gap: stays NaN
+                ready.extend((p_payload, self._empty()) for _, p_payload in self.pending)
+                self.pending = []
+                ready.append((payload, self._empty()))
+            else:
+                self.pending.append((idx, payload))
+                if len(self.pending) > self.max_lookahead:
+                    # Gap longer than the window: treat it like a trailing gap and hold the last position
+                    _, old_payload = self.pending.pop(0)
+                    ready.append((old_payload, self.last_bbox.copy()))
+            return ready
+
+        bbox = np.asarray(bbox, dtype=np.float32)
+
+        # Close the gap: linear interpolation between the last and the new detection
+        for p_idx, p_payload in self.pending:
+            t = (p_idx - self.last_idx) / (idx - self.last_idx)
+            ready.append((p_payload, (self.last_bbox + (bbox - self.last_bbox) * t).astype(np.float32)))
+        self.pending = []
+
+        ready.append((payload, bbox))
+        self.last_bbox = bbox
+        self.last_idx = idx
+        self.gap_length = 0
+        return ready
+
+    def flush(self):
+        """End of video: trailing frames keep the last known position (if the gap is not too long)."""
+        fill = self._empty() if self.gap_too_long() else self.last_bbox
+        ready = [(p_payload, fill.copy()) for _, p_payload in self.pending]
+        self.pending = []
+        return ready
+
+    def gap_too_long(self):
+        return self.max_gap is not None and self.gap_length > self.max_gap
+
+    def _empty(self):
+        return np.full(4, np.nan, dtype=np.float32)
+
+class CausalBallSmoother:
+    """
+    Ball smoothing for live input, where no future frames are available: an alpha-beta
+    filter on the box center with a constant-velocity prediction through short misses.
+    `update` takes the frame number of the input, so dropped frames just count as elapsed time.
+    After `hold_frames` frames without a detection the ball is hidden (NaN box).
+    """
+    def __init__(self, alpha=0.6, beta=None, hold_frames=5, max_jump=None):
+        self.alpha = alpha
+        self.beta = beta if beta is not None else alpha ** 2 / (2 - alpha)
+        self.hold_frames = hold_frames
+        self.max_jump = max_jump   # Pixels per frame; farther detections restart the filter
+        self.center = None
+        self.velocity = np.zeros(2, dtype=np.float32)
+        self.size = None
+        self.last_idx = None
+        self.last_seen = None
+
+    def update(self, bbox, frame_idx):
+        """Returns the smoothed box of frame `frame_idx` (NaN when the ball is lost)."""
+        if self.center is not None:
+            dt = frame_idx - self.last_idx
+            predicted = self.center + self.velocity * dt
+        found = bbox is not None and len(bbox) > 0 and not np.isnan(bbox[0])
+
+        if found:
+            bbox = np.asarray(bbox, dtype=np.float32)
+            center = (bbox[:2] + bbox[2:]) / 2
+            size = bbox[2:] - bbox[:2]
+            jump = self.max_jump is not None and self.center is not None and \
+                np.linalg.norm(center - predicted) > self.max_jump * dt
+            if self.center is None or jump or frame_idx - self.last_seen > self.hold_frames:
+                self.center, self.size = center, size
+                self.velocity = np.zeros(2, dtype=np.float32)
+            else:
+                residual = center - predicted
+                self.center = predicted + self.alpha * residual
+                self.velocity = self.velocity + self.beta * residual / dt
+                self.size = self.size + self.alpha * (size - self.size)
+            self.last_seen = frame_idx
+        elif self.center is None or frame_idx - self.last_seen > self.hold_frames:
+            self.last_idx = frame_idx
+            return np.full(4, np.nan, dtype=np.float32)
         else:
-            data.append(bbox)
+            self.center = predicted
 
-    # Create DataFrame
-    df = pd.DataFrame(data, columns=['x1', 'y1', 'x2', 'y2'])
+        self.last_idx = frame_idx
+        half = self.size / 2
+        return np.concatenate([self.center - half, self.center + half]).astype(np.float32)
 
-    # Interpolate (fill gaps BETWEEN detections)
-    # This connects the dots when the ball is temporarily lost
-    df = df.interpolate()
-    
-    # Convert back to list of lists
-    return df.to_numpy().tolist()
+class AnalysisScale:
+    """
+    Resolution pyramid of a video: YOLO runs on frames resized once to `analysis_width`
+    (same aspect ratio, never upscaled) and colour patches are stride-sampled every `sample_step`
+    source pixels (single pixels, not the averaged ones of the resized frame),
+    while drawing, the ball search crops and the court calibration stay in source pixels.
+    """
+    def __init__(self, width, height, analysis_width=None):
+        self.source_size = (width, height)
+        if analysis_width and analysis_width < width:
+            self.size = (int(analysis_width), max(1, int(round(height * analysis_width / width))))
+        else:
+            self.size = (width, height)
+        self.active = self.size != self.source_size
+        # Per-axis factors back to source pixels (exact for the rounded analysis size)
+        sx, sy = width / self.size[0], height / self.size[1]
+        self.factors = np.array([sx, sy, sx, sy], dtype=np.float32)
+        self.sample_step = max(1, int(round(sx)))
+
+    def downscale(self, frame):
+        if not self.active: return frame
+        return cv2.resize(frame, self.size, interpolation=cv2.INTER_LINEAR)
+
+    def to_source(self, detections):
+        """Maps the boxes of an sv.Detections found on a downscaled frame back to source pixels (in place)."""
+        if self.active and len(detections) > 0:
+            detections.xyxy = detections.xyxy * self.factors
+        return detections
 
 def draw_triangle(image, xyxy_box):
     """
@@ -54,3 +224,42 @@ def draw_triangle(image, xyxy_box):
     
     return image
 
+class StageTimer:
+    """
+    Accumulates wall time and frame counts per pipeline stage.
+    Thread-safe, so the decode thread can report into the same timer.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seconds = {}
+        self.frames = {}
+
+    def add(self, stage, seconds, frames=1):
+        with self.lock:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+            self.frames[stage] = self.frames.get(stage, 0) + frames
+
+    @contextmanager
+    def stage(self, stage, frames=1):
+        start = time.perf_counter()
+        yield
+        self.add(stage, time.perf_counter() - start, frames)
+
+    def summary(self):
+        """Machine-readable totals: {stage: {"seconds", "frames", "ms_per_frame"}}."""
+        with self.lock:
+            return {
+                stage: {
+                    "seconds": seconds,
+                    "frames": self.frames[stage],
+                    "ms_per_frame": 1000 * seconds / self.frames[stage] if self.frames[stage] else 0.0,
+                }
+                for stage, seconds in self.seconds.items()
+            }
+
+    def report(self):
+        print("[INFO] Stage throughput:")
+        for stage, seconds in self.seconds.items():
+            frames = self.frames[stage]
+            fps = frames / seconds if seconds > 0 else float('inf')
+            print(f"      {stage:<16} {frames:>7} frames  {seconds:8.2f}s  {fps:8.1f} fps")
@@ -0,0 +1,281 @@
+import queue
+import shutil
+import subprocess
+import threading
+import time
+import cv2
+import config
+
+_END = object()
+
+# --- Decoders ---
+class OpenCVDecoder:
+    def __init__(self, path):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"Could not open video: {path}")
+        self.path = path
+
+    def seek(self, frame_idx):
+        """Positions the decoder so the next read() returns frame `frame_idx`."""
+        if frame_idx == 0: return
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+        if int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)) == frame_idx:
+            return
+        # The container did not seek exactly: reopen and grab() up to the frame. With FFmpeg grab()
+        # still decodes every frame, it only skips the conversion to BGR
+        self.cap.release()
+        self.cap = cv2.VideoCapture(self.path)
+        for _ in range(frame_idx):
+            if not self.cap.grab(): break
+
+    def read(self):
+        ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def close(self):
+        self.cap.release()
+
+class PyAVDecoder:
+    """
+    PyAV decoding with multi-threaded codecs. Seeking is frame accurate: jump to the
+    keyframe before the target timestamp, then decode and drop frames up to it.
+    """
+    def __init__(self, path):
+        import av
+        try:
+            self.container = av.open(path)
+        except av.error.FFmpegError as e:
+            raise IOError(f"Could not open video: {path} ({e})")
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = "AUTO"
+        self.frames = self.container.decode(self.stream)
+        self.skip_before = None
+
+    def frame_pts(self, frame_idx):
+        start = self.stream.start_time or 0
+        return start + int(round(frame_idx / float(self.stream.average_rate) / float(self.stream.time_base)))
+
+    def seek(self, frame_idx):
+        if frame_idx == 0: return
+        target = self.frame_pts(frame_idx)
+        self.container.seek(target, stream=self.stream, backward=True, any_frame=False)
+        self.frames = self.container.decode(self.stream)
+        # Half a frame of tolerance for rounded timestamps
+        self.skip_before = target - (self.frame_pts(1) - self.frame_pts(0)) / 2
+
+    def read(self):
+        for frame in self.frames:
+            if self.skip_before is not None and frame.pts is not None and frame.pts < self.skip_before:
+                continue
+            self.skip_before = None
+            return frame.to_ndarray(format='bgr24')
+        return None
+
+    def close(self):
+        self.container.close()
+
+DECODERS = {"opencv": OpenCVDecoder, "pyav": PyAVDecoder}
+
+class ThreadedFrameReader:
+    """
+    Decodes a video on a background thread into a bounded queue,
+    so decoding overlaps with inference instead of running before it.
+    Frames always come out in decode order. `start`/`end` restrict it to a frame range.
+    """
+    def __init__(self, path, queue_size=32, timer=None, start=0, end=None, backend="opencv"):
+        self.path = path
+        self.timer = timer
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+        self.error = None
+        self.remaining = None if end is None else end - start
+
+        self.decoder = DECODERS[backend](path)
+        self.decoder.seek(start)
+
+        self.thread = threading.Thread(target=self._decode_loop, daemon=True)
+        self.thread.start()
+
+    def _decode_loop(self):
+        try:
+            while not self.stop_event.is_set() and self.remaining != 0:
+                start = time.perf_counter()
+                frame = self.decoder.read()
+                if frame is None: break
+                if self.timer is not None:
+                    self.timer.add("decode", time.perf_counter() - start)
+                if self.remaining is not None:
+                    self.remaining -= 1
+                self._put(frame)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.decoder.close()
+            self._put(_END)
+
+    def _put(self, item):
+        # Block while the consumer is behind, but give up if we are being closed
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def __iter__(self):
+        while True:
+            item = self.queue.get()
+            if item is _END: break
+            yield item
+        if self.error is not None:
+            raise self.error
+
+    def batches(self, batch_size):
+        """Yields lists of up to `batch_size` consecutive frames."""
+        batch = []
+        for frame in self:
+            batch.append(frame)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def qsize(self):
+        return self.queue.qsize()
+
+    def close(self):
+        self.stop_event.set()
+        self.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# --- Encoders ---
+class OpenCVEncoder:
+    def __init__(self, path, fps, size, fourcc='mp4v', **kwargs):
+        self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+
+    def write(self, frame):
+        self.writer.write(frame)
+
+    def close(self):
+        self.writer.release()
+
+class FFmpegEncoder:
+    """Pipes raw BGR frames into the ffmpeg binary (libx264 by default)."""
+    def __init__(self, path, fps, size, codec='libx264', crf=23, preset='veryfast'):
+        width, height = size
+        cmd = ["ffmpeg", "-y", "-loglevel", "error",
+               "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+               "-c:v", codec, "-preset", preset, "-crf", str(crf), "-pix_fmt", "yuv420p", path]
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        self.process.stdin.write(frame.tobytes())
+
+    def close(self):
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise IOError(f"ffmpeg exited with code {self.process.returncode}")
+
+class PyAVEncoder:
+    def __init__(self, path, fps, size, codec='libx264', crf=23, preset='veryfast'):
+        import av
+        self.av = av
+        self.container = av.open(path, 'w')
+        self.stream = self.container.add_stream(codec, rate=fps)
+        self.stream.width, self.stream.height = size
+        self.stream.pix_fmt = 'yuv420p'
+        self.stream.options = {"crf": str(crf), "preset": preset}
+
+    def write(self, frame):
+        video_frame = self.av.VideoFrame.from_ndarray(frame, format='bgr24')
+        for packet in self.stream.encode(video_frame):
+            self.container.mux(packet)
+
+    def close(self):
+        for packet in self.stream.encode():
+            self.container.mux(packet)
+        self.container.close()
+
+ENCODERS = {"opencv": OpenCVEncoder, "ffmpeg": FFmpegEncoder, "pyav": PyAVEncoder}
+
+def open_encoder(path, fps, size, backend="opencv", **kwargs):
+    """backend "auto" picks ffmpeg if the binary is installed, then PyAV, then OpenCV."""
+    if backend == "auto":
+        backend = "opencv"
+        if shutil.which("ffmpeg"):
+            backend = "ffmpeg"
+        else:
+            try:
+                import av  # noqa: F401
+                backend = "pyav"
+            except ImportError:
+                pass
+    return ENCODERS[backend](path, fps, size, **kwargs)
+
+class ThreadedFrameWriter:
+    """
+    Encodes on a background thread fed by a bounded queue, so encoding overlaps with
+    rendering. write() only blocks when the encoder is `queue_size` frames behind.
+    """
+    def __init__(self, path, fps, size, backend="opencv", queue_size=32, timer=None, **kwargs):
+        self.timer = timer
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self.encoder = open_encoder(path, fps, size, backend, **kwargs)
+        self.thread = threading.Thread(target=self._encode_loop, daemon=True)
+        self.thread.start()
+
+    def _encode_loop(self):
+        while True:
+            frame = self.queue.get()
+            if frame is _END: break
+            if self.error is not None: continue   # keep draining so write() never blocks forever
+            try:
+                start = time.perf_counter()
+                self.encoder.write(frame)
+                if self.timer is not None:
+                    self.timer.add("encode", time.perf_counter() - start)
+            except Exception as e:
+                self.error = e
+        try:
+            self.encoder.close()
+        except Exception as e:
+            self.error = self.error or e
+
+    def write(self, frame):
+        if self.error is not None:
+            raise self.error
+        self.queue.put(frame)
+
+    def qsize(self):
+        return self.queue.qsize()
+
+    def close(self):
+        self.queue.put(_END)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def create_reader(path, timer=None, start=0, end=None):
+    """ThreadedFrameReader with the decoder and queue size from config."""
+    return ThreadedFrameReader(path, queue_size=config.DECODE_QUEUE_SIZE, timer=timer,
+                               start=start, end=end, backend=config.VIDEO_DECODER)
+
+def create_writer(path, fps, size, timer=None):
+    """ThreadedFrameWriter with the encoder settings from config."""
+    return ThreadedFrameWriter(path, fps, size, backend=config.VIDEO_ENCODER,
+                               queue_size=config.ENCODE_QUEUE_SIZE, timer=timer,
+                               crf=config.H264_CRF, preset=config.H264_PRESET)
@@ -4,20 +4,20 @@ import json
 import os
 
 class ViewTransformer():
-    def __init__(self):
+    def __init__(self, calibration_path='court_config.json'):
         # VOLLEYBALL COURT DIMENSIONS (Meters)
         self.court_width = 9.0
         self.court_length = 18.0
 
         # 1. Try to load from the automated file
-        if os.path.exists('court_config.json'):
+        if calibration_path and os.path.exists(calibration_path):
             try:
-                with open('court_config.json', 'r') as f:
+                with open(calibration_path, 'r') as f:
                     loaded_points = json.load(f)
                 self.pixel_vertices = np.array(loaded_points)
-                print("[INFO] ViewTransformer: Loaded custom court coordinates.")
+                print(f"[INFO] ViewTransformer: Loaded custom court coordinates from {calibration_path}.")
             except Exception as e:
-                print(f"[ERROR] Failed to load court_config.json: {e}")
+                print(f"[ERROR] Failed to load {calibration_path}: {e}")
                 self.pixel_vertices = self.get_default_vertices()
         else:
             print("[WARNING] ViewTransformer: Using DEFAULT coordinates (Run get_court_coordinates.py to fix).")
@@ -35,6 +35,8 @@ class ViewTransformer():
         self.target_vertices = self.target_vertices.astype(np.float32)
 
         self.perspective_transformer = cv2.getPerspectiveTransform(self.pixel_vertices, self.target_vertices)
+        # Per-frame matrices for a moving camera (camera_motion.CameraMotion), None = static camera
+        self.camera_motion = None
 
     def get_default_vertices(self):
         # Fallback placeholders
@@ -42,10 +44,24 @@ class ViewTransformer():
             [250, 400], [1100, 400], [1300, 900], [100, 900]
         ])
 
-    def transform_points(self, points):
+    def transform_points(self, points, frame_idx=None):
+        """
+        Pixel -> court (metres). With camera motion, `frame_idx` picks the frame's matrix:
+        one frame for all points, or an array with the frame of every point.
+        """
         if points is None or len(points) == 0:
             return []
 
+        if self.camera_motion is not None and frame_idx is not None:
+            matrices = self.camera_motion.matrix(frame_idx)
+            p = np.concatenate([np.asarray(points, dtype=np.float32).reshape(-1, 2),
+                                np.ones((len(points), 1), dtype=np.float32)], axis=1)
+            if matrices.ndim == 2:
+                projected = p @ matrices.T
+            else:
+                projected = np.einsum('nij,nj->ni', matrices, p)
+            return projected[:, :2] / projected[:, 2:]
+
         p = points.reshape(-1, 1, 2).astype(np.float32)
         transformed_points = cv2.perspectiveTransform(p, self.perspective_transformer)
         return transformed_points.reshape(-1, 2)
\ No newline at end of file